@@ -1,38 +1,94 @@
-from flask import Flask, request, render_template, jsonify
-import mysql.connector
+from flask import Flask, request, render_template, jsonify, Response, stream_with_context, g
+import json
 import numpy as np
 import pickle
 import base64
 import os
+import time
+import uuid
+import zipfile
 import cv2
-from datetime import datetime
-from config import MODEL_CACHE_DIR, DB_CONFIG
+from config import (MODEL_CACHE_DIR, DB_CONFIG, EMBEDDING_FORMAT, EMBEDDING_DTYPE,
+                    GALLERY_SYNC_INTERVAL_MS, FACE_INDEX, FACE_INDEX_NPROBE, FACE_INDEX_MIN_SIZE,
+                    ARCFACE_MODEL_PATH, EMBEDDING_MODEL_VERSION,
+                    TFLITE_POOL_SIZE, TFLITE_NUM_THREADS, INFERENCE_BATCH_WAIT_MS, INFERENCE_MAX_BATCH,
+                    INFERENCE_BATCH_TIMEOUT_MS,
+                    BULK_ENROLL_WORKERS, BULK_ENROLL_CHUNK, BULK_ENROLL_MAX_FILES, BULK_ENROLL_MAX_BYTES,
+                    FACE_DETECTOR, FACE_DETECTOR_MODEL,
+                    FACE_DETECTOR_CONFIDENCE, FACE_MIN_SIZE, DETECT_MAX_SIDE,
+                    MAX_FRAME_BYTES, PREVIEW_MAX_SIDE, PREVIEW_JPEG_QUALITY,
+                    DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_PING_INTERVAL,
+                    DB_BACKEND, SQLITE_PATH, UPLOAD_FOLDER,
+                    ATTENDANCE_WRITE_MODE, ATTENDANCE_BATCH_SIZE, ATTENDANCE_FLUSH_MS,
+                    ATTENDANCE_MAX_QUEUE, ATTENDANCE_COOLDOWN_SECONDS, FACE_TRACKING,
+                    TRACK_IOU_THRESHOLD, TRACK_REVERIFY_FRAMES, TRACK_REVERIFY_IOU,
+                    TRACK_MAX_GAP_MS, TRACK_SESSION_TTL, STREAM_MAX_FRAME_AGE_MS,
+                    STREAM_IDLE_TIMEOUT, STREAM_MAX_CONNECTIONS, SERVER_TIMING)
+from embedding_codec import encode_embedding
+from gallery import EmbeddingGallery
+from gallery_sync import GallerySynchronizer, USER_INSERT_SQL
+from face_index import make_index
+from arcface_engine import ArcFaceTFLite
+from batch_scheduler import MicroBatchScheduler
+from face_detector import FaceDetectorEngine
+from db_pool import DatabasePool
+from attendance_writer import AttendanceWriter
+from attendance_cooldown import AttendanceCooldown
+from frame_pipeline import FrameTooLarge
+from recognition import RecognitionPipeline
+from face_tracker import FaceTracker
+from frame_stream import FrameStream, StreamLimiter
+from bulk_enroll import bulk_enroll, shared_pool, zip_photo_entries, iter_zip_entries
+import metrics
 import tensorflow as tf
 from dotenv import load_dotenv
 
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
+
 # Load environment variables dari .env file
 load_dotenv()
 
 app = Flask(__name__)
-app.config["UPLOAD_FOLDER"] = "static/uploads"
+app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
+os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+sock = Sock(app) if Sock is not None else None
 
 # Set home dir untuk model cache
 os.environ['DEEPFACE_HOME'] = MODEL_CACHE_DIR
 
 # Global model instances
-tflite_fp16_interpreter = None
+tflite_fp16_engine = None
+tflite_fp16_scheduler = None
 tflite_fp16_available = False
 
 def load_tflite_fp16_model():
-    """Load TFLite FP16 quantized model"""
-    global tflite_fp16_interpreter, tflite_fp16_available
+    """Load TFLite FP16 quantized model (batched engine, interpreter per batch bucket)"""
+    global tflite_fp16_engine, tflite_fp16_scheduler, tflite_fp16_available
     try:
-        tflite_fp16_path = "models/arcface_fp16.tflite"
+        tflite_fp16_path = ARCFACE_MODEL_PATH
         if os.path.exists(tflite_fp16_path):
-            tflite_fp16_interpreter = tf.lite.Interpreter(model_path=tflite_fp16_path)
-            tflite_fp16_interpreter.allocate_tensors()
+            tflite_fp16_engine = ArcFaceTFLite(
+                tflite_fp16_path, tf.lite.Interpreter,
+                num_threads=TFLITE_NUM_THREADS or None,
+                pool_size=TFLITE_POOL_SIZE
+            )
+            tflite_fp16_engine.warmup()
+            if INFERENCE_BATCH_WAIT_MS > 0:
+                # Satu dispatcher per interpreter slot
+                tflite_fp16_scheduler = MicroBatchScheduler(
+                    tflite_fp16_engine.embed_batch,
+                    max_batch=INFERENCE_MAX_BATCH,
+                    max_wait_ms=INFERENCE_BATCH_WAIT_MS,
+                    workers=TFLITE_POOL_SIZE,
+                    timeout_ms=INFERENCE_BATCH_TIMEOUT_MS,
+                    name="arcface-batch"
+                )
             tflite_fp16_available = True
-            print("[+] TFLite FP16 model loaded successfully")
+            print(f"[+] TFLite model {tflite_fp16_path} loaded successfully "
+                  f"(versi: {EMBEDDING_MODEL_VERSION}, pool: {TFLITE_POOL_SIZE})")
         else:
             print("[!] TFLite FP16 model not found")
             tflite_fp16_available = False
@@ -43,54 +99,117 @@ def load_tflite_fp16_model():
 # Load TFLite models on startup
 load_tflite_fp16_model()
 
+# Face detector: dibuat dan di-warmup sekali saat startup
+face_detector = FaceDetectorEngine(
+    backend=FACE_DETECTOR,
+    fallback="haar",
+    model_path=FACE_DETECTOR_MODEL,
+    interpreter_factory=tf.lite.Interpreter,
+    confidence=FACE_DETECTOR_CONFIDENCE,
+    min_face_size=FACE_MIN_SIZE,
+    pool_size=TFLITE_POOL_SIZE,
+    num_threads=TFLITE_NUM_THREADS or None
+)
+face_detector.warmup()
+
 
 # ========================
 #  DATABASE CONNECT
 # ========================
+if DB_BACKEND == "sqlite":
+    # Stand-in lokal untuk load test (lihat sqlite_db.py / loadtest.py)
+    import sqlite_db
+    db_pool = DatabasePool({"database": SQLITE_PATH}, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                           ping_interval=DB_POOL_PING_INTERVAL, connect=sqlite_db.connect)
+    print(f"[*] Database: SQLite stand-in ({SQLITE_PATH})")
+else:
+    db_pool = DatabasePool(DB_CONFIG, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                           ping_interval=DB_POOL_PING_INTERVAL)
+
+
 def get_db():
-    return mysql.connector.connect(**DB_CONFIG)
+    """
+    Pinjam koneksi dari pool (context manager)
+
+    Usage:
+        with get_db() as db:
+            ...
+            db.commit()
+    """
+    return db_pool.connection()
+
 
 # ========================
-#  MODEL INFERENCE HELPERS
+#  EMBEDDING GALLERY (CACHE)
 # ========================
+face_gallery = EmbeddingGallery(
+    index=make_index(FACE_INDEX, nprobe=FACE_INDEX_NPROBE, min_size=FACE_INDEX_MIN_SIZE),
+    model_version=EMBEDDING_MODEL_VERSION
+)
+gallery_sync = GallerySynchronizer(face_gallery, interval_ms=GALLERY_SYNC_INTERVAL_MS)
 
-def extract_embedding_deepface(img_path):
-    """Extract embedding menggunakan DeepFace original"""
-    try:
-        rep = DeepFace.represent(
-            img_path=img_path,
-            model_name="ArcFace",
-            detector_backend="retinaface",
-            enforce_detection=False
-        )
-        if len(rep) > 0:
-            return np.array(rep[0]["embedding"])
-        return None
-    except Exception as e:
-        print(f"[!] DeepFace extraction error: {e}")
-        return None
+
+# ========================
+#  ATTENDANCE WRITER
+# ========================
+# Seed dari tabel absensi dilakukan lazy saat pertama dipakai (setelah fork worker)
+attendance_cooldown = AttendanceCooldown(ATTENDANCE_COOLDOWN_SECONDS, connect=get_db)
+# Record write-behind yang gagal di-flush membatalkan entry cooldown-nya
+attendance_writer = AttendanceWriter(
+    get_db,
+    mode=ATTENDANCE_WRITE_MODE,
+    batch_size=ATTENDANCE_BATCH_SIZE,
+    flush_interval_ms=ATTENDANCE_FLUSH_MS,
+    max_queue=ATTENDANCE_MAX_QUEUE,
+    on_failure=attendance_cooldown.rollback_records
+)
+
+
+# ========================
+#  FACE TRACKER (PER SESI KAMERA)
+# ========================
+face_tracker = FaceTracker(
+    iou_threshold=TRACK_IOU_THRESHOLD,
+    reverify_frames=TRACK_REVERIFY_FRAMES,
+    reverify_iou=TRACK_REVERIFY_IOU,
+    max_gap_ms=TRACK_MAX_GAP_MS,
+    session_ttl=TRACK_SESSION_TTL
+) if FACE_TRACKING else None
+
+
+def get_gallery():
+    """Return gallery yang sudah ter-load dan tersinkron dengan worker lain"""
+    return gallery_sync.sync(get_db)
+
+# ========================
+#  MODEL INFERENCE HELPERS
+# ========================
 
 def extract_embedding_tflite_fp16(img_path):
     """Extract embedding menggunakan TFLite FP16 quantized model"""
     try:
         img = cv2.imread(img_path) if isinstance(img_path, str) else img_path
-        img = cv2.resize(img, (112, 112))
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        img = img.astype(np.float32) / 255.0
-        
-        input_details = tflite_fp16_interpreter.get_input_details()
-        output_details = tflite_fp16_interpreter.get_output_details()
-        
-        img_batch = np.expand_dims(img, axis=0)
-        tflite_fp16_interpreter.set_tensor(input_details[0]['index'], img_batch)
-        tflite_fp16_interpreter.invoke()
-        
-        embedding = tflite_fp16_interpreter.get_tensor(output_details[0]['index'])[0]
-        return embedding
+        return tflite_fp16_engine.embed(img)
     except Exception as e:
         print(f"[!] TFLite FP16 extraction error: {e}")
         return None
 
+def extract_embeddings_tflite_fp16_batch(face_images):
+    """
+    Extract embedding banyak wajah sekaligus (satu invoke per batch)
+
+    Returns:
+        list embedding, None untuk wajah yang gagal
+    """
+    try:
+        if tflite_fp16_scheduler is not None:
+            # Digabung dengan crop dari request lain yang sedang berjalan
+            return tflite_fp16_scheduler.embed_batch(face_images)
+        return tflite_fp16_engine.embed_batch(face_images)
+    except Exception as e:
+        print(f"[!] TFLite FP16 batch extraction error: {e}")
+        return [None] * len(face_images)
+
 # ========================
 #  HALAMAN ADMIN REGISTER
 # ========================
@@ -107,40 +226,107 @@ def admin_page():
     return render_template("admin_register.html")
 
 
+
+
+def registration_filename(name):
+    return name.replace(" ", "_") + ".jpg"
+
+
+def compute_registration_embedding(path, model_type):
+    """
+    Ekstraksi embedding foto registrasi berdasarkan model type
+
+    Returns:
+        (rep, emb_blob, used_model); raise ValueError jika wajah tidak terdeteksi
+    """
+    if model_type != "tflite_fp16" or not tflite_fp16_available:
+        raise ValueError(f"Model {model_type} tidak tersedia.")
+    rep = extract_embedding_tflite_fp16(path)
+    used_model = EMBEDDING_MODEL_VERSION
+
+    if rep is None or len(rep) == 0:
+        raise ValueError(f"Wajah tidak terdeteksi dengan model {model_type}.")
+
+    rep = np.array(rep)
+
+    # Simpan embedding sebagai BLOB binary (atau base64 pickle selama rollout)
+    if EMBEDDING_FORMAT == "legacy":
+        emb_blob = base64.b64encode(pickle.dumps(rep)).decode('utf-8')
+    else:
+        emb_blob = encode_embedding(rep, model_id=used_model, dtype=EMBEDDING_DTYPE)
+    return rep, emb_blob, used_model
+
+
 @app.route("/admin/register", methods=["POST"])
 def admin_register():
 
     name = request.form["name"]
     photo = request.files["photo"]
-    model_type = request.form.get("model_type", "tflite_fp16")  # deepface or tflite_fp16
+    model_type = request.form.get("model_type", "tflite_fp16")
 
-    filename = name.replace(" ", "_") + ".jpg"
+    filename = registration_filename(name)
     path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
     photo.save(path)
 
     # Ekstraksi embedding berdasarkan model type
     try:
-        if model_type == "tflite_fp16" and tflite_fp16_available:
-            rep = extract_embedding_tflite_fp16(path)
-        else:
-            rep = extract_embedding_deepface(path)
-        
-        if rep is None or len(rep) == 0:
-            return f"Error deteksi wajah! Wajah tidak terdeteksi dengan model {model_type}."
-        
-        rep = np.array(rep)
+        rep, emb_blob, used_model = compute_registration_embedding(path, model_type)
+    except ValueError as e:
+        return f"Error deteksi wajah! {e}"
     except Exception as e:
         return f"Error deteksi wajah! <br>Detail: {e}"
 
-    # Simpan embedding sebagai BLOB base64
-    emb_blob = base64.b64encode(pickle.dumps(rep)).decode('utf-8')
+    with get_db() as db:
+        cursor = db.cursor()
+        cursor.execute(USER_INSERT_SQL, (name, filename, emb_blob))
+        db.commit()
 
-    db = get_db()
-    cursor = db.cursor()
-    sql = "INSERT INTO users (name, photo, embedding) VALUES (%s, %s, %s)"
-    cursor.execute(sql, (name, filename, emb_blob))
-    db.commit()
+    # Update gallery worker ini langsung; worker lain menyusul via gallery_changes
+    if face_gallery.loaded:
+        face_gallery.upsert(cursor.lastrowid, name, rep, model_version=used_model)
 
+    return register_success_page(name, filename)
+
+
+@app.route("/admin/register-bulk", methods=["POST"])
+def admin_register_bulk():
+    """
+    Upload ZIP berisi <nama>.jpg; response berupa NDJSON stream event
+    progress lalu satu event summary (termasuk daftar foto yang gagal)
+    """
+    archive = request.files.get("archive")
+    if archive is None:
+        return jsonify({"status": False, "message": "File ZIP tidak ditemukan!"}), 400
+    try:
+        # Jumlah foto dan total ukuran dicek dari header ZIP sebelum membaca isinya
+        archive_zip = zipfile.ZipFile(archive.stream)
+        entries = zip_photo_entries(archive_zip, MAX_FRAME_BYTES, BULK_ENROLL_MAX_FILES, BULK_ENROLL_MAX_BYTES)
+    except ValueError as e:
+        return jsonify({"status": False, "message": f"ZIP terlalu besar: {e}"}), 413
+    except Exception as e:
+        return jsonify({"status": False, "message": f"ZIP tidak valid: {e}"}), 400
+
+    def generate():
+        # Foto dibaca dari ZIP per chunk; process pool dipakai ulang antar request
+        photos = iter_zip_entries(archive_zip, entries, MAX_FRAME_BYTES)
+        try:
+            for event in bulk_enroll(photos, get_db, upload_dir=app.config["UPLOAD_FOLDER"],
+                                     model_path=ARCFACE_MODEL_PATH, model_version=EMBEDDING_MODEL_VERSION,
+                                     chunk_size=BULK_ENROLL_CHUNK, dtype=EMBEDDING_DTYPE,
+                                     pool=shared_pool(ARCFACE_MODEL_PATH, BULK_ENROLL_WORKERS),
+                                     total=len(entries)):
+                if event["type"] == "summary" and event["enrolled"]:
+                    # User baru langsung terlihat di gallery worker ini
+                    gallery_sync.refresh(get_db)
+                yield json.dumps(event) + "\n"
+        finally:
+            archive_zip.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def register_success_page(name, filename):
+    """Halaman HTML setelah registrasi berhasil"""
     return f"""
     <!DOCTYPE html>
     <html lang="id">
@@ -312,121 +498,83 @@ def presensi_user():
 
 
 # ========================
-#  FUNGSI PEMBANDING ARC FACE
+#  FACE EMBEDDING HELPERS
 # ========================
-def cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-
-
-# ========================
-#  FACE DETECTION HELPERS
-# ========================
-def detect_face_with_bbox(img):
-    """
-    Detect face dan return koordinat bounding box
-    Menggunakan OpenCV Cascade atau DeepFace detector
-    
-    Returns:
-        List of (x, y, w, h) tuples
-    """
-    try:
-        # Pakai DeepFace detector (RetinaFace)
-        faces = DeepFace.extract_faces(
-            img_path=img,
-            detector_backend="opencv",  # Bisa ganti ke "retinaface" untuk lebih akurat
-            enforce_detection=False,
-            align=False
-        )
-        
-        face_coords = []
-        for face_dict in faces:
-            # face_dict contains {'facial_area': {...}, 'confidence': ...}
-            facial_area = face_dict.get('facial_area', {})
-            x = facial_area.get('x', 0)
-            y = facial_area.get('y', 0)
-            w = facial_area.get('w', 0)
-            h = facial_area.get('h', 0)
-            
-            if w > 0 and h > 0:
-                face_coords.append((x, y, w, h))
-        
-        return face_coords
-    
-    except Exception as e:
-        print(f"[!] Face detection error: {e}")
-        # Fallback ke OpenCV Cascade
-        try:
-            face_cascade = cv2.CascadeClassifier(
-                cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            )
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-            
-            return [(x, y, w, h) for (x, y, w, h) in faces]
-        except:
-            return []
-
-
-def draw_bounding_boxes(img, face_coords, face_info=None, color=(0, 255, 0), thickness=2):
+def extract_embedding_from_face_area(img, x, y, w, h, model_type="tflite_fp16"):
     """
-    Draw bounding boxes pada gambar dengan label berdasarkan face_info
+    Extract embedding dari area wajah spesifik
     
     Args:
-        img: OpenCV image
-        face_coords: List of (x, y, w, h) tuples
-        face_info: List of dicts dengan info masing-masing face (opsional)
-        color: RGB color tuple
-        thickness: Line thickness
+        img: OpenCV image (numpy array)
+        x, y, w, h: Koordinat dan ukuran face area
+        model_type: Tipe model yang digunakan
     
     Returns:
-        Image dengan bounding boxes
+        embedding array atau None
     """
-    img_copy = img.copy()
-    
-    for idx, (x, y, w, h) in enumerate(face_coords):
-        # Draw rectangle
-        cv2.rectangle(img_copy, (x, y), (x + w, y + h), color, thickness)
-        
-        # Draw filled rectangle untuk background text
-        label_height = 25
-        cv2.rectangle(img_copy, (x, y - label_height), (x + 150, y), color, -1)
-        
-        # Buat label berdasarkan face_info atau hanya nomor urut
-        if face_info and idx < len(face_info):
-            label = f"Face {idx + 1}: {face_info[idx].get('name', '?')}"
-        else:
-            label = f"Face {idx + 1}"
-        
-        # Put text
-        cv2.putText(img_copy, label, (x + 5, y - 8),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-    
-    return img_copy
+    return extract_embeddings_from_face_areas(img, [(x, y, w, h)], model_type)[0]
 
 
-def extract_embedding_from_face_area(img, x, y, w, h, model_type="deepface"):
+def extract_embeddings_from_face_areas(img, face_coords, model_type="tflite_fp16"):
     """
-    Extract embedding dari area wajah spesifik
-    
+    Extract embedding untuk semua area wajah dalam satu gambar
+    TFLite memproses semua wajah dalam satu batched invoke.
+
     Args:
         img: OpenCV image (numpy array)
-        x, y, w, h: Koordinat dan ukuran face area
-        model_type: Tipe model yang digunakan
-    
+        face_coords: List of (x, y, w, h) tuples
+        model_type: Tipe model yang digunakan (hanya tflite_fp16)
+
     Returns:
-        embedding array atau None
+        list embedding array (None untuk wajah yang gagal atau model tidak tersedia)
     """
+    if model_type != "tflite_fp16" or not tflite_fp16_available:
+        return [None] * len(face_coords)
     try:
-        # Crop face area
-        face_area = img[y:y+h, x:x+w]
-        
-        if model_type == "tflite_fp16" and tflite_fp16_available:
-            return extract_embedding_tflite_fp16(face_area)
-        else:
-            return extract_embedding_deepface(face_area)
+        # Crop face area (clip ke batas gambar)
+        face_areas = [img[max(y, 0):y+h, max(x, 0):x+w] for (x, y, w, h) in face_coords]
+        return extract_embeddings_tflite_fp16_batch(face_areas)
     except Exception as e:
         print(f"[!] Error extracting embedding from face area: {e}")
-        return None
+        return [None] * len(face_coords)
+
+
+# ========================
+#  PIPELINE RECOGNITION
+# ========================
+def query_model_version(model_type):
+    """Tag versi model yang menghasilkan embedding untuk model_type ini"""
+    if model_type == "tflite_fp16" and tflite_fp16_available:
+        return EMBEDDING_MODEL_VERSION
+    return model_type
+
+
+recognition_pipeline = RecognitionPipeline(
+    detector=face_detector,
+    extract_embeddings=extract_embeddings_from_face_areas,
+    gallery=face_gallery,
+    cooldown=attendance_cooldown,
+    writer=attendance_writer,
+    sync_gallery=get_gallery,
+    model_version=query_model_version,
+    tracker=face_tracker,
+    detect_max_side=DETECT_MAX_SIDE,
+    preview_max_side=PREVIEW_MAX_SIDE,
+    preview_quality=PREVIEW_JPEG_QUALITY
+)
+
+
+def recognize_frame(img_bytes, model_type="tflite_fp16", response_mode="image", session_id=None):
+    """Decode -> detect -> embed -> match -> catat absensi (lihat RecognitionPipeline.recognize)"""
+    return recognition_pipeline.recognize(img_bytes, model_type, response_mode, session_id)
+
+
+def get_session_id():
+    """ID sesi kamera dari header X-Session-Id atau field session_id (opsional)"""
+    session_id = (request.headers.get("X-Session-Id")
+                  or request.args.get("session_id")
+                  or request.form.get("session_id"))
+    return session_id[:64] if session_id else None
 
 
 # ========================
@@ -437,113 +585,209 @@ def presensi_kamera():
 
     try:
         image_data = request.form["image_data"]
-        model_type = request.form.get("model_type", "tflite_fp16")  # deepface or tflite_fp16
+        model_type = request.form.get("model_type", "tflite_fp16")
+        
+        response_mode = request.form.get("response_mode", "image")  # image, preview, coords
+        session_id = get_session_id()
         
-        image_data = image_data.split(",")[1]
-        img_bytes = base64.b64decode(image_data)
+        with metrics.span("b64decode"):
+            image_data = image_data.split(",")[1]
+            img_bytes = base64.b64decode(image_data)
 
-        nparr = np.frombuffer(img_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        return jsonify(recognize_frame(img_bytes, model_type, response_mode, session_id))
 
-        # Detect faces
-        face_coords = detect_face_with_bbox(img)
-        
-        if not face_coords:
-            return jsonify({
-                "status": False, 
-                "message": "Wajah tidak terdeteksi!",
-                "image_with_bbox": None,
-                "results": []
-            })
-
-        # Ambil semua users dari DB sekali saja
-        db = get_db()
-        cursor = db.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM users")
-        db_users = cursor.fetchall()
-
-        # Process setiap wajah yang terdeteksi
-        face_results = []
-        
-        for idx, (x, y, w, h) in enumerate(face_coords):
-            # Extract embedding untuk face area ini
-            user_embed = extract_embedding_from_face_area(img, x, y, w, h, model_type)
-            
-            if user_embed is None:
-                face_results.append({
-                    "face_num": idx + 1,
-                    "status": False,
-                    "message": "Wajah tidak terdeteksi!",
-                    "name": "Unknown",
-                    "score": 0.0
-                })
-                continue
-            
-            user_embed = np.array(user_embed)
-            best_user = None
-            best_score = -1
-            
-            # Cari user yang paling cocok
-            for row in db_users:
-                emb_db = pickle.loads(base64.b64decode(row["embedding"]))
-                emb_db = np.array(emb_db)
-                sim = cosine_similarity(user_embed, emb_db)
-                
-                if sim > best_score:
-                    best_score = sim
-                    best_user = row
-            
-            # Cek threshold recognition
-            if best_score < 0.40:
-                face_results.append({
-                    "face_num": idx + 1,
-                    "status": False,
-                    "message": "Wajah tidak dikenali!",
-                    "name": "Unknown",
-                    "score": float(best_score)
-                })
-            else:
-                # Catat absensi jika score bagus
-                cursor.execute("INSERT INTO absensi (user_id, waktu) VALUES (%s, NOW())",
-                               (best_user["id"],))
-                db.commit()
-                
-                face_results.append({
-                    "face_num": idx + 1,
-                    "status": True,
-                    "message": f"Presensi Berhasil",
-                    "name": best_user["name"],
-                    "score": float(best_score)
-                })
-        
-        # Draw bounding boxes dengan info dari hasil recognition
-        img_with_bbox = draw_bounding_boxes(img, face_coords, face_info=face_results, color=(0, 255, 0), thickness=3)
-        
-        # Convert back to base64
-        _, buffer = cv2.imencode('.jpg', img_with_bbox)
-        img_bbox_b64 = base64.b64encode(buffer).decode('utf-8')
+    except Exception as e:
+        metrics.errors.inc(endpoint="presensi_kamera")
+        return jsonify({"status": False, "message": f"Error: {str(e)}", "results": []})
 
-        # Cek apakah ada yang berhasil presensi
-        success_count = sum(1 for r in face_results if r["status"])
-        
-        if success_count > 0:
-            message = f"Presensi Berhasil: {success_count} dari {len(face_results)} wajah"
-        else:
-            message = f"Tidak ada wajah yang dikenali ({len(face_results)} wajah terdeteksi)"
 
-        return jsonify({
-            "status": success_count > 0,
-            "message": message,
-            "image_with_bbox": f"data:image/jpeg;base64,{img_bbox_b64}",
-            "model": model_type,
-            "results": face_results,
-            "total_faces": len(face_results)
-        })
+# ========================
+#  PRESENSI VIA KAMERA (BINARY)
+# ========================
+def read_frame_body(max_bytes):
+    """
+    Baca JPEG mentah dari request: body application/octet-stream atau
+    multipart field "frame". Body dibaca langsung ke satu bytearray.
+
+    Returns:
+        bytearray / bytes, atau None jika kosong; FrameTooLarge jika
+        melebihi max_bytes
+    """
+    upload = request.files.get("frame")
+    if upload is not None:
+        data = upload.stream.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            raise FrameTooLarge("Frame terlalu besar")
+        return data or None
+
+    length = request.content_length
+    if length is None:
+        data = request.stream.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            raise FrameTooLarge("Frame terlalu besar")
+        return data or None
+    if length > max_bytes:
+        raise FrameTooLarge("Frame terlalu besar")
+
+    buf = bytearray(length)
+    view = memoryview(buf)
+    read = 0
+    while read < length:
+        n = request.stream.readinto(view[read:])
+        if not n:
+            break
+        read += n
+    return buf[:read] if read < length else buf
+
+
+@app.route("/presensi-kamera/frame", methods=["POST"])
+def presensi_kamera_frame():
+
+    try:
+        model_type = request.args.get("model_type") or request.form.get("model_type", "tflite_fp16")
+        # Default hanya koordinat: anotasi digambar di client
+        response_mode = request.args.get("response_mode") or request.form.get("response_mode", "coords")
+        session_id = get_session_id()
+        try:
+            with metrics.span("read_body"):
+                img_bytes = read_frame_body(MAX_FRAME_BYTES)
+        except FrameTooLarge as e:
+            return jsonify({"status": False, "message": f"Error: {str(e)}", "results": []}), 413
+        if not img_bytes:
+            return jsonify({"status": False, "message": "Frame kosong!", "results": []}), 400
+
+        return jsonify(recognize_frame(img_bytes, model_type, response_mode, session_id))
 
     except Exception as e:
+        metrics.errors.inc(endpoint="presensi_kamera_frame")
         return jsonify({"status": False, "message": f"Error: {str(e)}", "results": []})
 
 
+# ========================
+#  PRESENSI VIA KAMERA (STREAMING WEBSOCKET)
+# ========================
+STREAM_OPTIONS = ("model_type", "response_mode")
+# Stream memegang thread gunicorn selama koneksi hidup: dibatasi per worker
+stream_limiter = StreamLimiter(STREAM_MAX_CONNECTIONS)
+
+
+def stream_presensi(ws):
+    """
+    Satu koneksi WebSocket per kiosk: pesan biner = frame JPEG, pesan teks =
+    opsi JSON. Setiap frame yang diproses menghasilkan event "result"; frame
+    yang masuk saat server masih sibuk di-drop (hanya frame terbaru diproses).
+    Jika worker sudah melayani STREAM_MAX_CONNECTIONS stream, koneksi ditolak
+    dengan close code 1013 (try again later).
+    """
+    if not stream_limiter.acquire():
+        message = f"Stream penuh ({STREAM_MAX_CONNECTIONS} per worker), coba lagi nanti"
+        ws.send(json.dumps({"type": "error", "message": message}))
+        ws.close(reason=1013, message=message)
+        return
+    try:
+        run_stream(ws)
+    finally:
+        stream_limiter.release()
+
+
+def run_stream(ws):
+    # Satu sesi tracking per koneksi
+    session_id = request.args.get("session_id") or uuid.uuid4().hex
+    options = {
+        "model_type": request.args.get("model_type", "tflite_fp16"),
+        "response_mode": request.args.get("response_mode", "coords"),
+    }
+
+    def process(frame_bytes, opts):
+        # Timing per frame, bukan per koneksi
+        metrics.start_request()
+        if len(frame_bytes) > MAX_FRAME_BYTES:
+            return {"status": False, "message": "Error: Frame terlalu besar", "results": []}
+        opts = {k: opts[k] for k in STREAM_OPTIONS if k in opts}
+        return recognize_frame(frame_bytes, opts.get("model_type", "tflite_fp16"),
+                               opts.get("response_mode", "coords"), session_id)
+
+    stream = FrameStream(
+        ws.receive, ws.send, process, options,
+        max_age_ms=STREAM_MAX_FRAME_AGE_MS,
+        idle_timeout=STREAM_IDLE_TIMEOUT
+    )
+    stats = stream.run()
+    print(f"[+] Stream {session_id[:8]} selesai: {stats}")
+
+
+if sock is not None:
+    sock.route("/presensi-kamera/stream")(stream_presensi)
+else:
+    print("[!] flask-sock tidak terpasang, endpoint /presensi-kamera/stream nonaktif")
+
+
+# ========================
+#  METRICS
+# ========================
+TIMED_ENDPOINTS = {"presensi_kamera", "presensi_kamera_frame", "admin_register"}
+
+
+@app.before_request
+def start_request_timing():
+    g.request_start = time.perf_counter()
+    metrics.start_request()
+
+
+@app.after_request
+def finish_request_timing(response):
+    if request.endpoint in TIMED_ENDPOINTS:
+        elapsed = time.perf_counter() - g.get("request_start", time.perf_counter())
+        metrics.request_seconds.observe(elapsed, endpoint=request.endpoint)
+        if SERVER_TIMING:
+            timings = metrics.request_timings() + [("total", elapsed)]
+            response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+    return response
+
+
+def collect_pipeline_state():
+    """Gauge kondisi pipeline dan jalur fallback saat ini"""
+    yield ("presensi_gallery_users", "gauge", "Jumlah user di gallery worker ini",
+           [({}, len(face_gallery))])
+    yield ("presensi_detector_fallback", "gauge", "1 jika face detector memakai backend fallback",
+           [({"backend": face_detector.name}, int(face_detector.name != FACE_DETECTOR))])
+    if tflite_fp16_engine is not None:
+        yield ("presensi_arcface_batch_fallback", "gauge",
+               "1 jika model tidak mendukung batching (invoke per wajah)",
+               [({}, int(not tflite_fp16_engine.batching_supported))])
+    yield ("presensi_cooldown_suppressed", "counter", "Check-in yang tidak dicatat karena cooldown",
+           [({}, attendance_cooldown.suppressed)])
+
+
+metrics.registry.register_collector(collect_pipeline_state)
+# Key stats() yang berupa total kumulatif diekspor sebagai counter (<key>_total)
+POOL_COUNTERS = ("created", "reconnects", "checkouts", "waits", "total_wait_ms")
+metrics.registry.register_collector(
+    metrics.stats_collector("presensi_db_pool", db_pool.stats, counters=POOL_COUNTERS))
+metrics.registry.register_collector(
+    metrics.stats_collector("presensi_attendance", attendance_writer.stats,
+                            counters=("written", "flushes", "sync_fallbacks", "failures", "dropped")))
+metrics.registry.register_collector(
+    metrics.stats_collector("presensi_streams", stream_limiter.stats, counters=("rejected",)))
+if tflite_fp16_engine is not None:
+    metrics.registry.register_collector(
+        metrics.stats_collector("presensi_interpreter_pool", tflite_fp16_engine.pool.stats,
+                                counters=POOL_COUNTERS))
+if tflite_fp16_scheduler is not None:
+    metrics.registry.register_collector(
+        metrics.stats_collector("presensi_batch_scheduler", tflite_fp16_scheduler.stats,
+                                counters=("batches", "items", "fallbacks")))
+if face_tracker is not None:
+    metrics.registry.register_collector(
+        metrics.stats_collector("presensi_tracker", face_tracker.stats,
+                                counters=("frames", "faces", "reused")))
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))
     debug = os.getenv("FLASK_DEBUG", "0") == "1"
@@ -0,0 +1,208 @@
+"""
+Batched ArcFace TFLite inference
+Semua wajah dalam satu frame di-preprocess ke satu buffer contiguous dan
+di-embed dengan satu invoke(). Interpreter di-cache per bucket batch size
+(1, 2, 4, 8, 16) sehingga jumlah wajah yang berubah-ubah tidak memicu
+resize_tensor_input + allocate_tensors berulang.
+
+TFLite interpreter tidak thread-safe, sehingga interpreter dikelompokkan per
+slot dan setiap inference meminjam satu slot dari InterpreterPool.
+Preprocessing ditulis langsung ke buffer input interpreter (InferenceSession).
+
+Model INT8 full-integer (generate_int8_model.py) punya input/output int8:
+piksel dipetakan ke nilai terkuantisasi lewat lookup table 256 entri yang
+dihitung dari quantization params input, dan output di-dequantize saat copy.
+"""
+
+import cv2
+import numpy as np
+
+from inference_session import InferenceSession
+from interpreter_pool import InterpreterPool, PoolTimeout
+
+INPUT_SIZE = (112, 112)
+BATCH_BUCKETS = (1, 2, 4, 8, 16)
+
+
+def preprocess_faces(crops, out, scratch=None, lut=None):
+    """
+    Resize -> BGR2RGB -> /255 untuk setiap crop, langsung ke buffer batch
+
+    Args:
+        crops: list of BGR uint8 image (panjang <= out.shape[0])
+        out: float32 array (B, 112, 112, 3) tujuan, boleh view ke input interpreter
+        scratch: uint8 array (112, 112, 3) untuk resize/cvtColor (opsional)
+        lut: Lookup table piksel -> nilai input terkuantisasi (input int8/uint8),
+            lihat input_lut(); out harus ber-dtype sama
+
+    Baris out di belakang len(crops) tidak disentuh; output-nya diabaikan.
+    """
+    if scratch is None:
+        scratch = np.empty(INPUT_SIZE[::-1] + (3,), dtype=np.uint8)
+    for i, crop in enumerate(crops):
+        cv2.resize(crop, INPUT_SIZE, dst=scratch)
+        cv2.cvtColor(scratch, cv2.COLOR_BGR2RGB, dst=scratch)
+        if lut is None:
+            np.divide(scratch, np.float32(255.0), out=out[i])
+        else:
+            np.take(lut, scratch, out=out[i])
+    return out
+
+
+def input_lut(session):
+    """
+    Lookup table 256 entri: piksel p -> quantize(p / 255) untuk input
+    terkuantisasi, None jika input float
+
+    q = round(x / scale + zero_point), di-clip ke rentang dtype input
+    """
+    if session.input_dtype.kind == "f":
+        return None
+    scale, zero_point = session.input_quantization
+    if not scale:
+        raise ValueError("Input terkuantisasi tanpa quantization params")
+    info = np.iinfo(session.input_dtype)
+    values = np.rint(np.arange(256, dtype=np.float64) / 255.0 / scale + zero_point)
+    return np.clip(values, info.min, info.max).astype(session.input_dtype)
+
+
+def dequantize(values, quantization):
+    """Output int8/uint8 -> float32: (q - zero_point) * scale; float dikembalikan sebagai copy"""
+    if values.dtype.kind == "f":
+        return np.array(values, dtype=np.float32)
+    scale, zero_point = quantization
+    return (values.astype(np.float32) - np.float32(zero_point)) * np.float32(scale or 1.0)
+
+
+def is_valid_crop(crop):
+    return crop is not None and crop.ndim == 3 and crop.shape[0] > 0 and crop.shape[1] > 0
+
+
+class _InterpreterSlot:
+    """Satu set InferenceSession (satu per bucket) yang dipakai oleh satu thread"""
+
+    def __init__(self, new_interpreter):
+        self._new_interpreter = new_interpreter
+        self._sessions = {}
+        self.scratch = np.empty(INPUT_SIZE[::-1] + (3,), dtype=np.uint8)
+        self.lut = None
+
+    def get(self, bucket):
+        """Session dengan input shape (bucket, 112, 112, 3), dibuat sekali per bucket"""
+        session = self._sessions.get(bucket)
+        if session is None:
+            session = InferenceSession(self._new_interpreter(),
+                                       input_shape=(bucket, INPUT_SIZE[1], INPUT_SIZE[0], 3))
+            # Quantization params sama untuk semua bucket: LUT dihitung sekali
+            if not self._sessions:
+                self.lut = input_lut(session)
+            self._sessions[bucket] = session
+        return session
+
+
+class ArcFaceTFLite:
+    """
+    Wrapper ArcFace TFLite dengan batched inference
+
+    Args:
+        model_path: Path model .tflite
+        interpreter_factory: callable(model_path=..., num_threads=...) -> Interpreter,
+            biasanya tf.lite.Interpreter
+        buckets: Ukuran batch yang di-cache
+        num_threads: Thread TFLite per interpreter (None = default TFLite)
+        pool_size: Jumlah inference yang boleh berjalan bersamaan
+        pool_timeout: Detik maksimum menunggu interpreter bebas (None = tunggu terus)
+    """
+
+    def __init__(self, model_path, interpreter_factory, buckets=BATCH_BUCKETS, num_threads=None,
+                 pool_size=1, pool_timeout=None):
+        self.model_path = model_path
+        self.interpreter_factory = interpreter_factory
+        self.buckets = tuple(sorted(buckets))
+        self.num_threads = num_threads
+        self.pool_timeout = pool_timeout
+        self.pool = InterpreterPool(lambda: _InterpreterSlot(self._new_interpreter),
+                                    size=pool_size, name="arcface")
+        self.batching_supported = True
+
+    def _new_interpreter(self):
+        if self.num_threads:
+            return self.interpreter_factory(model_path=self.model_path, num_threads=self.num_threads)
+        return self.interpreter_factory(model_path=self.model_path)
+
+    def _bucket(self, n):
+        for size in self.buckets:
+            if size >= n:
+                return size
+        return self.buckets[-1]
+
+    def warmup(self):
+        """
+        Alokasikan interpreter bucket 1 untuk setiap slot saat startup, lalu
+        cek sekali apakah model mendukung batch > 1 (bukan di jalur request)
+        """
+        for slot in self.pool.items:
+            slot.get(1)
+        batch_buckets = [size for size in self.buckets if size > 1]
+        if batch_buckets and self.batching_supported:
+            try:
+                self.pool.items[0].get(batch_buckets[0]).run()
+            except (ValueError, RuntimeError) as e:
+                # Model dengan batch dimension statis: selalu invoke per wajah
+                print(f"[!] Batched inference tidak didukung model ini, fallback batch 1: {e}")
+                self.batching_supported = False
+
+    def _run(self, crops):
+        """Satu invoke untuk len(crops) <= bucket terbesar"""
+        bucket = self._bucket(len(crops))
+        with self.pool.checkout(self.pool_timeout) as slot:
+            session = slot.get(bucket)
+            batch = session.input_view()
+            preprocess_faces(crops, batch, slot.scratch, slot.lut)
+            del batch
+            output = session.run()
+            # Copy kecil (N x 512) karena slot dikembalikan ke pool
+            embeddings = dequantize(output[:len(crops)], session.output_quantization)
+            del output
+        return embeddings
+
+    def _run_single(self, crops):
+        return np.vstack([self._run([crop]) for crop in crops])
+
+    def embed_batch(self, crops):
+        """
+        Extract embedding untuk banyak crop wajah sekaligus
+
+        Args:
+            crops: list of BGR uint8 image
+
+        Returns:
+            list embedding (np.ndarray) sepanjang crops; None untuk crop tidak valid
+        """
+        results = [None] * len(crops)
+        valid = [i for i, crop in enumerate(crops) if is_valid_crop(crop)]
+        max_batch = self.buckets[-1]
+
+        for start in range(0, len(valid), max_batch):
+            chunk = valid[start:start + max_batch]
+            chunk_crops = [crops[i] for i in chunk]
+            if not self.batching_supported or len(chunk) == 1:
+                embeddings = self._run_single(chunk_crops)
+            else:
+                try:
+                    embeddings = self._run(chunk_crops)
+                except PoolTimeout:
+                    # Pool penuh bukan masalah model: jangan matikan batching
+                    raise
+                except (ValueError, RuntimeError) as e:
+                    # Model dengan batch dimension statis: fallback ke batch 1
+                    print(f"[!] Batched inference tidak didukung model ini, fallback batch 1: {e}")
+                    self.batching_supported = False
+                    embeddings = self._run_single(chunk_crops)
+            for i, emb in zip(chunk, embeddings):
+                results[i] = emb
+        return results
+
+    def embed(self, crop):
+        """Extract embedding untuk satu crop wajah"""
+        return self.embed_batch([crop])[0]
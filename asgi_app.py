@@ -0,0 +1,254 @@
+"""
+ASGI/asyncio entry point untuk service presensi
+
+Route sama dengan app.py (/presensi-kamera, /presensi-kamera/frame,
+/admin/register dan halaman HTML), tetapi upload dibaca secara async sehingga
+satu proses bisa melayani banyak upload lambat dari HP tanpa menahan thread.
+Tahap CPU-bound (decode, deteksi, embedding, matching) dijalankan di thread
+pool terbatas dan memakai pipeline yang sama dengan app.py.
+
+Database: hanya INSERT registrasi yang async (aiomysql, jika DB_BACKEND=mysql).
+Akses database di jalur recognition (sync gallery, seed cooldown, writer
+absensi) tetap synchronous lewat DatabasePool app.py dan berjalan di thread
+pool CPU. Modul ini mengimpor app.py, jadi Flask app, TensorFlow dan model
+ikut dimuat.
+
+Jalankan:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000 --workers 1
+"""
+
+import asyncio
+import base64
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+import app as flask_app
+import metrics
+from config import DB_BACKEND, DB_CONFIG, DB_POOL_SIZE, MAX_FRAME_BYTES, ASGI_CPU_WORKERS, SERVER_TIMING
+from frame_pipeline import FrameTooLarge
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Thread pool untuk tahap CPU-bound; ukurannya membatasi inference bersamaan
+cpu_executor = ThreadPoolExecutor(max_workers=ASGI_CPU_WORKERS, thread_name_prefix="presensi-cpu")
+db_pool = None
+
+
+async def run_cpu(func, *args):
+    # Context disalin agar metrics.span di thread pool masuk ke timing request ini
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(cpu_executor, context.run, func, *args)
+
+
+@asynccontextmanager
+async def lifespan(_):
+    global db_pool
+    if DB_BACKEND == "mysql":
+        import aiomysql
+        db_pool = await aiomysql.create_pool(
+            host=DB_CONFIG["host"],
+            port=DB_CONFIG["port"],
+            user=DB_CONFIG["user"],
+            password=DB_CONFIG["password"],
+            db=DB_CONFIG["database"],
+            autocommit=False,
+            maxsize=DB_POOL_SIZE,
+        )
+    # Gallery di-load sekali sebelum request pertama
+    await run_cpu(flask_app.get_gallery)
+    try:
+        yield
+    finally:
+        if db_pool is not None:
+            db_pool.close()
+            await db_pool.wait_closed()
+        flask_app.attendance_writer.close()
+        cpu_executor.shutdown(wait=False)
+
+
+# ========================
+#  METRICS PER REQUEST
+# ========================
+# Path -> nama endpoint seperti TIMED_ENDPOINTS di app.py
+TIMED_PATHS = {
+    "/presensi-kamera": "presensi_kamera",
+    "/presensi-kamera/frame": "presensi_kamera_frame",
+    "/admin/register": "admin_register",
+}
+
+
+class RequestTimingMiddleware(BaseHTTPMiddleware):
+    """Padanan before_request/after_request app.py: durasi request dan Server-Timing"""
+
+    async def dispatch(self, request, call_next):
+        start = time.perf_counter()
+        metrics.start_request()
+        response = await call_next(request)
+        endpoint = TIMED_PATHS.get(request.url.path)
+        if endpoint is not None and request.method == "POST":
+            elapsed = time.perf_counter() - start
+            metrics.request_seconds.observe(elapsed, endpoint=endpoint)
+            if SERVER_TIMING:
+                timings = metrics.request_timings() + [("total", elapsed)]
+                response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+        return response
+
+
+def page(template):
+    async def handler(_):
+        return FileResponse(os.path.join(TEMPLATE_DIR, template), media_type="text/html")
+    return handler
+
+
+def error_json(message, status_code=200):
+    return JSONResponse({"status": False, "message": f"Error: {message}", "results": []},
+                        status_code=status_code)
+
+
+async def read_body_limited(request, max_bytes):
+    """Baca body secara async; FrameTooLarge jika melebihi max_bytes"""
+    length = request.headers.get("content-length")
+    if length is not None and int(length) > max_bytes:
+        raise FrameTooLarge("Frame terlalu besar")
+    buf = bytearray()
+    async for chunk in request.stream():
+        buf += chunk
+        if len(buf) > max_bytes:
+            raise FrameTooLarge("Frame terlalu besar")
+    return buf
+
+
+def session_id_from(request, form=None):
+    session_id = (request.headers.get("x-session-id")
+                  or request.query_params.get("session_id")
+                  or (form.get("session_id") if form is not None else None))
+    return session_id[:64] if session_id else None
+
+
+# ========================
+#  PRESENSI
+# ========================
+async def presensi_kamera(request):
+    try:
+        form = await request.form(max_part_size=MAX_FRAME_BYTES * 2)
+        image_data = form["image_data"]
+        model_type = form.get("model_type", "tflite_fp16")
+        response_mode = form.get("response_mode", "image")
+        session_id = session_id_from(request, form)
+
+        img_bytes = base64.b64decode(image_data.split(",")[1])
+        result = await run_cpu(flask_app.recognize_frame, img_bytes, model_type,
+                               response_mode, session_id)
+        return JSONResponse(result)
+    except Exception as e:
+        metrics.errors.inc(endpoint="presensi_kamera")
+        return error_json(str(e))
+
+
+async def presensi_kamera_frame(request):
+    try:
+        model_type = request.query_params.get("model_type", "tflite_fp16")
+        response_mode = request.query_params.get("response_mode", "coords")
+        session_id = session_id_from(request)
+
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form(max_part_size=MAX_FRAME_BYTES)
+            upload = form.get("frame")
+            img_bytes = await upload.read() if upload is not None else b""
+            model_type = request.query_params.get("model_type") or form.get("model_type", model_type)
+            response_mode = request.query_params.get("response_mode") or form.get("response_mode", response_mode)
+        else:
+            try:
+                img_bytes = await read_body_limited(request, MAX_FRAME_BYTES)
+            except FrameTooLarge as e:
+                return error_json(str(e), 413)
+        if not img_bytes:
+            return JSONResponse({"status": False, "message": "Frame kosong!", "results": []},
+                                status_code=400)
+
+        result = await run_cpu(flask_app.recognize_frame, img_bytes, model_type,
+                               response_mode, session_id)
+        return JSONResponse(result)
+    except Exception as e:
+        metrics.errors.inc(endpoint="presensi_kamera_frame")
+        return error_json(str(e))
+
+
+# ========================
+#  REGISTRASI
+# ========================
+def _save_upload(path, data):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _insert_user_sync(name, filename, emb_blob):
+    """INSERT registrasi lewat DatabasePool app.py (DB_BACKEND selain mysql)"""
+    with flask_app.get_db() as db:
+        cursor = db.cursor()
+        cursor.execute(flask_app.USER_INSERT_SQL, (name, filename, emb_blob))
+        db.commit()
+        return cursor.lastrowid
+
+
+async def admin_register(request):
+    form = await request.form()
+    name = form["name"]
+    photo = form["photo"]
+    model_type = form.get("model_type", "tflite_fp16")
+
+    filename = flask_app.registration_filename(name)
+    path = os.path.join(flask_app.app.config["UPLOAD_FOLDER"], filename)
+    data = await photo.read()
+    await run_cpu(_save_upload, path, data)
+
+    try:
+        rep, emb_blob, used_model = await run_cpu(flask_app.compute_registration_embedding, path, model_type)
+    except ValueError as e:
+        return HTMLResponse(f"Error deteksi wajah! {e}")
+    except Exception as e:
+        return HTMLResponse(f"Error deteksi wajah! <br>Detail: {e}")
+
+    if db_pool is not None:
+        async with db_pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(flask_app.USER_INSERT_SQL, (name, filename, emb_blob))
+                user_id = cursor.lastrowid
+            await conn.commit()
+    else:
+        user_id = await run_cpu(_insert_user_sync, name, filename, emb_blob)
+
+    if flask_app.face_gallery.loaded:
+        flask_app.face_gallery.upsert(user_id, name, rep, model_version=used_model)
+
+    return HTMLResponse(flask_app.register_success_page(name, filename))
+
+
+async def metrics_endpoint(_):
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+routes = [
+    Route("/", page("presensi.html")),
+    Route("/test-camera", page("test_camera.html")),
+    Route("/admin", page("admin_register.html")),
+    Route("/admin/register", admin_register, methods=["POST"]),
+    Route("/presensi-user", page("presensi.html")),
+    Route("/presensi-kamera", presensi_kamera, methods=["POST"]),
+    Route("/presensi-kamera/frame", presensi_kamera_frame, methods=["POST"]),
+    Route("/metrics", metrics_endpoint),
+    Mount("/static", StaticFiles(directory="static"), name="static"),
+]
+
+app = Starlette(routes=routes, lifespan=lifespan, middleware=[Middleware(RequestTimingMiddleware)])
@@ -0,0 +1,118 @@
+"""
+Cooldown per user untuk mencegah check-in ganda
+
+TTL map user_id -> waktu check-in terakhir, dipakai bersama oleh semua
+thread dalam satu worker. Saat pertama dipakai, cache di-seed dari
+MAX(absensi.waktu) per user dalam window cooldown (sekali per worker).
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+
+class AttendanceCooldown:
+    """
+    Args:
+        window_seconds: Lama cooldown; 0 = nonaktif
+        connect: callable context manager koneksi untuk seeding (opsional)
+    """
+
+    def __init__(self, window_seconds=300, connect=None):
+        self.window = timedelta(seconds=window_seconds)
+        self.enabled = window_seconds > 0
+        self.connect = connect
+        self._last = {}
+        self._lock = threading.Lock()
+        self._seed_lock = threading.Lock()
+        self._seeded = False
+        self._ops = 0
+        self.suppressed = 0
+
+    def seed(self):
+        """Isi cache dari check-in terakhir per user dalam window"""
+        if not self.enabled or self.connect is None:
+            self._seeded = True
+            return
+        since = datetime.now() - self.window
+        try:
+            with self.connect() as db:
+                cursor = db.cursor()
+                cursor.execute(
+                    "SELECT user_id, MAX(waktu) FROM absensi WHERE waktu >= %s GROUP BY user_id",
+                    (since,)
+                )
+                rows = cursor.fetchall()
+                cursor.close()
+        except Exception as e:
+            print(f"[!] Cooldown seed error: {e}")
+            rows = []
+        # Merge: entry check_in yang lebih baru dari hasil query tidak ditimpa
+        with self._lock:
+            for user_id, waktu in rows:
+                if waktu is not None and waktu > self._last.get(user_id, datetime.min):
+                    self._last[user_id] = waktu
+            self._seeded = True
+        print(f"[+] Attendance cooldown seeded: {len(rows)} users")
+
+    def _prune(self, now):
+        cutoff = now - self.window
+        for user_id in [uid for uid, t in self._last.items() if t < cutoff]:
+            del self._last[user_id]
+
+    def check_in(self, user_id, now=None):
+        """
+        Tandai check-in jika user tidak dalam cooldown
+
+        Returns:
+            (allowed, last_checkin): allowed False jika masih dalam cooldown,
+            last_checkin = waktu check-in sebelumnya (atau None)
+        """
+        now = now or datetime.now()
+        if not self.enabled:
+            return True, None
+        if not self._seeded:
+            # Request pertama yang bersamaan hanya menjalankan satu query seed
+            with self._seed_lock:
+                if not self._seeded:
+                    self.seed()
+        with self._lock:
+            last = self._last.get(user_id)
+            if last is not None and now - last < self.window:
+                self.suppressed += 1
+                return False, last
+            self._last[user_id] = now
+            self._ops += 1
+            if self._ops % 1000 == 0:
+                self._prune(now)
+            return True, last
+
+    def rollback(self, user_id, checked_in_at, previous=None):
+        """
+        Batalkan check_in yang absensinya gagal ditulis
+
+        Args:
+            checked_in_at: `now` yang dipakai saat check_in
+            previous: last_checkin yang dikembalikan check_in
+
+        Entry hanya dikembalikan jika masih berasal dari check_in tersebut.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._last.get(user_id) != checked_in_at:
+                return
+            if previous is None:
+                del self._last[user_id]
+            else:
+                self._last[user_id] = previous
+
+    def rollback_records(self, records):
+        """
+        Batalkan check_in untuk record (user_id, waktu) yang gagal ditulis,
+        dipakai sebagai on_failure AttendanceWriter (write-behind)
+        """
+        for user_id, waktu in records:
+            self.rollback(user_id, waktu)
+
+    def __len__(self):
+        return len(self._last)
@@ -0,0 +1,209 @@
+"""
+Write-behind attendance logging
+
+Record absensi dimasukkan ke queue dengan timestamp saat wajah dikenali,
+lalu di-flush dengan executemany dalam satu transaksi setiap `batch_size`
+record atau setiap `flush_interval_ms`, oleh satu background thread per worker.
+
+Mode "sync" menulis langsung di request (satu executemany + commit per
+request), dipakai sebagai fallback atau jika write-behind tidak diinginkan.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+INSERT_SQL = "INSERT INTO absensi (user_id, waktu) VALUES (%s, %s)"
+
+
+class AttendanceWriter:
+    """
+    Args:
+        connect: callable yang mengembalikan context manager koneksi (get_db)
+        mode: "async" (write-behind) atau "sync"
+        batch_size: Flush jika jumlah record di queue mencapai nilai ini
+        flush_interval_ms: Flush paling lambat setelah interval ini
+        max_queue: Batas queue; jika penuh record ditulis synchronous
+        on_failure: callable(records) yang dipanggil di background thread jika
+            flush write-behind gagal permanen (mis. AttendanceCooldown.rollback_records);
+            di mode sync error langsung di-raise ke pemanggil
+    """
+
+    def __init__(self, connect, mode="async", batch_size=50, flush_interval_ms=500, max_queue=10000,
+                 on_failure=None):
+        self.connect = connect
+        self.on_failure = on_failure
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+        self._atexit_pid = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._stats_lock = threading.Lock()
+        self.written = 0
+        self.flushes = 0
+        self.sync_fallbacks = 0
+        self.failures = 0
+        self.dropped = 0
+
+    # ---- penulisan ke database ----
+
+    def _write(self, records):
+        with self.connect() as db:
+            cursor = db.cursor()
+            cursor.executemany(INSERT_SQL, records)
+            db.commit()
+            cursor.close()
+        with self._stats_lock:
+            self.written += len(records)
+            self.flushes += 1
+
+    def _write_sync(self, records):
+        try:
+            self._write(records)
+        except Exception as e:
+            with self._stats_lock:
+                self.failures += 1
+            print(f"[!] Attendance write error ({len(records)} record): {e}")
+            raise
+
+    # ---- background thread ----
+
+    def _ensure_started(self):
+        """Start thread secara lazy (setelah fork worker gunicorn)"""
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="attendance-writer", daemon=True)
+            self._thread.start()
+            if self._atexit_pid != self._pid:
+                atexit.register(self.close)
+                self._atexit_pid = self._pid
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush_batch(self, batch):
+        if not batch:
+            return
+        try:
+            self._write(batch)
+        except Exception as e:
+            with self._stats_lock:
+                self.failures += 1
+            print(f"[!] Attendance flush error, {len(batch)} record dicoba ulang: {e}")
+            time.sleep(min(self.flush_interval, 1.0))
+            try:
+                self._write(batch)
+            except Exception as e2:
+                with self._stats_lock:
+                    self.dropped += len(batch)
+                print(f"[!] Attendance flush gagal lagi, {len(batch)} record hilang: {e2}")
+                if self.on_failure is not None:
+                    try:
+                        self.on_failure(batch)
+                    except Exception as e3:
+                        print(f"[!] Attendance on_failure error: {e3}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            batch = [first]
+            # Kumpulkan sampai batch_size atau sampai interval habis
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush_batch(batch)
+        # Shutdown: flush sisa queue
+        while True:
+            batch = self._drain(limit=self.batch_size)
+            if not batch:
+                break
+            self._flush_batch(batch)
+
+    # ---- API publik ----
+
+    def record_many(self, user_ids, timestamp=None):
+        """
+        Catat absensi untuk beberapa user sekaligus
+
+        Args:
+            user_ids: list user id yang dikenali
+            timestamp: Waktu pengenalan (default: sekarang, waktu server aplikasi)
+        """
+        if not user_ids:
+            return
+        waktu = timestamp or datetime.now()
+        records = [(int(uid), waktu) for uid in user_ids]
+
+        if self.mode == "sync":
+            self._write_sync(records)
+            return
+
+        self._ensure_started()
+        overflow = []
+        for record in records:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                overflow.append(record)
+        if overflow:
+            # Queue penuh: tulis langsung agar tidak ada record yang hilang
+            with self._stats_lock:
+                self.sync_fallbacks += 1
+            self._write_sync(overflow)
+
+    def record(self, user_id, timestamp=None):
+        self.record_many([user_id], timestamp)
+
+    def flush(self, timeout=5.0):
+        """Tunggu sampai queue kosong (untuk test/benchmark)"""
+        end = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < end:
+            time.sleep(0.01)
+
+    def close(self, timeout=10.0):
+        """Stop background thread dan flush semua record yang tersisa"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "mode": self.mode,
+                "queued": self._queue.qsize(),
+                "written": self.written,
+                "flushes": self.flushes,
+                "sync_fallbacks": self.sync_fallbacks,
+                "failures": self.failures,
+                "dropped": self.dropped,
+            }
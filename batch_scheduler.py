@@ -0,0 +1,164 @@
+"""
+Micro-batching inference scheduler
+
+Crop wajah dari semua request yang berjalan bersamaan dikumpulkan ke satu
+queue. Dispatcher thread mengambil crop pertama, lalu menunggu paling lama
+`max_wait_ms` (atau sampai `max_batch` crop) sebelum menjalankan satu batched
+invoke; setiap embedding dikembalikan ke request-nya lewat Future.
+
+Jumlah dispatcher = jumlah batch yang boleh berjalan bersamaan (biasanya sama
+dengan TFLITE_POOL_SIZE). Thread di-start lazy per proses (aman setelah fork
+worker gunicorn).
+
+Request tidak pernah menunggu tanpa batas: jika embedding tidak selesai dalam
+`timeout_ms` atau tidak ada dispatcher yang hidup, crop yang belum diambil
+dibatalkan dan request memanggil run_batch sendiri.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+
+class MicroBatchScheduler:
+    """
+    Args:
+        run_batch: callable(list crop) -> list embedding (mis. ArcFaceTFLite.embed_batch)
+        max_batch: Jumlah crop maksimum per invoke
+        max_wait_ms: Waktu tunggu maksimum untuk mengumpulkan batch
+        workers: Jumlah dispatcher thread
+        timeout_ms: Batas tunggu embed_batch sebelum fallback ke run_batch langsung
+        name: Nama untuk log
+    """
+
+    def __init__(self, run_batch, max_batch=16, max_wait_ms=3.0, workers=1, timeout_ms=2000,
+                 name="scheduler"):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = max(1, workers)
+        self.timeout = timeout_ms / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._threads = []
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_seen = 0
+        self.histogram = {}
+        self.total_queue_wait = 0.0
+        self.fallbacks = 0
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._threads = [
+                threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _alive(self):
+        return self._pid == os.getpid() and any(thread.is_alive() for thread in self._threads)
+
+    def _run(self):
+        while True:
+            # Lewati crop yang sudah dibatalkan oleh request yang timeout
+            batch = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            now = time.monotonic()
+            crops = [crop for crop, _, _ in batch]
+            try:
+                embeddings = self.run_batch(crops)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future, _), emb in zip(batch, embeddings):
+                future.set_result(emb)
+
+            with self._stats_lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.max_seen = max(self.max_seen, len(batch))
+                self.histogram[len(batch)] = self.histogram.get(len(batch), 0) + 1
+                self.total_queue_wait += sum(now - queued_at for _, _, queued_at in batch)
+
+    def submit(self, crop):
+        """Antrikan satu crop; Future berisi embedding"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((crop, future, time.monotonic()))
+        return future
+
+    def embed_batch(self, crops, timeout=None):
+        """
+        Embed crop dari satu request lewat batch bersama
+
+        Args:
+            timeout: Detik; default timeout_ms dari constructor
+
+        Returns:
+            list embedding sepanjang crops (sama seperti ArcFaceTFLite.embed_batch)
+        """
+        self._ensure_started()
+        if not self._alive():
+            return self._fallback(crops, "tidak ada dispatcher yang hidup")
+
+        futures = [self.submit(crop) for crop in crops]
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        try:
+            return [future.result(max(0.0, deadline - time.monotonic())) for future in futures]
+        except FutureTimeout:
+            for future in futures:
+                future.cancel()
+            return self._fallback(crops, "timeout")
+
+    def _fallback(self, crops, reason):
+        with self._stats_lock:
+            self.fallbacks += 1
+        print(f"[!] {self.name}: {reason}, invoke langsung ({len(crops)} crop)")
+        return self.run_batch(crops)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_seen,
+                "batch_size_histogram": dict(sorted(self.histogram.items())),
+                "avg_queue_wait_ms": self.total_queue_wait / self.items * 1000 if self.items else 0.0,
+                "queued": self._queue.qsize(),
+                "fallbacks": self.fallbacks,
+            }
@@ -0,0 +1,96 @@
+"""
+Benchmark recall vs latency: IVFIndex dibandingkan dengan exact scan
+Gallery berisi embedding acak ter-normalisasi; query adalah versi noisy dari
+embedding gallery (wajah terdaftar) ditambah embedding acak (wajah asing).
+
+Usage: python benchmark_index.py [--sizes 10000 50000] [--nprobe 4 8 16 32] [--queries 500]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from face_index import ExactIndex, IVFIndex
+
+THRESHOLD = 0.40
+
+
+def make_data(n, dim, n_queries, noise, seed=0):
+    """Buat gallery acak dan query (setengah terdaftar, setengah asing)"""
+    rng = np.random.default_rng(seed)
+    gallery = rng.standard_normal((n, dim)).astype(np.float32)
+    gallery /= np.linalg.norm(gallery, axis=1, keepdims=True)
+
+    n_known = n_queries // 2
+    src = rng.choice(n, n_known, replace=False)
+    known = gallery[src] + noise * rng.standard_normal((n_known, dim)).astype(np.float32) / np.sqrt(dim)
+    unknown = rng.standard_normal((n_queries - n_known, dim)).astype(np.float32)
+    queries = np.vstack([known, unknown])
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return gallery, queries.astype(np.float32)
+
+
+def timed_search(index, queries, batch):
+    """Search per batch (mirip jumlah wajah per frame), return hasil + ms/query"""
+    idx, scores = [], []
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch):
+        r_idx, r_scores = index.search(queries[i:i + batch], k=1)
+        idx.append(r_idx[:, 0])
+        scores.append(r_scores[:, 0])
+    elapsed = time.perf_counter() - start
+    return np.concatenate(idx), np.concatenate(scores), elapsed * 1000 / len(queries)
+
+
+def run(sizes, nprobes, n_queries, dim, noise, batch):
+    print(f"{'N':>8} {'index':>12} {'ms/query':>10} {'speedup':>8} "
+          f"{'recall@1':>9} {'decision':>9} {'build s':>8}")
+    print("-" * 70)
+    for n in sizes:
+        gallery, queries = make_data(n, dim, n_queries, noise)
+        n_known = n_queries // 2
+
+        exact = ExactIndex().build(gallery)
+        e_idx, e_scores, e_ms = timed_search(exact, queries, batch)
+        e_accept = e_scores >= THRESHOLD
+        print(f"{n:>8} {'exact':>12} {e_ms:>10.3f} {1.0:>8.1f} {1.0:>9.4f} {1.0:>9.4f} {0.0:>8.2f}")
+
+        start = time.perf_counter()
+        ivf = IVFIndex(min_size=0).build(gallery)
+        build_s = time.perf_counter() - start
+
+        for nprobe in nprobes:
+            ivf.nprobe = nprobe
+            i_idx, i_scores, i_ms = timed_search(ivf, queries, batch)
+            # Recall dihitung pada query wajah terdaftar saja (setengah pertama)
+            recall = np.mean(i_idx[:n_known] == e_idx[:n_known])
+            # Keputusan threshold sama: ditolak keduanya, atau diterima dengan user yang sama
+            i_accept = i_scores >= THRESHOLD
+            decision = np.mean((i_accept == e_accept) & (~e_accept | (i_idx == e_idx)))
+            print(f"{n:>8} {'ivf/' + str(nprobe):>12} {i_ms:>10.3f} {e_ms / i_ms:>8.1f} "
+                  f"{recall:>9.4f} {decision:>9.4f} {build_s:>8.2f}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IVF index vs exact scan")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000],
+                        help="Ukuran gallery (default: 10000 50000)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32],
+                        help="Nilai nprobe yang diuji (default: 4 8 16 32)")
+    parser.add_argument("--queries", type=int, default=500,
+                        help="Jumlah query (default: 500)")
+    parser.add_argument("--dim", type=int, default=512,
+                        help="Dimensi embedding (default: 512, ArcFace)")
+    parser.add_argument("--noise", type=float, default=0.8,
+                        help="Skala noise untuk query wajah terdaftar (default: 0.8)")
+    parser.add_argument("--batch", type=int, default=5,
+                        help="Jumlah wajah per search call (default: 5)")
+    args = parser.parse_args()
+
+    run(args.sizes, args.nprobe, args.queries, args.dim, args.noise, args.batch)
+
+
+if __name__ == "__main__":
+    main()
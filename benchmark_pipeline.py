@@ -0,0 +1,286 @@
+"""
+Benchmark end-to-end pipeline presensi tanpa kamera, MySQL dan orang sungguhan
+
+Yang diukur adalah RecognitionPipeline.recognize (recognition.py), fungsi yang
+sama dengan recognize_frame di app.py, dengan dependency pengganti:
+    decode -> detect -> crop_decode -> gallery -> embed -> match -> attendance -> encode
+
+- Frame: sintetis (background + N patch wajah dari static/uploads atau wajah
+  gambar sederhana) pada resolusi yang diminta, atau fixture JPEG dari --images
+- Gallery: 100/1k/10k/100k embedding acak ter-normalisasi (format FEMB, dimuat
+  lewat EmbeddingGallery.load_rows) ditambah embedding wajah yang dipakai frame
+- Database: stand-in SQLite (sqlite_db.py) di direktori sementara; absensi
+  ditulis oleh AttendanceWriter mode sync, cooldown oleh AttendanceCooldown
+- Embedding: ArcFaceTFLite jika TensorFlow dan model tersedia, selain itu
+  random projection sebagai stand-in (tetap mengukur crop + preprocessing)
+
+Durasi per tahap diambil dari metrics.span yang sama dengan header
+Server-Timing. Hasil p50/p95/p99 dan throughput per tahap ditulis sebagai JSON
+agar bisa dibandingkan antar commit.
+
+Usage: python benchmark_pipeline.py [--gallery_sizes 100 1000 10000 100000]
+       [--resolutions 640x480 1280x720] [--faces 1 3] [--iterations 50]
+       [--images DIR] [--response_mode coords] [--output benchmark_pipeline.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+import metrics
+import sqlite_db
+from attendance_cooldown import AttendanceCooldown
+from attendance_writer import AttendanceWriter
+from benchmark_utils import (OracleDetector, git_commit, load_detector, load_face_sources, make_frame,
+                             summarize, synthetic_face)
+from config import PREVIEW_MAX_SIDE, PREVIEW_JPEG_QUALITY
+from embedding_codec import encode_embedding
+from face_index import make_index
+from gallery import EmbeddingGallery
+from recognition import RecognitionPipeline
+
+STAGES = ("decode", "detect", "crop_decode", "gallery", "embed", "match", "attendance", "encode")
+DIM = 512
+
+
+# ========================
+#  STAND-IN MODEL
+# ========================
+class RandomProjectionEmbedder:
+    """Embedding deterministik dari crop (grayscale 32x32 -> proyeksi acak 512-D)"""
+
+    name = "random_projection"
+
+    def __init__(self, dim=DIM, seed=0):
+        rng = np.random.default_rng(seed)
+        self.projection = rng.standard_normal((32 * 32, dim)).astype(np.float32)
+
+    def embed_batch(self, crops):
+        results = []
+        for crop in crops:
+            if crop is None or crop.size == 0:
+                results.append(None)
+                continue
+            gray = cv2.cvtColor(cv2.resize(crop, (32, 32)), cv2.COLOR_BGR2GRAY)
+            vec = (gray.astype(np.float32).ravel() / 255.0 - 0.5) @ self.projection
+            results.append(vec)
+        return results
+
+
+def load_embedder(kind, model_path):
+    if kind in ("auto", "tflite") and os.path.exists(model_path):
+        try:
+            import tensorflow as tf
+            from arcface_engine import ArcFaceTFLite
+            engine = ArcFaceTFLite(model_path, tf.lite.Interpreter)
+            engine.warmup()
+            engine.name = "tflite"
+            return engine
+        except ImportError as e:
+            if kind == "tflite":
+                raise
+            print(f"[!] TensorFlow tidak tersedia ({e}), memakai random projection")
+    elif kind == "tflite":
+        raise FileNotFoundError(model_path)
+    return RandomProjectionEmbedder()
+
+
+# ========================
+#  GALLERY
+# ========================
+def build_gallery(size, enrolled, index_kind, seed=0):
+    """
+    Gallery berisi `size` user: embedding wajah frame (enrolled) + sisanya acak
+
+    Returns:
+        (EmbeddingGallery, detik load)
+    """
+    rng = np.random.default_rng(seed)
+    random_count = max(0, size - len(enrolled))
+    vectors = rng.standard_normal((random_count, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    rows = [{"id": i + 1, "name": f"enrolled-{i}", "embedding": encode_embedding(vec)}
+            for i, vec in enumerate(enrolled)]
+    rows += [{"id": len(enrolled) + i + 1, "name": f"user-{i}", "embedding": encode_embedding(vec)}
+             for i, vec in enumerate(vectors)]
+
+    gallery = EmbeddingGallery(index=make_index(index_kind))
+    start = time.perf_counter()
+    gallery.load_rows(rows)
+    return gallery, time.perf_counter() - start
+
+
+# ========================
+#  PIPELINE
+# ========================
+def embedder_extract(embedder):
+    """extract_embeddings untuk RecognitionPipeline (crop seperti app.py)"""
+    def extract(img, face_coords, model_type):
+        crops = [img[max(y, 0):y + h, max(x, 0):x + w] for (x, y, w, h) in face_coords]
+        return embedder.embed_batch(crops)
+    return extract
+
+
+def run_frame(pipeline, frame_bytes, response_mode):
+    """Satu frame lewat RecognitionPipeline; return (dict detik per tahap, detik total, wajah dikenali)"""
+    timings = metrics.start_request()
+    start = time.perf_counter()
+    result = pipeline.recognize(frame_bytes, "benchmark", response_mode)
+    total = time.perf_counter() - start
+    stages = dict.fromkeys(STAGES, 0.0)
+    for stage, elapsed in timings:
+        stages[stage] = stages.get(stage, 0.0) + elapsed
+    return stages, total, sum(1 for r in result["results"] if r["status"])
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    embedder = load_embedder(args.engine, args.model)
+
+    fixtures = []
+    if args.images:
+        for filename in sorted(os.listdir(args.images)):
+            path = os.path.join(args.images, filename)
+            if filename.lower().endswith((".jpg", ".jpeg", ".png")) and os.path.isfile(path):
+                with open(path, "rb") as f:
+                    fixtures.append(f.read())
+        if not fixtures:
+            raise SystemExit(f"[!] Tidak ada gambar di {args.images}")
+    detector = load_detector(args.detector, synthetic=not fixtures)
+    print(f"[*] Engine: {embedder.name}, detector: {detector.name}")
+
+    sources = load_face_sources(args.upload_dir) or [synthetic_face(256, rng) for _ in range(16)]
+    enrolled = []
+    if not fixtures:
+        for emb in embedder.embed_batch(sources):
+            enrolled.append(np.asarray(emb, dtype=np.float32).ravel())
+
+    # Skenario frame: fixture apa adanya, atau sintetis per resolusi x jumlah wajah
+    scenarios = []
+    if fixtures:
+        scenarios.append({"name": "fixtures", "frames": [(buf, [], None) for buf in fixtures]})
+    else:
+        for resolution in args.resolutions:
+            width, height = (int(v) for v in resolution.lower().split("x"))
+            for n_faces in args.faces:
+                frames = [make_frame(width, height, n_faces, sources, rng)[:2] + ((width, height),)
+                          for _ in range(8)]
+                scenarios.append({"name": f"{width}x{height}/{n_faces}", "resolution": [width, height],
+                                  "faces": n_faces, "frames": frames})
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in args.gallery_sizes:
+            gallery, load_s = build_gallery(size, enrolled, args.index, seed=args.seed)
+            # Satu koneksi stand-in per ukuran gallery (tabel absensi kosong)
+            conn = sqlite_db.connect(os.path.join(tmpdir, f"benchmark_{size}.db"))
+            connect = lambda: nullcontext(conn)
+            pipeline = RecognitionPipeline(
+                detector=detector,
+                extract_embeddings=embedder_extract(embedder),
+                gallery=gallery,
+                cooldown=AttendanceCooldown(args.cooldown_seconds, connect=connect),
+                writer=AttendanceWriter(connect, mode="sync"),
+                detect_max_side=args.detect_max_side,
+                preview_max_side=PREVIEW_MAX_SIDE,
+                preview_quality=PREVIEW_JPEG_QUALITY
+            )
+
+            for scenario in scenarios:
+                stage_samples = {stage: [] for stage in STAGES}
+                totals = []
+                recognized = 0
+                frames = scenario["frames"]
+                for i in range(args.warmup + args.iterations):
+                    frame_bytes, boxes, frame_size = frames[i % len(frames)]
+                    if isinstance(detector, OracleDetector):
+                        detector.plant(boxes, frame_size)
+                    timings, total, hits = run_frame(pipeline, frame_bytes, args.response_mode)
+                    if i < args.warmup:
+                        continue
+                    for stage in STAGES:
+                        stage_samples[stage].append(timings[stage])
+                    totals.append(total)
+                    recognized += hits
+
+                entry = {
+                    "gallery_size": size,
+                    "gallery_load_ms": load_s * 1000,
+                    "scenario": scenario["name"],
+                    "resolution": scenario.get("resolution"),
+                    "faces": scenario.get("faces"),
+                    "recognized_per_frame": recognized / args.iterations,
+                    "stages": {stage: summarize(samples) for stage, samples in stage_samples.items()},
+                    "end_to_end": summarize(totals),
+                }
+                results.append(entry)
+                e2e = entry["end_to_end"]
+                print(f"{size:>7} {scenario['name']:>16}  p50 {e2e['p50_ms']:7.2f} ms  "
+                      f"p95 {e2e['p95_ms']:7.2f} ms  p99 {e2e['p99_ms']:7.2f} ms  "
+                      f"{e2e['throughput_per_s']:7.1f} frame/s")
+            conn.close()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "platform": {"python": platform.python_version(), "machine": platform.machine(),
+                     "cpu_count": os.cpu_count(), "opencv": cv2.__version__},
+        "config": {"engine": embedder.name, "detector": detector.name, "index": args.index,
+                   "iterations": args.iterations, "response_mode": args.response_mode,
+                   "cooldown_seconds": args.cooldown_seconds,
+                   "detect_max_side": args.detect_max_side, "images": args.images},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end pipeline presensi (offline)")
+    parser.add_argument("--gallery_sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000],
+                        help="Ukuran gallery (default: 100 1000 10000 100000)")
+    parser.add_argument("--resolutions", nargs="+", default=["640x480", "1280x720"],
+                        help="Resolusi frame sintetis WxH (default: 640x480 1280x720)")
+    parser.add_argument("--faces", type=int, nargs="+", default=[1, 3],
+                        help="Jumlah wajah per frame sintetis (default: 1 3)")
+    parser.add_argument("--iterations", type=int, default=50,
+                        help="Frame per skenario (default: 50)")
+    parser.add_argument("--warmup", type=int, default=3,
+                        help="Frame warmup yang tidak dihitung (default: 3)")
+    parser.add_argument("--images", type=str, default=None,
+                        help="Folder fixture JPEG (menggantikan frame sintetis)")
+    parser.add_argument("--upload_dir", type=str, default="static/uploads",
+                        help="Sumber patch wajah frame sintetis (default: static/uploads)")
+    parser.add_argument("--engine", choices=["auto", "tflite", "standin"], default="auto",
+                        help="Model embedding (default: auto)")
+    parser.add_argument("--model", type=str, default="models/arcface_fp16.tflite",
+                        help="Model ArcFace TFLite (default: models/arcface_fp16.tflite)")
+    parser.add_argument("--detector", choices=["auto", "oracle", "blazeface", "haar"], default="auto",
+                        help="auto = oracle untuk frame sintetis, FACE_DETECTOR untuk fixture")
+    parser.add_argument("--index", choices=["exact", "ivf"], default="exact",
+                        help="Search index gallery (default: exact)")
+    parser.add_argument("--cooldown_seconds", type=int, default=0,
+                        help="Cooldown check-in; 0 = setiap wajah dikenali ditulis ke absensi (default: 0)")
+    parser.add_argument("--response_mode", choices=["coords", "preview", "image"], default="coords",
+                        help="Mode response yang di-render (default: coords)")
+    parser.add_argument("--detect_max_side", type=int, default=640,
+                        help="Sisi terpanjang gambar deteksi (default: 640)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default="benchmark_pipeline.json",
+                        help="File hasil JSON (default: benchmark_pipeline.json)")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[+] Hasil ditulis ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Helper bersama untuk benchmark_pipeline.py, loadtest.py dan evaluate_models.py
+
+- Frame sintetis: patch wajah (dari static/uploads atau wajah gambar
+  sederhana) di atas background acak, beserta box wajah yang ditanam
+- Detector: OracleDetector untuk frame sintetis, atau FaceDetectorEngine
+  dengan konfigurasi yang sama seperti app.py
+- Ringkasan latency (p50/p95/p99) dan commit git untuk laporan JSON
+"""
+
+import os
+import subprocess
+
+import cv2
+import numpy as np
+
+
+# ========================
+#  FRAME SINTETIS
+# ========================
+def load_face_sources(upload_dir, limit=32):
+    """Foto wajah dari static/uploads (jika ada) sebagai patch frame sintetis"""
+    sources = []
+    if os.path.isdir(upload_dir):
+        for filename in sorted(os.listdir(upload_dir))[:limit]:
+            img = cv2.imread(os.path.join(upload_dir, filename))
+            if img is not None:
+                sources.append(img)
+    return sources
+
+
+def synthetic_face(side, rng):
+    """Wajah sederhana (elips + mata + mulut) dengan warna acak"""
+    img = np.full((side, side, 3), rng.integers(40, 90), dtype=np.uint8)
+    skin = tuple(int(c) for c in rng.integers(120, 230, 3))
+    center = (side // 2, side // 2)
+    cv2.ellipse(img, center, (side * 2 // 5, side // 2 - 2), 0, 0, 360, skin, -1)
+    for ex in (side // 3, side * 2 // 3):
+        cv2.circle(img, (ex, side * 2 // 5), max(2, side // 14), (30, 30, 30), -1)
+    cv2.ellipse(img, (side // 2, side * 2 // 3), (side // 6, side // 14), 0, 0, 180, (40, 40, 120), -1)
+    return img
+
+
+def make_frame(width, height, n_faces, sources, rng, quality=90):
+    """
+    Returns:
+        (jpeg bytes, list box (x, y, w, h) wajah dalam koordinat frame, index source per wajah)
+    """
+    small = rng.integers(0, 255, (max(2, height // 40), max(2, width // 40), 3), dtype=np.uint8)
+    frame = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+
+    side = int(min(height * 0.6, width / (n_faces + 0.5)))
+    gap = (width - side * n_faces) // (n_faces + 1)
+    y = (height - side) // 2
+    boxes, picks = [], []
+    for i in range(n_faces):
+        pick = i % len(sources)
+        x = gap + i * (side + gap)
+        frame[y:y + side, x:x + side] = cv2.resize(sources[pick], (side, side))
+        boxes.append((x, y, side, side))
+        picks.append(pick)
+    _, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buf.tobytes(), boxes, picks
+
+
+# ========================
+#  DETECTOR
+# ========================
+class OracleDetector:
+    """
+    Detector untuk frame sintetis: mengembalikan box wajah yang ditanam
+
+    Box (koordinat frame asli, frame_size) diskalakan ke ukuran gambar yang
+    diberikan ke detect(), seperti detector sungguhan pada gambar tereduksi.
+    """
+
+    name = "oracle"
+
+    def __init__(self):
+        self.boxes = []
+        self.frame_size = (1, 1)
+
+    def plant(self, boxes, frame_size):
+        self.boxes = boxes
+        self.frame_size = frame_size
+
+    def detect(self, img):
+        sx = img.shape[1] / self.frame_size[0]
+        sy = img.shape[0] / self.frame_size[1]
+        return [(int(x * sx), int(y * sy), int(w * sx), int(h * sy), 1.0) for (x, y, w, h) in self.boxes]
+
+
+def load_detector(kind, synthetic):
+    """
+    Args:
+        kind: "auto", "oracle", "blazeface" atau "haar"
+        synthetic: Frame sintetis (auto = oracle)
+    """
+    if kind == "oracle" or (kind == "auto" and synthetic):
+        return OracleDetector()
+    from config import FACE_DETECTOR, FACE_DETECTOR_MODEL, FACE_DETECTOR_CONFIDENCE, FACE_MIN_SIZE
+    from face_detector import FaceDetectorEngine
+    options = {"model_path": FACE_DETECTOR_MODEL, "confidence": FACE_DETECTOR_CONFIDENCE,
+               "min_face_size": FACE_MIN_SIZE}
+    try:
+        import tensorflow as tf
+        options["interpreter_factory"] = tf.lite.Interpreter
+    except ImportError:
+        pass
+    backend = FACE_DETECTOR if kind == "auto" else kind
+    return FaceDetectorEngine(backend=backend, fallback="haar", **options)
+
+
+# ========================
+#  LAPORAN
+# ========================
+def summarize(samples):
+    """p50/p95/p99/mean dalam ms dan throughput (per detik) dari list detik"""
+    arr = np.asarray(samples, dtype=np.float64) * 1000
+    mean = float(arr.mean())
+    return {
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "mean_ms": mean,
+        "throughput_per_s": 1000.0 / mean if mean > 0 else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
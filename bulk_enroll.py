@@ -0,0 +1,332 @@
+"""
+Bulk enrollment karyawan dari ZIP atau folder berisi file <nama>.jpg
+
+Foto di-decode dan di-embed paralel di process pool (setiap proses memegang
+satu ArcFaceTFLite dan memproses foto per chunk dengan batched inference),
+lalu semua row di-INSERT dengan executemany dalam satu transaksi.
+Progress dilaporkan sebagai event dict (dipakai endpoint untuk streaming
+NDJSON dan CLI untuk print).
+
+Foto dibaca secara streaming: hanya chunk yang sedang di-embed yang ada di
+memory. ZIP ditolak jika jumlah foto atau total ukuran (setelah dekompresi)
+melebihi batas. Endpoint memakai satu process pool per worker yang dibuat
+sekali (shared_pool), bukan pool baru per request.
+
+Usage: python bulk_enroll.py <folder|file.zip> [--workers 2] [--chunk_size 16] [--dry_run]
+"""
+
+import argparse
+import atexit
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import zipfile
+from collections import deque
+
+import cv2
+import numpy as np
+
+from arcface_engine import ArcFaceTFLite
+from config import ARCFACE_MODEL_PATH, EMBEDDING_MODEL_VERSION, BULK_ENROLL_MAX_FILES, BULK_ENROLL_MAX_BYTES
+from embedding_codec import encode_embedding
+from gallery_sync import USER_INSERT_SQL
+
+PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".png")
+MAX_PHOTO_BYTES = 10 * 1024 * 1024
+
+_engine = None
+_shared_pool = None
+_shared_key = None
+_shared_lock = threading.Lock()
+
+
+# ========================
+#  SUMBER FOTO
+# ========================
+def name_from_filename(filename):
+    """'Budi_Santoso.jpg' -> 'Budi Santoso'"""
+    return os.path.splitext(os.path.basename(filename))[0].replace("_", " ").strip()
+
+
+def _is_photo(filename):
+    base = os.path.basename(filename)
+    return base.lower().endswith(PHOTO_EXTENSIONS) and not base.startswith(".")
+
+
+def iter_photos_from_dir(path):
+    """Yield (name, bytes) untuk setiap foto di folder (tidak rekursif)"""
+    for filename in sorted(os.listdir(path)):
+        full = os.path.join(path, filename)
+        if os.path.isfile(full) and _is_photo(filename):
+            with open(full, "rb") as f:
+                yield name_from_filename(filename), f.read()
+
+
+def zip_photo_entries(archive, max_photo_bytes=MAX_PHOTO_BYTES, max_files=BULK_ENROLL_MAX_FILES,
+                      max_total_bytes=BULK_ENROLL_MAX_BYTES):
+    """
+    Entry foto di ZIP (folder dan __MACOSX diabaikan)
+
+    Ukuran diambil dari header ZIP; zipfile tidak membaca melebihi ukuran itu,
+    sehingga batas berlaku juga untuk ZIP bomb.
+
+    Raises:
+        ValueError: jumlah foto > max_files atau total ukuran > max_total_bytes
+    """
+    entries = [info for info in archive.infolist()
+               if not info.is_dir() and "__MACOSX" not in info.filename and _is_photo(info.filename)]
+    if len(entries) > max_files:
+        raise ValueError(f"ZIP berisi {len(entries)} foto (maksimum {max_files})")
+    total = sum(info.file_size for info in entries if info.file_size <= max_photo_bytes)
+    if total > max_total_bytes:
+        raise ValueError(f"Total ukuran foto {total / 2**20:.0f} MB "
+                         f"(maksimum {max_total_bytes / 2**20:.0f} MB)")
+    return entries
+
+
+def iter_zip_entries(archive, entries, max_photo_bytes=MAX_PHOTO_BYTES):
+    """Yield (name, bytes) per entry; bytes None jika foto melebihi max_photo_bytes"""
+    for info in entries:
+        if info.file_size > max_photo_bytes:
+            yield name_from_filename(info.filename), None
+            continue
+        yield name_from_filename(info.filename), archive.read(info)
+
+
+def iter_photos_from_zip(fileobj, max_photo_bytes=MAX_PHOTO_BYTES, max_files=BULK_ENROLL_MAX_FILES,
+                         max_total_bytes=BULK_ENROLL_MAX_BYTES):
+    """Yield (name, bytes) untuk setiap foto di ZIP; ValueError jika melebihi batas"""
+    with zipfile.ZipFile(fileobj) as archive:
+        entries = zip_photo_entries(archive, max_photo_bytes, max_files, max_total_bytes)
+        yield from iter_zip_entries(archive, entries, max_photo_bytes)
+
+
+# ========================
+#  WORKER PROCESS
+# ========================
+def init_embed_worker(model_path, num_threads):
+    """Initializer process pool: satu engine per proses"""
+    global _engine
+    import tensorflow as tf
+    _engine = ArcFaceTFLite(model_path, tf.lite.Interpreter, num_threads=num_threads)
+    _engine.warmup()
+
+
+def embed_chunk(chunk):
+    """
+    Decode dan embed satu chunk foto dengan satu batched inference
+
+    Args:
+        chunk: list (index, name, bytes)
+
+    Returns:
+        list (index, embedding float32 atau None, error atau None)
+    """
+    images = []
+    errors = {}
+    for index, _, data in chunk:
+        img = None
+        if data is None:
+            errors[index] = "File terlalu besar"
+        else:
+            img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                errors[index] = "Gambar tidak valid"
+        images.append(img)
+
+    try:
+        embeddings = _engine.embed_batch(images)
+    except Exception as e:
+        return [(index, None, errors.get(index) or f"Inference error: {e}") for index, _, _ in chunk]
+
+    results = []
+    for (index, _, _), emb in zip(chunk, embeddings):
+        if emb is None or len(emb) == 0:
+            results.append((index, None, errors.get(index) or "Wajah tidak terdeteksi"))
+        else:
+            results.append((index, np.asarray(emb, dtype=np.float32).ravel(), None))
+    return results
+
+
+def _new_pool(model_path, workers):
+    ctx = multiprocessing.get_context("spawn")
+    return ctx.Pool(processes=max(1, workers), initializer=init_embed_worker, initargs=(model_path, 1))
+
+
+def _close_shared_pool():
+    global _shared_pool, _shared_key
+    with _shared_lock:
+        if _shared_pool is not None and _shared_key[0] == os.getpid():
+            _shared_pool.terminate()
+        _shared_pool = _shared_key = None
+
+
+def shared_pool(model_path=ARCFACE_MODEL_PATH, workers=2):
+    """
+    Process pool embedding yang dipakai ulang oleh semua request di worker ini
+
+    Dibuat lazy saat pertama dipakai (setelah fork worker gunicorn); model
+    di-load sekali per process, bukan per upload.
+    """
+    global _shared_pool, _shared_key
+    key = (os.getpid(), model_path, workers)
+    with _shared_lock:
+        if _shared_key != key:
+            _shared_pool = _new_pool(model_path, workers)
+            if _shared_key is None or _shared_key[0] != key[0]:
+                atexit.register(_close_shared_pool)
+            _shared_key = key
+        return _shared_pool
+
+
+# ========================
+#  BULK ENROLLMENT
+# ========================
+def bulk_enroll(photos, connect, upload_dir="static/uploads", model_path=ARCFACE_MODEL_PATH,
+                model_version=EMBEDDING_MODEL_VERSION, workers=2, chunk_size=16, dtype="float32",
+                dry_run=False, pool=None, total=None):
+    """
+    Enroll banyak foto sekaligus
+
+    Args:
+        photos: iterable (name, bytes), dibaca secara streaming
+        connect: callable context manager koneksi database (get_db / DatabasePool.connection)
+        upload_dir: Folder tujuan foto (nama file sama dengan /admin/register)
+        model_path: Model ArcFace TFLite
+        model_version: Tag model yang disimpan di header embedding
+        workers: Jumlah process (jika pool tidak diberikan)
+        chunk_size: Foto per batched inference
+        dtype: Tipe data penyimpanan embedding
+        dry_run: Embed tanpa menyimpan foto/row
+        pool: Process pool (mis. shared_pool()); default pool sementara
+        total: Jumlah foto untuk event progress (jika diketahui)
+
+    Yields:
+        dict event: {"type": "progress", ...} lalu satu {"type": "summary", ...}
+    """
+    if not os.path.exists(model_path):
+        names = [name for name, _ in photos if name]
+        yield {"type": "summary", "total": len(names), "enrolled": 0, "failed": len(names),
+               "failures": [{"name": name, "error": "Model TFLite tidak ditemukan"} for name in names]}
+        return
+
+    own_pool = pool is None
+    if own_pool:
+        pool = _new_pool(model_path, workers)
+
+    failures = []
+    rows = []
+    seen = set()
+    done = 0
+    # Chunk yang sedang diproses: (AsyncResult, {index: (name, bytes)})
+    pending = deque()
+    max_pending = max(2, 2 * workers)
+
+    def collect(result, chunk_data):
+        for index, emb, error in result.get():
+            name, data = chunk_data[index]
+            if emb is None:
+                failures.append({"name": name, "error": error})
+                continue
+            filename = name.replace(" ", "_") + ".jpg"
+            if filename in seen:
+                failures.append({"name": name, "error": "Nama duplikat dalam upload"})
+                continue
+            seen.add(filename)
+            if not dry_run:
+                os.makedirs(upload_dir, exist_ok=True)
+                with open(os.path.join(upload_dir, filename), "wb") as f:
+                    f.write(data)
+            rows.append((name, filename, encode_embedding(emb, model_id=model_version, dtype=dtype)))
+        return len(chunk_data)
+
+    try:
+        chunk = []
+        for index, (name, data) in enumerate(photos):
+            if not name:
+                continue
+            chunk.append((index, name, data))
+            if len(chunk) < chunk_size:
+                continue
+            pending.append((pool.apply_async(embed_chunk, (chunk,)), {i: (n, d) for i, n, d in chunk}))
+            chunk = []
+            if len(pending) >= max_pending:
+                done += collect(*pending.popleft())
+                yield {"type": "progress", "done": done, "total": total or done, "failed": len(failures)}
+        if chunk:
+            pending.append((pool.apply_async(embed_chunk, (chunk,)), {i: (n, d) for i, n, d in chunk}))
+        while pending:
+            done += collect(*pending.popleft())
+            yield {"type": "progress", "done": done, "total": total or done, "failed": len(failures)}
+    finally:
+        if own_pool:
+            pool.terminate()
+
+    if rows and not dry_run:
+        with connect() as db:
+            cursor = db.cursor()
+            cursor.executemany(USER_INSERT_SQL, rows)
+            db.commit()
+            cursor.close()
+
+    yield {"type": "summary", "total": done, "enrolled": len(rows), "failed": len(failures),
+           "dry_run": dry_run, "failures": failures}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk enrollment dari folder atau ZIP")
+    parser.add_argument("source", help="Folder berisi <nama>.jpg atau file .zip")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="Jumlah process (default: 2)")
+    parser.add_argument("--chunk_size", type=int, default=16,
+                        help="Foto per batched inference (default: 16)")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32",
+                        help="Tipe data penyimpanan embedding (default: float32)")
+    parser.add_argument("--dry_run", action="store_true",
+                        help="Embed saja tanpa menyimpan ke database")
+    parser.add_argument("--json", action="store_true",
+                        help="Cetak event sebagai NDJSON")
+    args = parser.parse_args()
+
+    from config import DB_CONFIG, DB_POOL_TIMEOUT
+    from db_pool import DatabasePool
+    pool = DatabasePool(DB_CONFIG, size=1, timeout=DB_POOL_TIMEOUT)
+
+    if os.path.isdir(args.source):
+        photos = iter_photos_from_dir(args.source)
+    else:
+        photos = iter_photos_from_zip(args.source)
+
+    summary = None
+    try:
+        for event in bulk_enroll(photos, pool.connection, workers=args.workers,
+                                 chunk_size=args.chunk_size, dtype=args.dtype, dry_run=args.dry_run):
+            if args.json:
+                print(json.dumps(event), flush=True)
+            elif event["type"] == "progress":
+                print(f"[*] {event['done']}/{event['total']} diproses, {event['failed']} gagal", flush=True)
+            summary = event
+    except ValueError as e:
+        # Batas BULK_ENROLL_MAX_FILES / BULK_ENROLL_MAX_BYTES
+        print(f"[!] {e}")
+        sys.exit(1)
+    finally:
+        pool.close_all()
+
+    if not args.json:
+        print("\n" + "=" * 60)
+        print("BULK ENROLLMENT SUMMARY" + (" (DRY RUN)" if args.dry_run else ""))
+        print("=" * 60)
+        print(f"Total:    {summary['total']}")
+        print(f"Enrolled: {summary['enrolled']}")
+        print(f"Failed:   {summary['failed']}")
+        for failure in summary["failures"]:
+            print(f"  - {failure['name']}: {failure['error']}")
+        print("=" * 60)
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -33,3 +33,108 @@ DB_CONFIG = {
     'autocommit': False
 }
 
+# Connection pool per worker
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))  # detik menunggu koneksi bebas
+DB_POOL_PING_INTERVAL = float(os.getenv('DB_POOL_PING_INTERVAL', 30))  # detik idle sebelum health check
+
+# Backend database: "mysql" (produksi) atau "sqlite" (stand-in lokal untuk load test,
+# lihat sqlite_db.py); SQLITE_PATH hanya dipakai untuk backend sqlite
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql')
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'presensi_loadtest.db')
+
+# Folder foto registrasi
+UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'static/uploads')
+
+
+# Format penyimpanan users.embedding
+# "binary" = format FEMB (lihat embedding_codec.py), "legacy" = base64 pickle
+EMBEDDING_FORMAT = os.getenv('EMBEDDING_FORMAT', 'binary')
+EMBEDDING_DTYPE = os.getenv('EMBEDDING_DTYPE', 'float32')  # float32 atau float16
+
+# Interval minimum pengecekan gallery_changes per worker (milidetik)
+GALLERY_SYNC_INTERVAL_MS = int(os.getenv('GALLERY_SYNC_INTERVAL_MS', 2000))
+
+# Search index gallery: "exact" (brute-force) atau "ivf" (approximate)
+# IVF hanya aktif jika jumlah user >= FACE_INDEX_MIN_SIZE, di bawahnya exact scan.
+# Default exact: aktifkan ivf setelah recall diukur dengan benchmark_index.py
+FACE_INDEX = os.getenv('FACE_INDEX', 'exact')
+FACE_INDEX_NPROBE = int(os.getenv('FACE_INDEX_NPROBE', 16))
+FACE_INDEX_MIN_SIZE = int(os.getenv('FACE_INDEX_MIN_SIZE', 5000))
+
+# Model ArcFace TFLite aktif dan tag versinya. Gallery hanya membandingkan
+# embedding dengan tag yang sama; setelah ganti model jalankan reembed.py dulu.
+# Model INT8 (generate_int8_model.py): models/arcface_int8.tflite + tag tflite_int8
+ARCFACE_MODEL_PATH = os.getenv('ARCFACE_MODEL_PATH', 'models/arcface_fp16.tflite')
+EMBEDDING_MODEL_VERSION = os.getenv('EMBEDDING_MODEL_VERSION', 'tflite_fp16')
+
+# TFLite interpreter pool (per worker)
+# POOL_SIZE = jumlah inference bersamaan, NUM_THREADS = thread per interpreter (0 = default)
+TFLITE_POOL_SIZE = int(os.getenv('TFLITE_POOL_SIZE', 1))
+TFLITE_NUM_THREADS = int(os.getenv('TFLITE_NUM_THREADS', 0))
+
+# Micro-batching: crop dari request yang bersamaan digabung ke satu invoke
+# (tunggu paling lama INFERENCE_BATCH_WAIT_MS, 0 = nonaktif/default; aktifkan
+# setelah diukur dengan loadtest.py). Request yang menunggu lebih dari
+# INFERENCE_BATCH_TIMEOUT_MS memanggil interpreter langsung.
+INFERENCE_BATCH_WAIT_MS = float(os.getenv('INFERENCE_BATCH_WAIT_MS', 0))
+INFERENCE_MAX_BATCH = int(os.getenv('INFERENCE_MAX_BATCH', 16))
+INFERENCE_BATCH_TIMEOUT_MS = float(os.getenv('INFERENCE_BATCH_TIMEOUT_MS', 2000))
+
+# Bulk enrollment (/admin/register-bulk): jumlah process dan foto per batched inference
+BULK_ENROLL_WORKERS = int(os.getenv('BULK_ENROLL_WORKERS', 2))
+BULK_ENROLL_CHUNK = int(os.getenv('BULK_ENROLL_CHUNK', 16))
+# Batas ZIP upload: jumlah foto dan total ukuran setelah dekompresi
+BULK_ENROLL_MAX_FILES = int(os.getenv('BULK_ENROLL_MAX_FILES', 2000))
+BULK_ENROLL_MAX_BYTES = int(os.getenv('BULK_ENROLL_MAX_BYTES', 500 * 1024 * 1024))
+
+# Tambahkan header Server-Timing (durasi per tahap) di response presensi
+SERVER_TIMING = os.getenv('SERVER_TIMING', '0') == '1'
+
+# ASGI entry point (asgi_app.py): thread untuk tahap CPU-bound per proses
+ASGI_CPU_WORKERS = int(os.getenv('ASGI_CPU_WORKERS', 4))
+
+# Face detector: "blazeface" (TFLite) atau "haar". Default blazeface hanya jika
+# model sudah diunduh (python face_detector.py --download), selain itu haar
+FACE_DETECTOR_MODEL = os.getenv('FACE_DETECTOR_MODEL', os.path.join(MODEL_CACHE_DIR, 'face_detection_short_range.tflite'))
+FACE_DETECTOR = os.getenv('FACE_DETECTOR', 'blazeface' if os.path.exists(FACE_DETECTOR_MODEL) else 'haar')
+FACE_DETECTOR_CONFIDENCE = float(os.getenv('FACE_DETECTOR_CONFIDENCE', 0.6))
+FACE_MIN_SIZE = int(os.getenv('FACE_MIN_SIZE', 30))  # piksel
+
+# Sisi terpanjang gambar untuk deteksi wajah (0 = resolusi penuh)
+DETECT_MAX_SIDE = int(os.getenv('DETECT_MAX_SIDE', 640))
+
+# Ukuran maksimum frame untuk endpoint binary /presensi-kamera/frame (bytes)
+MAX_FRAME_BYTES = int(os.getenv('MAX_FRAME_BYTES', 10 * 1024 * 1024))
+
+# Gambar beranotasi untuk response_mode="preview"
+PREVIEW_MAX_SIDE = int(os.getenv('PREVIEW_MAX_SIDE', 320))
+PREVIEW_JPEG_QUALITY = int(os.getenv('PREVIEW_JPEG_QUALITY', 60))
+
+# Attendance writer: "async" (write-behind, batch executemany) atau "sync"
+ATTENDANCE_WRITE_MODE = os.getenv('ATTENDANCE_WRITE_MODE', 'async')
+ATTENDANCE_BATCH_SIZE = int(os.getenv('ATTENDANCE_BATCH_SIZE', 50))
+ATTENDANCE_FLUSH_MS = int(os.getenv('ATTENDANCE_FLUSH_MS', 500))
+ATTENDANCE_MAX_QUEUE = int(os.getenv('ATTENDANCE_MAX_QUEUE', 10000))
+
+# Cooldown per user: absensi ulang dalam window ini tidak dicatat (0 = nonaktif)
+ATTENDANCE_COOLDOWN_SECONDS = int(os.getenv('ATTENDANCE_COOLDOWN_SECONDS', 300))
+
+# Face tracking per sesi kamera: identitas track yang stabil dipakai ulang,
+# diverifikasi ulang setiap TRACK_REVERIFY_FRAMES frame atau jika box berubah jauh.
+# Track yang tidak terlihat lebih dari TRACK_MAX_GAP_MS dibuang (capture per klik
+# tidak pernah mewarisi identitas capture sebelumnya)
+FACE_TRACKING = os.getenv('FACE_TRACKING', '1') == '1'
+TRACK_IOU_THRESHOLD = float(os.getenv('TRACK_IOU_THRESHOLD', 0.3))
+TRACK_REVERIFY_FRAMES = int(os.getenv('TRACK_REVERIFY_FRAMES', 10))
+TRACK_REVERIFY_IOU = float(os.getenv('TRACK_REVERIFY_IOU', 0.5))
+TRACK_MAX_GAP_MS = float(os.getenv('TRACK_MAX_GAP_MS', 1000))
+TRACK_SESSION_TTL = float(os.getenv('TRACK_SESSION_TTL', 30))
+
+# Streaming WebSocket /presensi-kamera/stream: frame yang menunggu lebih lama
+# dari STREAM_MAX_FRAME_AGE_MS di-drop; koneksi ditutup setelah idle
+STREAM_MAX_FRAME_AGE_MS = int(os.getenv('STREAM_MAX_FRAME_AGE_MS', 1000))
+STREAM_IDLE_TIMEOUT = float(os.getenv('STREAM_IDLE_TIMEOUT', 60))
+# Setiap stream memegang satu thread gunicorn (gthread) selama koneksi hidup:
+# jaga STREAM_MAX_CONNECTIONS di bawah --threads agar request HTTP tetap dilayani
+STREAM_MAX_CONNECTIONS = int(os.getenv('STREAM_MAX_CONNECTIONS', 2))
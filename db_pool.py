@@ -0,0 +1,156 @@
+"""
+Connection pool MySQL per worker
+
+- Koneksi dibuat lazy sampai `size`, dipinjam lewat context manager
+- Koneksi yang idle lebih lama dari ping_interval dicek (ping + reconnect)
+- Saat dikembalikan, transaksi yang masih terbuka di-rollback agar koneksi
+  berikutnya tidak membaca snapshot lama (autocommit=False)
+- Counter waktu tunggu pool untuk monitoring
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import mysql.connector
+
+
+class DatabasePoolTimeout(RuntimeError):
+    pass
+
+
+class DatabasePool:
+    """
+    Args:
+        config: dict untuk mysql.connector.connect (DB_CONFIG)
+        size: Jumlah koneksi maksimum per worker
+        timeout: Detik maksimum menunggu koneksi bebas
+        ping_interval: Detik idle sebelum koneksi dicek sebelum dipakai
+    """
+
+    def __init__(self, config, size=5, timeout=10.0, ping_interval=30.0, connect=None):
+        self.config = dict(config)
+        self.size = size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._connect = connect or mysql.connector.connect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+        self._stats_lock = threading.Lock()
+        self.created = 0
+        self.reconnects = 0
+        self.checkouts = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _new_connection(self):
+        conn = self._connect(**self.config)
+        with self._stats_lock:
+            self.created += 1
+        return conn
+
+    def _healthy(self, conn, idle_since):
+        """Ping koneksi yang sudah lama idle; False jika tidak bisa dipulihkan"""
+        if time.monotonic() - idle_since < self.ping_interval:
+            return True
+        try:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except Exception as e:
+            print(f"[!] DB pool: koneksi stale dibuang: {e}")
+            return False
+
+    def _acquire(self):
+        start = time.perf_counter()
+        waited = not self._slots.acquire(blocking=False)
+        if waited and not self._slots.acquire(timeout=self.timeout):
+            raise DatabasePoolTimeout(f"DB pool: semua {self.size} koneksi sibuk")
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.total_wait += elapsed
+                self.max_wait = max(self.max_wait, elapsed)
+
+        try:
+            while True:
+                try:
+                    conn, idle_since = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._new_connection()
+                if self._healthy(conn, idle_since):
+                    return conn
+                with self._stats_lock:
+                    self.reconnects += 1
+                self._close_quietly(conn)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, conn, broken=False):
+        try:
+            if broken:
+                self._close_quietly(conn)
+                return
+            try:
+                # Akhiri transaksi (termasuk SELECT) agar snapshot tidak basi
+                conn.rollback()
+                self._idle.put((conn, time.monotonic()))
+            except Exception:
+                self._close_quietly(conn)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """
+        Pinjam satu koneksi dari pool
+
+        Koneksi di-rollback saat dikembalikan; panggil commit() sendiri untuk
+        menyimpan perubahan. Koneksi dibuang jika terjadi error database.
+        """
+        conn = self._acquire()
+        broken = False
+        try:
+            yield conn
+        except mysql.connector.Error:
+            broken = True
+            raise
+        finally:
+            self._release(conn, broken)
+
+    def close_all(self):
+        """Tutup semua koneksi idle (dipanggil saat shutdown)"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Statistik pemakaian pool"""
+        with self._stats_lock:
+            return {
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "created": self.created,
+                "reconnects": self.reconnects,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "total_wait_ms": self.total_wait * 1000,
+                "avg_wait_ms": (self.total_wait / self.waits * 1000) if self.waits else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
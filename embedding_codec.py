@@ -0,0 +1,154 @@
+"""
+Format binary untuk kolom users.embedding
+
+Layout (little-endian):
+    magic      4s   b"FEMB"
+    version    B    versi format (saat ini 1)
+    dtype      B    0 = float32, 1 = float16
+    id_len     B    panjang model id (bytes)
+    reserved   B
+    dim        I    jumlah elemen vektor
+    model_id   id_len bytes ASCII, di-pad ke kelipatan 4
+    data       dim * itemsize bytes
+
+Row lama (base64 pickle) tetap bisa dibaca selama masa migrasi.
+"""
+
+import base64
+import io
+import pickle
+import struct
+
+import numpy as np
+
+MAGIC = b"FEMB"
+# Tag model untuk row tanpa tag (base64 pickle lama / header model_id kosong);
+# sama dengan default migrate_embeddings.py
+LEGACY_MODEL_ID = "tflite_fp16"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sBBBBI")
+
+DTYPE_CODES = {
+    "float32": (0, np.dtype("<f4")),
+    "float16": (1, np.dtype("<f2")),
+}
+CODE_TO_DTYPE = {code: dtype for code, dtype in DTYPE_CODES.values()}
+
+
+class EmbeddingFormatError(ValueError):
+    pass
+
+
+def _to_bytes(blob):
+    if isinstance(blob, str):
+        return blob.encode("utf-8")
+    return blob
+
+
+def is_binary(blob):
+    """True jika blob memakai format binary (bukan base64 pickle lama)"""
+    blob = _to_bytes(blob)
+    return blob is not None and bytes(blob[:4]) == MAGIC
+
+
+def encode_embedding(embedding, model_id="", dtype="float32"):
+    """
+    Encode embedding ke format binary
+
+    Args:
+        embedding: array-like 1-D
+        model_id: tag model yang menghasilkan embedding (mis. "tflite_fp16")
+        dtype: "float32" atau "float16"
+
+    Returns:
+        bytes
+    """
+    if dtype not in DTYPE_CODES:
+        raise EmbeddingFormatError(f"dtype tidak didukung: {dtype}")
+    code, np_dtype = DTYPE_CODES[dtype]
+    vec = np.ascontiguousarray(np.asarray(embedding).ravel(), dtype=np_dtype)
+    model_bytes = model_id.encode("ascii")
+    if len(model_bytes) > 255:
+        raise EmbeddingFormatError("model id terlalu panjang")
+    padding = b"\0" * (-len(model_bytes) % 4)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, code, len(model_bytes), 0, vec.shape[0])
+    return header + model_bytes + padding + vec.tobytes()
+
+
+def read_header(blob):
+    """
+    Baca header format binary
+
+    Returns:
+        dict dengan key version, dtype, dim, model_id, offset
+    """
+    blob = _to_bytes(blob)
+    if len(blob) < HEADER.size:
+        raise EmbeddingFormatError("blob terlalu pendek")
+    magic, version, code, id_len, _, dim = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise EmbeddingFormatError("bukan format binary embedding")
+    if version != FORMAT_VERSION:
+        raise EmbeddingFormatError(f"versi format tidak dikenal: {version}")
+    if code not in CODE_TO_DTYPE:
+        raise EmbeddingFormatError(f"kode dtype tidak dikenal: {code}")
+    offset = HEADER.size + id_len + (-id_len % 4)
+    dtype = CODE_TO_DTYPE[code]
+    if len(blob) < offset + dim * dtype.itemsize:
+        raise EmbeddingFormatError("data embedding terpotong")
+    model_id = bytes(blob[HEADER.size:HEADER.size + id_len]).decode("ascii")
+    return {"version": version, "dtype": dtype, "dim": dim,
+            "model_id": model_id, "offset": offset}
+
+
+class _NumpyOnlyUnpickler(pickle.Unpickler):
+    """Unpickler untuk row lama yang hanya mengizinkan class numpy array"""
+
+    ALLOWED = {
+        ("numpy", "ndarray"),
+        ("numpy", "dtype"),
+        ("numpy.core.multiarray", "_reconstruct"),
+        ("numpy._core.multiarray", "_reconstruct"),
+        ("numpy.core.multiarray", "scalar"),
+        ("numpy._core.multiarray", "scalar"),
+    }
+
+    def find_class(self, module, name):
+        if (module, name) not in self.ALLOWED:
+            raise pickle.UnpicklingError(f"class tidak diizinkan: {module}.{name}")
+        return super().find_class(module, name)
+
+
+def decode_legacy(blob):
+    """Decode format lama base64(pickle.dumps(np.array))"""
+    raw = base64.b64decode(_to_bytes(blob))
+    value = _NumpyOnlyUnpickler(io.BytesIO(raw)).load()
+    if not isinstance(value, np.ndarray):
+        raise EmbeddingFormatError(f"pickle lama bukan numpy array: {type(value).__name__}")
+    return value.ravel()
+
+
+def decode_embedding(blob):
+    """
+    Decode kolom users.embedding (format binary atau base64 pickle lama)
+
+    Format binary di-decode zero-copy dengan np.frombuffer, sehingga
+    hasilnya read-only view ke buffer dari database.
+
+    Returns:
+        1-D numpy array (float32/float16 untuk binary, apa adanya untuk legacy)
+    """
+    blob = _to_bytes(blob)
+    if is_binary(blob):
+        header = read_header(blob)
+        return np.frombuffer(blob, dtype=header["dtype"], count=header["dim"],
+                             offset=header["offset"])
+    return decode_legacy(blob)
+
+
+def embedding_model_id(blob):
+    """Return model id dari blob binary, atau None untuk row lama"""
+    blob = _to_bytes(blob)
+    if is_binary(blob):
+        return read_header(blob)["model_id"]
+    return None
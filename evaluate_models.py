@@ -0,0 +1,325 @@
+"""
+Evaluasi akurasi vs kecepatan varian model ArcFace
+
+Dataset berupa folder berlabel: <root>/<nama orang>/*.jpg (minimal 2 foto
+per orang untuk pasangan genuine). Wajah di-crop sekali dengan face detector
+aplikasi (wajah terbesar per foto) lalu setiap varian model meng-embed crop
+yang sama, sehingga perbedaan hasil hanya berasal dari model embedding.
+
+Per model dilaporkan:
+- Verifikasi: EER, ROC AUC, threshold pada target FAR beserta TAR-nya, dan
+  FAR/TAR pada threshold aplikasi saat ini (0.40)
+- Latency embed per gambar (batch 1) dan memori (ukuran file, kenaikan RSS
+  proses setelah load + inference)
+
+Setiap model dijalankan di process terpisah agar pengukuran memori tidak
+saling mempengaruhi.
+
+Usage: python evaluate_models.py <dataset_dir> [--models models/arcface.tflite models/arcface_fp16.tflite]
+       [--deepface] [--target_far 0.001] [--min_tar 0.95] [--output evaluate_models.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from benchmark_utils import git_commit, load_detector
+
+THRESHOLD = 0.40
+DEFAULT_MODELS = [
+    "models/arcface.tflite",
+    "models/arcface_fp16.tflite",
+    "models/arcface_v2.tflite",
+    "models/arcface_fp16_v2.tflite",
+    "models/arcface_int8_dynamic.tflite",
+    "models/arcface_int8.tflite",
+]
+PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+# ========================
+#  DATASET
+# ========================
+def load_dataset(root, detector_kind="auto", max_per_person=None):
+    """
+    Returns:
+        (crops, labels, skipped): crop wajah BGR, label per crop, dan jumlah
+        foto yang dilewati (tidak bisa dibaca / tidak ada wajah)
+    """
+    detector = None if detector_kind == "none" else load_detector(detector_kind, synthetic=False)
+    crops, labels, skipped = [], [], 0
+    for person in sorted(os.listdir(root)):
+        person_dir = os.path.join(root, person)
+        if not os.path.isdir(person_dir):
+            continue
+        files = [f for f in sorted(os.listdir(person_dir)) if f.lower().endswith(PHOTO_EXTENSIONS)]
+        for filename in files[:max_per_person]:
+            img = cv2.imread(os.path.join(person_dir, filename))
+            if img is None:
+                skipped += 1
+                continue
+            if detector is not None:
+                faces = detector.detect(img)
+                if not faces:
+                    skipped += 1
+                    continue
+                x, y, w, h, _ = max(faces, key=lambda f: f[2] * f[3])
+                img = img[max(y, 0):y + h, max(x, 0):x + w]
+            crops.append(img)
+            labels.append(person)
+    return crops, np.asarray(labels), skipped
+
+
+def make_pairs(labels, max_impostors=200000, seed=0):
+    """Semua pasangan genuine dan sampel pasangan impostor (indeks i < j)"""
+    i, j = np.triu_indices(len(labels), k=1)
+    same = labels[i] == labels[j]
+    genuine = (i[same], j[same])
+    imp_i, imp_j = i[~same], j[~same]
+    if len(imp_i) > max_impostors:
+        pick = np.random.default_rng(seed).choice(len(imp_i), max_impostors, replace=False)
+        imp_i, imp_j = imp_i[pick], imp_j[pick]
+    return genuine, (imp_i, imp_j)
+
+
+# ========================
+#  METRIK VERIFIKASI
+# ========================
+def verification_metrics(genuine, impostor, target_far, threshold=THRESHOLD, points=200):
+    """
+    Args:
+        genuine: Cosine similarity pasangan orang yang sama
+        impostor: Cosine similarity pasangan orang berbeda
+
+    Returns:
+        dict EER, AUC, threshold@target FAR, FAR/TAR@threshold dan kurva ROC ringkas
+    """
+    genuine = np.sort(np.asarray(genuine, dtype=np.float64))
+    impostor = np.sort(np.asarray(impostor, dtype=np.float64))
+    thresholds = np.unique(np.concatenate([genuine, impostor, [threshold]]))
+
+    def rates(t):
+        # Diterima jika score >= t
+        far = 1.0 - np.searchsorted(impostor, t, side="left") / len(impostor)
+        tar = 1.0 - np.searchsorted(genuine, t, side="left") / len(genuine)
+        return far, tar
+
+    far, tar = rates(thresholds)
+    frr = 1.0 - tar
+    k = int(np.argmin(np.abs(far - frr)))
+    order = np.argsort(far)
+    auc = float(np.sum(np.diff(far[order]) * (tar[order][1:] + tar[order][:-1]) / 2))
+
+    ok = np.nonzero(far <= target_far)[0]
+    t_at = float(thresholds[ok[0]]) if len(ok) else None
+    far_cur, tar_cur = rates(threshold)
+    curve = np.linspace(0, len(thresholds) - 1, min(points, len(thresholds))).astype(int)
+    return {
+        "eer": float((far[k] + frr[k]) / 2),
+        "eer_threshold": float(thresholds[k]),
+        "auc": auc,
+        "target_far": target_far,
+        "threshold_at_far": t_at,
+        "tar_at_far": float(tar[ok[0]]) if len(ok) else 0.0,
+        "current_threshold": threshold,
+        "far_at_current": float(far_cur),
+        "tar_at_current": float(tar_cur),
+        "roc": [[float(far[c]), float(tar[c]), float(thresholds[c])] for c in curve],
+    }
+
+
+# ========================
+#  WORKER PER MODEL
+# ========================
+def _rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def embed_with_model(variant, crops, num_threads):
+    """
+    Embed semua crop dengan satu varian (dijalankan di process sendiri)
+
+    Returns:
+        dict embeddings (N, D) float32 (NaN untuk crop gagal), latency per gambar
+        (detik) dan memori
+    """
+    base = _rss_mb()
+    start = time.perf_counter()
+    if variant == "deepface":
+        from deepface import DeepFace
+
+        def embed(crop):
+            rep = DeepFace.represent(img_path=crop, model_name="ArcFace",
+                                     detector_backend="skip", enforce_detection=False)
+            return rep[0]["embedding"] if rep else None
+        embed(crops[0])  # load + warmup
+    else:
+        import tensorflow as tf
+        from arcface_engine import ArcFaceTFLite
+        engine = ArcFaceTFLite(variant, tf.lite.Interpreter, num_threads=num_threads or None)
+        engine.warmup()
+        embed = engine.embed
+    load_s = time.perf_counter() - start
+    loaded = _rss_mb()
+
+    embeddings, latencies = [], []
+    for crop in crops:
+        t = time.perf_counter()
+        emb = embed(crop)
+        latencies.append(time.perf_counter() - t)
+        embeddings.append(None if emb is None or len(emb) == 0 else np.asarray(emb, dtype=np.float32).ravel())
+
+    dim = next((len(e) for e in embeddings if e is not None), 0)
+    matrix = np.full((len(crops), dim), np.nan, dtype=np.float32)
+    for row, emb in enumerate(embeddings):
+        if emb is not None:
+            matrix[row] = emb
+    return {
+        "embeddings": matrix,
+        "latencies": latencies,
+        "load_s": load_s,
+        "model_rss_mb": loaded - base,
+        "peak_rss_mb": _peak_rss_mb() - base,
+    }
+
+
+def pair_scores(emb, pairs):
+    """Cosine similarity per pasangan; embedding gagal (NaN) diberi -1 agar selalu ditolak"""
+    return np.nan_to_num(np.einsum("ij,ij->i", emb[pairs[0]], emb[pairs[1]]), nan=-1.0)
+
+
+def evaluate(variants, crops, labels, args):
+    genuine_idx, impostor_idx = make_pairs(labels, args.max_impostors, args.seed)
+    print(f"[*] {len(crops)} crop, {len(set(labels))} orang, "
+          f"{len(genuine_idx[0])} pasangan genuine, {len(impostor_idx[0])} pasangan impostor")
+    if not len(genuine_idx[0]) or not len(impostor_idx[0]):
+        raise SystemExit("[!] Butuh minimal 2 orang dan 2 foto per orang")
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for variant in variants:
+        print(f"[*] Evaluasi {variant} ...")
+        with ctx.Pool(processes=1) as pool:
+            try:
+                out = pool.apply(embed_with_model, (variant, crops, args.threads))
+            except Exception as e:
+                print(f"[!] {variant} gagal: {e}")
+                continue
+
+        emb = out["embeddings"]
+        emb = emb / np.linalg.norm(emb, axis=1, keepdims=True)
+        failed = int(np.isnan(emb).any(axis=1).sum())
+        metrics = verification_metrics(pair_scores(emb, genuine_idx), pair_scores(emb, impostor_idx),
+                                       args.target_far)
+
+        latency_ms = np.asarray(out["latencies"]) * 1000
+        results.append({
+            "model": variant,
+            "file_mb": os.path.getsize(variant) / 2**20 if os.path.isfile(variant) else None,
+            "embedding_failed": failed,
+            "latency_p50_ms": float(np.percentile(latency_ms, 50)),
+            "latency_p95_ms": float(np.percentile(latency_ms, 95)),
+            "latency_mean_ms": float(latency_ms.mean()),
+            "load_s": out["load_s"],
+            "model_rss_mb": out["model_rss_mb"],
+            "peak_rss_mb": out["peak_rss_mb"],
+            **metrics,
+        })
+    return results
+
+
+def print_table(results, target_far, min_tar):
+    far_label = f"@FAR{target_far:g}"
+    print("\n" + "=" * 118)
+    print(f"{'model':<32} {'EER':>6} {'AUC':>6} {'thr' + far_label:>14} {'TAR' + far_label:>14} "
+          f"{'FAR@0.40':>9} {'TAR@0.40':>9} {'ms p50':>7} {'ms p95':>7} {'RSS MB':>7} {'file MB':>7}")
+    print("-" * 118)
+    for r in results:
+        thr = "-" if r["threshold_at_far"] is None else f"{r['threshold_at_far']:.3f}"
+        file_mb = "-" if r["file_mb"] is None else f"{r['file_mb']:.1f}"
+        print(f"{os.path.basename(r['model']):<32} {r['eer']:>6.3f} {r['auc']:>6.3f} {thr:>14} "
+              f"{r['tar_at_far']:>14.3f} {r['far_at_current']:>9.4f} {r['tar_at_current']:>9.3f} "
+              f"{r['latency_p50_ms']:>7.2f} {r['latency_p95_ms']:>7.2f} {r['peak_rss_mb']:>7.0f} {file_mb:>7}")
+    print("=" * 118)
+
+    eligible = [r for r in results if r["threshold_at_far"] is not None and r["tar_at_far"] >= min_tar]
+    if eligible:
+        best = min(eligible, key=lambda r: r["latency_p50_ms"])
+        print(f"[+] Model tercepat dengan TAR >= {min_tar:g} pada FAR {target_far:g}: {best['model']} "
+              f"(threshold {best['threshold_at_far']:.3f}, {best['latency_p50_ms']:.2f} ms/gambar)")
+        return best["model"]
+    print(f"[!] Tidak ada model dengan TAR >= {min_tar:g} pada FAR {target_far:g}")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluasi akurasi vs kecepatan varian model ArcFace")
+    parser.add_argument("dataset", help="Folder berlabel <root>/<nama>/*.jpg")
+    parser.add_argument("--models", nargs="+", default=None,
+                        help="File model TFLite (default: varian standar yang ada di models/)")
+    parser.add_argument("--deepface", action="store_true",
+                        help="Ikut evaluasi DeepFace ArcFace (Keras)")
+    parser.add_argument("--detector", choices=["auto", "blazeface", "haar", "none"], default="auto",
+                        help="Detector untuk crop; none = foto sudah ter-crop (default: auto)")
+    parser.add_argument("--max_per_person", type=int, default=None,
+                        help="Batas foto per orang (default: semua)")
+    parser.add_argument("--max_impostors", type=int, default=200000,
+                        help="Sampel pasangan impostor maksimum (default: 200000)")
+    parser.add_argument("--target_far", type=float, default=0.001,
+                        help="Target false accept rate (default: 0.001)")
+    parser.add_argument("--min_tar", type=float, default=0.95,
+                        help="TAR minimum pada target FAR untuk rekomendasi (default: 0.95)")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="Thread TFLite per interpreter, 0 = default TFLite (default: 0)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default="evaluate_models.json",
+                        help="File hasil JSON (default: evaluate_models.json)")
+    args = parser.parse_args()
+
+    variants = []
+    for model in args.models or DEFAULT_MODELS:
+        if os.path.exists(model):
+            variants.append(model)
+        else:
+            print(f"[!] Model tidak ditemukan, dilewati: {model}")
+    if args.deepface:
+        variants.append("deepface")
+    if not variants:
+        print("[!] Tidak ada model untuk dievaluasi")
+        sys.exit(1)
+
+    crops, labels, skipped = load_dataset(args.dataset, args.detector, args.max_per_person)
+    if skipped:
+        print(f"[!] {skipped} foto dilewati (tidak terbaca / wajah tidak terdeteksi)")
+
+    results = evaluate(variants, crops, labels, args)
+    recommended = print_table(results, args.target_far, args.min_tar)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "dataset": {"path": args.dataset, "images": len(crops), "people": len(set(labels)),
+                    "skipped": skipped, "detector": args.detector},
+        "recommended": recommended,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[+] Hasil ditulis ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Face detector engine dengan backend registry
+
+Backend:
+- "blazeface": TFLite BlazeFace short-range (models/face_detection_short_range.tflite,
+  unduh dengan `python face_detector.py --download`), anchor decoding dan NMS
+  vectorized dengan NumPy
+- "haar": OpenCV Haar cascade, XML di-load sekali saat engine dibuat
+
+Semua backend mengembalikan list (x, y, w, h, score) dalam koordinat piksel
+gambar asli, sudah difilter confidence threshold dan ukuran wajah minimum.
+"""
+
+import os
+import sys
+import urllib.request
+
+import cv2
+import numpy as np
+
+from inference_session import InferenceSession
+from interpreter_pool import InterpreterPool
+
+DETECTOR_BACKENDS = {}
+
+# Sama dengan default FACE_DETECTOR_MODEL di config.py (MODEL_CACHE_DIR)
+BLAZEFACE_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models",
+                                    "face_detection_short_range.tflite")
+BLAZEFACE_MODEL_URL = "https://storage.googleapis.com/mediapipe-assets/face_detection_short_range.tflite"
+
+
+def register_detector(name):
+    """Decorator untuk mendaftarkan class backend detector"""
+    def wrapper(cls):
+        DETECTOR_BACKENDS[name] = cls
+        cls.name = name
+        return cls
+    return wrapper
+
+
+def non_max_suppression(boxes, scores, iou_threshold=0.3):
+    """
+    Greedy NMS dengan IoU vectorized
+
+    Args:
+        boxes: (N, 4) array [x1, y1, x2, y2]
+        scores: (N,) array
+        iou_threshold: Box dengan IoU di atas nilai ini terhadap box yang lebih
+            tinggi skornya dibuang
+
+    Returns:
+        array index box yang dipertahankan, urut skor menurun
+    """
+    if len(boxes) == 0:
+        return np.zeros((0,), dtype=np.int64)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+    order = np.argsort(-scores)
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.maximum(0.0, np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]))
+        h = np.maximum(0.0, np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]))
+        inter = w * h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def _to_pixel_boxes(boxes, scores, img_w, img_h, min_face_size):
+    """Clip box [x1, y1, x2, y2] ke gambar, filter ukuran minimum -> list (x, y, w, h, score)"""
+    boxes = boxes.copy()
+    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, img_w)
+    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, img_h)
+    boxes = np.round(boxes).astype(np.int64)
+    w = boxes[:, 2] - boxes[:, 0]
+    h = boxes[:, 3] - boxes[:, 1]
+    ok = (w >= min_face_size) & (h >= min_face_size)
+    return [(int(b[0]), int(b[1]), int(bw), int(bh), float(s))
+            for b, bw, bh, s in zip(boxes[ok], w[ok], h[ok], scores[ok])]
+
+
+def generate_ssd_anchors(input_size=128, strides=(8, 16, 16, 16), anchor_offset=0.5):
+    """
+    Anchor SSD BlazeFace (fixed anchor size): 2 anchor per layer per sel grid,
+    layer dengan stride sama digabung. Short-range 128x128 -> 896 anchor.
+
+    Returns:
+        (N, 2) array pusat anchor [x, y] ternormalisasi
+    """
+    anchors = []
+    i = 0
+    while i < len(strides):
+        stride = strides[i]
+        repeats = 0
+        while i < len(strides) and strides[i] == stride:
+            repeats += 2
+            i += 1
+        grid = int(np.ceil(input_size / stride))
+        ys, xs = np.meshgrid(np.arange(grid), np.arange(grid), indexing="ij")
+        centers = np.stack([(xs + anchor_offset) / grid, (ys + anchor_offset) / grid], axis=-1)
+        anchors.append(np.repeat(centers.reshape(-1, 2), repeats, axis=0))
+    return np.concatenate(anchors).astype(np.float32)
+
+
+@register_detector("blazeface")
+class BlazeFaceDetector:
+    """
+    BlazeFace short-range TFLite
+
+    Args:
+        model_path: Path model .tflite
+        interpreter_factory: biasanya tf.lite.Interpreter
+        confidence: Threshold skor wajah (0-1)
+        min_face_size: Ukuran sisi box minimum dalam piksel
+        iou_threshold: IoU threshold untuk NMS
+        pool_size: Jumlah interpreter (deteksi bersamaan)
+    """
+
+    input_size = 128
+
+    def __init__(self, model_path=BLAZEFACE_MODEL_PATH,
+                 interpreter_factory=None, confidence=0.6, min_face_size=40,
+                 iou_threshold=0.3, pool_size=1, num_threads=None):
+        if interpreter_factory is None:
+            raise ValueError("BlazeFace membutuhkan interpreter_factory (tf.lite.Interpreter)")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model detector tidak ditemukan: {model_path} "
+                                    f"(jalankan: python face_detector.py --download)")
+        self.confidence = confidence
+        self.min_face_size = min_face_size
+        self.iou_threshold = iou_threshold
+        self.anchors = generate_ssd_anchors(self.input_size)
+
+        def new_session():
+            if num_threads:
+                interpreter = interpreter_factory(model_path=model_path, num_threads=num_threads)
+            else:
+                interpreter = interpreter_factory(model_path=model_path)
+            session = InferenceSession(interpreter)
+            outputs = interpreter.get_output_details()
+            # Output: regressors (1, 896, 16) dan classificators (1, 896, 1)
+            by_size = sorted(outputs, key=lambda d: int(d["shape"][-1]), reverse=True)
+            session.regressor_index = by_size[0]["index"]
+            session.score_index = by_size[-1]["index"]
+            return session
+
+        self.pool = InterpreterPool(new_session, size=pool_size, name="blazeface")
+
+    def _letterbox(self, img, out):
+        """Resize dengan padding ke persegi input_size, tulis [-1, 1] RGB ke out"""
+        h, w = img.shape[:2]
+        scale = self.input_size / max(h, w)
+        new_w, new_h = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+        resized = cv2.resize(img, (new_w, new_h))
+        rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+        pad_x = (self.input_size - new_w) // 2
+        pad_y = (self.input_size - new_h) // 2
+        out[...] = 0.0
+        np.subtract(rgb / np.float32(127.5), np.float32(1.0),
+                    out=out[pad_y:pad_y + new_h, pad_x:pad_x + new_w])
+        return scale, pad_x, pad_y
+
+    def decode(self, raw_boxes, raw_scores):
+        """
+        Decode output mentah semua anchor sekaligus
+
+        Returns:
+            (boxes [x1, y1, x2, y2] dalam piksel input, scores) setelah threshold
+        """
+        scores = 1.0 / (1.0 + np.exp(-np.clip(raw_scores.reshape(-1), -100, 100)))
+        mask = scores >= self.confidence
+        if not mask.any():
+            return np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.float32)
+        raw = raw_boxes.reshape(-1, raw_boxes.shape[-1])[mask]
+        anchors = self.anchors[mask] * self.input_size
+        cx = raw[:, 0] + anchors[:, 0]
+        cy = raw[:, 1] + anchors[:, 1]
+        half_w = raw[:, 2] / 2
+        half_h = raw[:, 3] / 2
+        boxes = np.stack([cx - half_w, cy - half_h, cx + half_w, cy + half_h], axis=1)
+        return boxes, scores[mask]
+
+    def detect(self, img):
+        h, w = img.shape[:2]
+        with self.pool.checkout() as session:
+            inp = session.input_view()
+            scale, pad_x, pad_y = self._letterbox(img, inp[0])
+            del inp
+            session.interpreter.invoke()
+            raw_boxes = session.interpreter.get_tensor(session.regressor_index)
+            raw_scores = session.interpreter.get_tensor(session.score_index)
+
+        boxes, scores = self.decode(raw_boxes, raw_scores)
+        keep = non_max_suppression(boxes, scores, self.iou_threshold)
+        boxes, scores = boxes[keep], scores[keep]
+        # Kembalikan ke koordinat gambar asli
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad_x) / scale
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad_y) / scale
+        return _to_pixel_boxes(boxes, scores, w, h, self.min_face_size)
+
+
+@register_detector("haar")
+class HaarCascadeDetector:
+    """
+    OpenCV Haar cascade (frontal face), cascade di-load sekali per slot pool
+
+    Haar tidak memberi skor kalibrasi, sehingga confidence diabaikan (skor 1.0).
+    """
+
+    def __init__(self, cascade_path=None, min_face_size=40, scale_factor=1.3,
+                 min_neighbors=5, pool_size=1, **_):
+        cascade_path = cascade_path or cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+        def new_cascade():
+            cascade = cv2.CascadeClassifier(cascade_path)
+            if cascade.empty():
+                raise FileNotFoundError(f"Haar cascade tidak bisa di-load: {cascade_path}")
+            return cascade
+
+        self.pool = InterpreterPool(new_cascade, size=pool_size, name="haar")
+        self.min_face_size = min_face_size
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def detect(self, img):
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        with self.pool.checkout() as cascade:
+            faces = cascade.detectMultiScale(
+                gray, self.scale_factor, self.min_neighbors,
+                minSize=(self.min_face_size, self.min_face_size)
+            )
+        return [(int(x), int(y), int(w), int(h), 1.0) for (x, y, w, h) in faces]
+
+
+class FaceDetectorEngine:
+    """
+    Engine deteksi wajah: backend utama + fallback (default haar)
+
+    Args:
+        backend: Nama backend di DETECTOR_BACKENDS
+        fallback: Backend cadangan jika backend utama gagal di-load
+        **options: Diteruskan ke constructor backend
+    """
+
+    def __init__(self, backend="blazeface", fallback="haar", **options):
+        self.backend = None
+        for name in (backend, fallback):
+            if not name or self.backend is not None:
+                continue
+            try:
+                self.backend = DETECTOR_BACKENDS[name](**options)
+                print(f"[+] Face detector backend: {name}")
+            except Exception as e:
+                print(f"[!] Face detector '{name}' tidak tersedia: {e}")
+        if self.backend is not None and self.backend.name != backend:
+            print(f"[!] WARNING: FACE_DETECTOR='{backend}' gagal di-load, "
+                  f"deteksi memakai fallback '{self.backend.name}'")
+        if self.backend is None:
+            raise RuntimeError("Tidak ada backend face detector yang tersedia")
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    def warmup(self, size=(480, 640)):
+        """Jalankan satu deteksi pada gambar kosong agar alokasi terjadi saat startup"""
+        self.backend.detect(np.zeros(size + (3,), dtype=np.uint8))
+
+    def detect(self, img):
+        """List (x, y, w, h, score) wajah terdeteksi"""
+        return self.backend.detect(img)
+
+
+def download_blazeface_model(path=BLAZEFACE_MODEL_PATH, url=BLAZEFACE_MODEL_URL):
+    """Unduh model BlazeFace short-range dari MediaPipe ke path (jika belum ada)"""
+    if os.path.exists(path):
+        print(f"[*] Model sudah ada: {path}")
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".part"
+    print(f"[*] Mengunduh {url}")
+    urllib.request.urlretrieve(url, tmp_path)
+    os.replace(tmp_path, path)
+    print(f"[+] Model tersimpan: {path}")
+    return path
+
+
+if __name__ == "__main__":
+    if "--download" in sys.argv[1:]:
+        download_blazeface_model(os.getenv("FACE_DETECTOR_MODEL", BLAZEFACE_MODEL_PATH))
+    else:
+        print("Usage: python face_detector.py --download")
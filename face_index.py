@@ -0,0 +1,230 @@
+"""
+Search index untuk gallery embedding (pure NumPy)
+
+- ExactIndex: brute-force scan, satu matrix multiply untuk semua query
+- IVFIndex: inverted file dengan coarse quantizer (spherical k-means);
+  query hanya dibandingkan dengan vektor di `nprobe` cluster terdekat
+
+Semua vektor diasumsikan sudah L2-normalized, sehingga dot product = cosine
+similarity. Index bersifat immutable: perubahan gallery menghasilkan instance
+baru lewat updated(), sehingga search yang sedang berjalan tetap konsisten.
+"""
+
+import numpy as np
+
+
+def _topk(scores, k):
+    """Top-k per baris dari matrix scores, urut menurun"""
+    k = min(k, scores.shape[1])
+    if k == scores.shape[1]:
+        part = np.argsort(-scores, axis=1)
+    else:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, part, axis=1), axis=1)
+        part = np.take_along_axis(part, order, axis=1)
+    return part[:, :k], np.take_along_axis(scores, part[:, :k], axis=1)
+
+
+def _pad(indices, scores, k):
+    """Pad hasil ke lebar k dengan index -1 / score -1"""
+    m, n = indices.shape
+    if n >= k:
+        return indices, scores
+    pad_i = np.full((m, k - n), -1, dtype=np.int64)
+    pad_s = np.full((m, k - n), -1.0, dtype=np.float32)
+    return np.hstack([indices, pad_i]), np.hstack([scores, pad_s])
+
+
+class ExactIndex:
+    """Brute-force cosine search atas seluruh gallery"""
+
+    kind = "exact"
+
+    def __init__(self, matrix=None):
+        self.matrix = np.zeros((0, 0), dtype=np.float32) if matrix is None else matrix
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def build(self, matrix):
+        return type(self)(matrix)
+
+    def updated(self, matrix, keep=None, new_count=0):
+        return self.build(matrix)
+
+    def search(self, queries, k=1):
+        """
+        Args:
+            queries: (M, D) float32 L2-normalized
+            k: Jumlah kandidat teratas
+
+        Returns:
+            (indices, scores) masing-masing (M, k); index -1 jika kurang dari k
+        """
+        queries = np.atleast_2d(queries)
+        if len(self) == 0:
+            return _pad(np.zeros((queries.shape[0], 0), dtype=np.int64),
+                        np.zeros((queries.shape[0], 0), dtype=np.float32), k)
+        idx, scores = _topk(queries @ self.matrix.T, k)
+        return _pad(idx.astype(np.int64), scores.astype(np.float32), k)
+
+
+def train_centroids(vectors, nlist, iterations=10, sample_size=20000, seed=0):
+    """
+    Spherical k-means untuk coarse quantizer
+
+    Args:
+        vectors: (N, D) L2-normalized
+        nlist: Jumlah cluster
+        iterations: Jumlah iterasi Lloyd
+        sample_size: Maksimum vektor yang dipakai untuk training
+
+    Returns:
+        (nlist, D) centroid L2-normalized
+    """
+    rng = np.random.default_rng(seed)
+    if vectors.shape[0] > sample_size:
+        vectors = vectors[rng.choice(vectors.shape[0], sample_size, replace=False)]
+    nlist = min(nlist, vectors.shape[0])
+    centroids = vectors[rng.choice(vectors.shape[0], nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        counts = np.bincount(assign, minlength=nlist)
+        # Cluster kosong di-reseed dengan vektor acak
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(vectors.shape[0], int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted file index dengan coarse quantizer k-means
+
+    Args:
+        nprobe: Jumlah cluster terdekat yang discan per query
+        nlist: Jumlah cluster (None = otomatis ~2*sqrt(N))
+        min_size: Di bawah ukuran ini index memakai exact scan
+        retrain_factor: Latih ulang centroid jika gallery tumbuh melebihi
+            faktor ini dari ukuran saat training
+    """
+
+    kind = "ivf"
+
+    def __init__(self, nprobe=16, nlist=None, min_size=5000, retrain_factor=4.0):
+        self.nprobe = nprobe
+        self.nlist = nlist
+        self.min_size = min_size
+        self.retrain_factor = retrain_factor
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.centroids = None
+        self.trained_size = 0
+        self.assign = np.zeros((0,), dtype=np.int64)
+        self.order = np.zeros((0,), dtype=np.int64)
+        self.offsets = np.zeros((1,), dtype=np.int64)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def _clone(self):
+        index = IVFIndex(self.nprobe, self.nlist, self.min_size, self.retrain_factor)
+        index.centroids = self.centroids
+        index.trained_size = self.trained_size
+        return index
+
+    def _with_assignments(self, matrix, assign):
+        """Bangun inverted lists dari assignment cluster per baris"""
+        self.matrix = matrix
+        self.assign = assign
+        self.order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=self.centroids.shape[0])
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return self
+
+    def _assign(self, vectors):
+        if vectors.shape[0] == 0:
+            return np.zeros((0,), dtype=np.int64)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int64)
+
+    def build(self, matrix):
+        """Bangun index dari nol (training centroid jika gallery cukup besar)"""
+        index = self._clone()
+        index.centroids = None
+        index.matrix = matrix
+        if matrix.shape[0] < self.min_size:
+            return index
+        nlist = self.nlist or max(1, int(2 * np.sqrt(matrix.shape[0])))
+        index.centroids = train_centroids(matrix, nlist)
+        index.trained_size = matrix.shape[0]
+        print(f"[+] IVF index trained: {matrix.shape[0]} vectors, {index.centroids.shape[0]} lists")
+        return index._with_assignments(matrix, index._assign(matrix))
+
+    def updated(self, matrix, keep=None, new_count=0):
+        """
+        Index baru setelah gallery berubah
+
+        Args:
+            matrix: Matrix gallery baru = matrix_lama[keep] + new_count baris baru
+            keep: Boolean mask baris lama yang dipertahankan
+            new_count: Jumlah baris baru di akhir matrix
+        """
+        n = matrix.shape[0]
+        needs_train = not self.trained and n >= self.min_size
+        grew = self.trained and n > self.retrain_factor * self.trained_size
+        if needs_train or grew or keep is None or (self.trained and n < self.min_size // 2):
+            return self.build(matrix)
+        index = self._clone()
+        if not self.trained:
+            index.matrix = matrix
+            return index
+        assign = np.concatenate([self.assign[keep], index._assign(matrix[n - new_count:])])
+        return index._with_assignments(matrix, assign)
+
+    def search(self, queries, k=1):
+        """
+        Args:
+            queries: (M, D) float32 L2-normalized
+            k: Jumlah kandidat teratas
+
+        Returns:
+            (indices, scores) masing-masing (M, k); index -1 jika kurang dari k
+        """
+        queries = np.atleast_2d(queries)
+        if not self.trained:
+            return ExactIndex(self.matrix).search(queries, k)
+
+        nprobe = min(self.nprobe, self.centroids.shape[0])
+        probes, _ = _topk(queries @ self.centroids.T, nprobe)
+
+        all_idx, all_scores = [], []
+        for q, lists in zip(queries, probes):
+            cands = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in lists])
+            if cands.size == 0:
+                all_idx.append(np.full(k, -1, dtype=np.int64))
+                all_scores.append(np.full(k, -1.0, dtype=np.float32))
+                continue
+            scores = self.matrix[cands] @ q
+            top, top_scores = _topk(scores[None, :], k)
+            idx, sc = _pad(cands[top].astype(np.int64), top_scores.astype(np.float32), k)
+            all_idx.append(idx[0])
+            all_scores.append(sc[0])
+        return np.vstack(all_idx), np.vstack(all_scores)
+
+
+def make_index(kind="ivf", nprobe=16, nlist=None, min_size=5000):
+    """Factory index berdasarkan konfigurasi ("exact" atau "ivf")"""
+    if kind == "exact":
+        return ExactIndex()
+    if kind == "ivf":
+        return IVFIndex(nprobe=nprobe, nlist=nlist, min_size=min_size)
+    raise ValueError(f"Jenis index tidak dikenal: {kind}")
@@ -0,0 +1,235 @@
+"""
+Face tracking antar frame kamera per sesi client
+
+Box hasil deteksi setiap frame diasosiasikan ke track sesi yang sama
+(greedy IoU, fallback jarak centroid). Track yang sudah dikenali memakai
+ulang identitasnya tanpa embedding; verifikasi ulang (embed + match) hanya
+dilakukan setiap `reverify_frames` frame atau jika box bergeser/berubah
+ukuran cukup jauh dari box saat terakhir diverifikasi.
+
+Identitas hanya dipakai ulang untuk frame yang berurutan rapat: track yang
+tidak terlihat lebih dari `max_gap_ms` (mis. kiosk yang mengirim satu capture
+per klik, orang berikutnya berdiri di posisi yang sama) dibuang, dan sesi
+yang idle lebih dari `session_ttl` dimulai ulang saat dipakai lagi.
+
+State disimpan per proses; dengan beberapa worker gunicorn frame dari sesi
+yang sama bisa jatuh ke worker lain dan hanya diperlakukan sebagai track baru.
+"""
+
+import threading
+import time
+
+
+def box_iou(a, b):
+    """IoU dua box (x, y, w, h)"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _centroid_close(a, b, max_shift=0.5, max_scale=1.5):
+    """Centroid bergeser < max_shift * sisi box dan ukuran berubah < max_scale kali"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    side = max(aw, ah, 1)
+    dx = (ax + aw / 2) - (bx + bw / 2)
+    dy = (ay + ah / 2) - (by + bh / 2)
+    ratio = max(aw, bw, 1) / max(min(aw, bw), 1)
+    return (dx * dx + dy * dy) ** 0.5 < max_shift * side and ratio < max_scale
+
+
+class Track:
+    """Satu wajah yang diikuti antar frame"""
+
+    __slots__ = ("track_id", "box", "missed", "user_id", "name", "score",
+                 "model_type", "verified_box", "frames_since_verify", "needs_verify", "last_seen")
+
+    def __init__(self, track_id, box, now=None):
+        self.track_id = track_id
+        self.box = box
+        self.last_seen = time.monotonic() if now is None else now
+        self.missed = 0
+        self.user_id = None
+        self.name = None
+        self.score = 0.0
+        self.model_type = None
+        self.verified_box = None
+        self.frames_since_verify = 0
+        self.needs_verify = True
+
+    @property
+    def identified(self):
+        return self.user_id is not None
+
+
+class _Session:
+    def __init__(self):
+        self.tracks = []
+        self.next_id = 1
+        self.last_seen = time.monotonic()
+
+
+class FaceTracker:
+    """
+    Args:
+        iou_threshold: IoU minimum untuk mengasosiasikan box ke track
+        reverify_frames: Verifikasi ulang track yang dikenali setiap K frame
+        reverify_iou: Verifikasi ulang jika IoU box terhadap box saat
+            verifikasi terakhir di bawah nilai ini
+        max_missed: Track dibuang setelah tidak terlihat sekian frame
+        max_gap_ms: Track dibuang jika jarak sejak terakhir terlihat melebihi
+            nilai ini (milidetik), berapa pun jumlah frame-nya
+        session_ttl: Detik idle sebelum sesi dibuang
+        max_sessions: Jumlah sesi maksimum per worker
+    """
+
+    def __init__(self, iou_threshold=0.3, reverify_frames=10, reverify_iou=0.5,
+                 max_missed=2, max_gap_ms=1000, session_ttl=30.0, max_sessions=1000):
+        self.iou_threshold = iou_threshold
+        self.reverify_frames = reverify_frames
+        self.reverify_iou = reverify_iou
+        self.max_missed = max_missed
+        self.max_gap = max_gap_ms / 1000.0
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+        self.frames = 0
+        self.faces = 0
+        self.reused = 0
+
+    def _prune_sessions(self, now):
+        expired = [sid for sid, s in self._sessions.items() if now - s.last_seen > self.session_ttl]
+        for sid in expired:
+            del self._sessions[sid]
+        if len(self._sessions) >= self.max_sessions:
+            # Masih penuh: buang sesi yang paling lama idle
+            oldest = sorted(self._sessions, key=lambda sid: self._sessions[sid].last_seen)
+            for sid in oldest[:len(self._sessions) - self.max_sessions + 1]:
+                del self._sessions[sid]
+
+    def _associate(self, tracks, boxes):
+        """Greedy matching: pasangan IoU tertinggi dulu, sisanya via centroid"""
+        assigned = [None] * len(boxes)
+        free = set(range(len(tracks)))
+
+        pairs = []
+        for ti, track in enumerate(tracks):
+            for bi, box in enumerate(boxes):
+                iou = box_iou(track.box, box)
+                if iou >= self.iou_threshold:
+                    pairs.append((iou, ti, bi))
+        for _, ti, bi in sorted(pairs, reverse=True):
+            if ti in free and assigned[bi] is None:
+                assigned[bi] = ti
+                free.discard(ti)
+
+        for bi, box in enumerate(boxes):
+            if assigned[bi] is not None:
+                continue
+            for ti in sorted(free):
+                if _centroid_close(tracks[ti].box, box):
+                    assigned[bi] = ti
+                    free.discard(ti)
+                    break
+        return assigned
+
+    def update(self, session_id, boxes, model_type):
+        """
+        Asosiasikan box frame ini ke track sesi
+
+        Args:
+            session_id: ID sesi dari client
+            boxes: List (x, y, w, h) dalam koordinat gambar asli
+            model_type: Model embedding yang dipakai frame ini
+
+        Returns:
+            List Track sejajar dengan boxes; track.needs_verify = True berarti
+            wajah perlu di-embed dan di-match ulang
+        """
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.last_seen > self.session_ttl:
+                session = None
+            if session is None:
+                if session_id not in self._sessions and len(self._sessions) >= self.max_sessions:
+                    self._prune_sessions(now)
+                session = self._sessions[session_id] = _Session()
+            session.last_seen = now
+            # Frame terlalu jauh dari frame sebelumnya: wajah bisa milik orang lain
+            session.tracks = [t for t in session.tracks if now - t.last_seen <= self.max_gap]
+
+            assigned = self._associate(session.tracks, boxes)
+            result = []
+            matched = set()
+            for bi, box in enumerate(boxes):
+                ti = assigned[bi]
+                if ti is None:
+                    track = Track(session.next_id, box, now)
+                    session.next_id += 1
+                    session.tracks.append(track)
+                else:
+                    track = session.tracks[ti]
+                    track.box = box
+                    track.last_seen = now
+                    track.missed = 0
+                    track.frames_since_verify += 1
+                matched.add(id(track))
+
+                track.needs_verify = (
+                    not track.identified
+                    or track.model_type != model_type
+                    or track.frames_since_verify >= self.reverify_frames
+                    or box_iou(track.verified_box, box) < self.reverify_iou
+                )
+                result.append(track)
+
+            # Track yang tidak terlihat di frame ini
+            for track in session.tracks:
+                if id(track) not in matched:
+                    track.missed += 1
+            session.tracks = [t for t in session.tracks if t.missed <= self.max_missed]
+
+            self.frames += 1
+            self.faces += len(boxes)
+            self.reused += sum(1 for t in result if not t.needs_verify)
+        return result
+
+    def verified(self, track, user_id, name, score, model_type, recognized):
+        """
+        Simpan hasil verifikasi (embed + match) ke track
+
+        Args:
+            recognized: False jika score di bawah threshold; identitas track
+                dihapus agar frame berikutnya diverifikasi lagi
+        """
+        with self._lock:
+            track.frames_since_verify = 0
+            track.verified_box = track.box
+            track.model_type = model_type
+            if recognized:
+                track.user_id = user_id
+                track.name = name
+                track.score = score
+            else:
+                track.user_id = None
+                track.name = None
+                track.score = 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "frames": self.frames,
+                "faces": self.faces,
+                "reused": self.reused,
+                "reuse_ratio": self.reused / self.faces if self.faces else 0.0,
+            }
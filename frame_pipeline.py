@@ -0,0 +1,179 @@
+"""
+Multi-resolution decode-and-detect pipeline untuk upload kamera
+
+1. Ukuran JPEG dibaca dari header (tanpa decode)
+2. Decode pada skala tereduksi (IMREAD_REDUCED_COLOR_2/4/8, DCT scaling libjpeg)
+   sedekat mungkin dengan resolusi deteksi, lalu resize ke detect_max_side
+3. Deteksi wajah pada gambar kecil
+4. Box dipetakan ke gambar crop dengan resolusi yang cukup agar wajah terkecil
+   tetap >= 112 px (input ArcFace); decode ulang hanya jika gambar kecil kurang
+"""
+
+import cv2
+import numpy as np
+
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+
+class FrameTooLarge(ValueError):
+    """Body frame melebihi MAX_FRAME_BYTES (HTTP 413)"""
+    pass
+
+
+# Marker SOF (start of frame) yang berisi dimensi gambar
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_size(buf):
+    """
+    Baca (width, height) dari header JPEG tanpa decode
+
+    Returns:
+        (width, height) atau None jika bukan JPEG / header tidak terbaca
+    """
+    data = memoryview(buf)
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    n = len(data)
+    while i + 9 < n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        length = (data[i + 2] << 8) | data[i + 3]
+        if marker in _SOF_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        i += 2 + length
+    return None
+
+
+def _reduced_decode(buf, factor):
+    return cv2.imdecode(buf, REDUCED_FLAGS[factor])
+
+
+class DecodedFrame:
+    """
+    Hasil decode multi-resolusi
+
+    Attributes:
+        detect_img: Gambar kecil untuk deteksi
+        crop_img: Gambar untuk crop wajah (resolusi cukup untuk 112x112)
+        original_size: (width, height) gambar asli
+    """
+
+    def __init__(self, buf, detect_img, decoded_img, decoded_factor, original_size):
+        self._buf = buf
+        self.detect_img = detect_img
+        self._decoded = decoded_img
+        self._decoded_factor = decoded_factor
+        self.original_size = original_size
+        self.crop_img = decoded_img
+
+    def _scale(self, src, dst):
+        """Skala koordinat dari gambar src ke gambar dst"""
+        return dst.shape[1] / src.shape[1], dst.shape[0] / src.shape[0]
+
+    def prepare_crops(self, detect_coords, embed_size=112):
+        """
+        Pilih resolusi crop dan petakan box deteksi ke gambar crop
+
+        Args:
+            detect_coords: List (x, y, w, h) dalam koordinat detect_img
+            embed_size: Sisi input model embedding
+
+        Returns:
+            List (x, y, w, h) dalam koordinat crop_img
+        """
+        if not detect_coords:
+            return []
+        full_w, full_h = self.original_size
+        to_full = full_w / self.detect_img.shape[1]
+        smallest = min(min(w, h) for (_, _, w, h) in detect_coords) * to_full
+
+        # Reduksi terbesar yang wajah terkecilnya masih >= embed_size
+        factor = 1
+        for f in (8, 4, 2):
+            if smallest / f >= embed_size:
+                factor = f
+                break
+
+        if factor < self._decoded_factor:
+            self.crop_img = _reduced_decode(self._buf, factor)
+        else:
+            self.crop_img = self._decoded
+
+        return self.to_crop(detect_coords)
+
+    def to_crop(self, detect_coords):
+        """Petakan box (x, y, w, h) dari detect_img ke crop_img saat ini"""
+        sx, sy = self._scale(self.detect_img, self.crop_img)
+        return [(int(round(x * sx)), int(round(y * sy)), int(round(w * sx)), int(round(h * sy)))
+                for (x, y, w, h) in detect_coords]
+
+    def to_original(self, coords, source="crop"):
+        """Petakan box (x, y, w, h) dari crop/detect image ke koordinat gambar asli"""
+        src = self.crop_img if source == "crop" else self.detect_img
+        sx = self.original_size[0] / src.shape[1]
+        sy = self.original_size[1] / src.shape[0]
+        return [(int(round(x * sx)), int(round(y * sy)), int(round(w * sx)), int(round(h * sy)))
+                for (x, y, w, h) in coords]
+
+
+def decode_for_detection(img_bytes, detect_max_side=640):
+    """
+    Decode upload pada resolusi serendah mungkin untuk deteksi
+
+    Args:
+        img_bytes: bytes/np.ndarray uint8 berisi file gambar
+        detect_max_side: Sisi terpanjang gambar deteksi (0 = tanpa downscale)
+
+    Returns:
+        DecodedFrame, atau None jika gambar tidak bisa di-decode
+    """
+    buf = np.frombuffer(img_bytes, np.uint8) if not isinstance(img_bytes, np.ndarray) else img_bytes
+    size = jpeg_size(buf)
+
+    factor = 1
+    if size is not None and detect_max_side:
+        longest = max(size)
+        for f in (8, 4, 2):
+            if longest / f >= detect_max_side:
+                factor = f
+                break
+
+    decoded = _reduced_decode(buf, factor)
+    if decoded is None and factor != 1:
+        factor = 1
+        decoded = _reduced_decode(buf, 1)
+    if decoded is None:
+        return None
+
+    if size is None or factor == 1:
+        size = (decoded.shape[1], decoded.shape[0])
+    elif (decoded.shape[1] > decoded.shape[0]) != (size[0] > size[1]):
+        # Orientasi EXIF diterapkan oleh imdecode: sisi lebar/tinggi tertukar
+        size = (size[1], size[0])
+
+    detect_img = decoded
+    longest = max(decoded.shape[:2])
+    if detect_max_side and longest > detect_max_side:
+        scale = detect_max_side / longest
+        detect_img = cv2.resize(decoded, (max(1, int(round(decoded.shape[1] * scale))),
+                                          max(1, int(round(decoded.shape[0] * scale)))),
+                                interpolation=cv2.INTER_AREA)
+
+    return DecodedFrame(buf, detect_img, decoded, factor, size)
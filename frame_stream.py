@@ -0,0 +1,178 @@
+"""
+Streaming recognition untuk kiosk (satu koneksi persisten per kamera)
+
+Client mengirim frame JPEG sebagai pesan biner dan opsi sebagai pesan teks
+JSON ({"model_type": ..., "response_mode": ...}). Reader thread menaruh frame
+ke mailbox satu slot: frame yang belum sempat diproses digantikan frame
+terbaru (di-drop), sehingga latency tetap terbatas pada satu frame walaupun
+client mengirim lebih cepat dari kemampuan server.
+
+Transport tidak diikat ke library tertentu: FrameStream hanya butuh callable
+receive(timeout) dan send(text), misalnya dari flask-sock.
+
+Dengan worker gthread setiap stream memegang satu thread gunicorn selama
+koneksi hidup; StreamLimiter membatasi jumlah stream per worker agar thread
+sisanya tetap melayani request HTTP biasa.
+"""
+
+import json
+import threading
+import time
+
+
+class LatestFrameSlot:
+    """Mailbox satu slot: put() menggantikan frame yang belum diambil"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._closed = False
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, data):
+        with self._cond:
+            if self._frame is not None:
+                self.dropped += 1
+            self.received += 1
+            self._frame = (self.received, data, time.monotonic())
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """
+        Returns:
+            (seq, data, received_at), atau None jika slot ditutup / timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._frame is not None or self._closed, timeout):
+                return None
+            frame, self._frame = self._frame, None
+            return frame
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class StreamLimiter:
+    """
+    Batas jumlah stream bersamaan per worker
+
+    Args:
+        max_streams: Jumlah stream maksimum; 0 = streaming nonaktif
+    """
+
+    def __init__(self, max_streams):
+        self.max_streams = max(0, max_streams)
+        self.active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Returns: True jika stream boleh dibuka (wajib release() setelahnya)"""
+        with self._lock:
+            if self.active >= self.max_streams:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+    def stats(self):
+        with self._lock:
+            return {"active": self.active, "max": self.max_streams, "rejected": self.rejected}
+
+
+class FrameStream:
+    """
+    Args:
+        receive: callable(timeout) -> bytes | str | None; raise saat koneksi putus
+        send: callable(str)
+        process: callable(frame_bytes, options) -> dict hasil recognition
+        options: Opsi awal (model_type, response_mode)
+        max_age_ms: Frame yang menunggu lebih lama dari ini di-drop
+        idle_timeout: Detik tanpa pesan sebelum stream ditutup
+    """
+
+    def __init__(self, receive, send, process, options=None, max_age_ms=1000, idle_timeout=60):
+        self.receive = receive
+        self.send = send
+        self.process = process
+        self.options = dict(options or {})
+        self.max_age = max_age_ms / 1000.0
+        self.idle_timeout = idle_timeout
+        self.slot = LatestFrameSlot()
+        self.processed = 0
+        self.stale = 0
+
+    def _reader(self):
+        try:
+            while True:
+                message = self.receive(self.idle_timeout)
+                if message is None:
+                    break
+                if isinstance(message, str):
+                    try:
+                        self.options.update(json.loads(message))
+                    except (ValueError, TypeError):
+                        pass
+                    continue
+                self.slot.put(message)
+        except Exception:
+            pass
+        finally:
+            self.slot.close()
+
+    def _event(self, event_type, **payload):
+        self.send(json.dumps({"type": event_type, **payload}))
+
+    def run(self):
+        """Proses frame sampai client menutup koneksi atau idle"""
+        reader = threading.Thread(target=self._reader, name="frame-stream-reader", daemon=True)
+        reader.start()
+        self._event("ready", options=self.options)
+
+        while True:
+            frame = self.slot.get()
+            if frame is None:
+                break
+            seq, data, received_at = frame
+            waited = time.monotonic() - received_at
+            if waited > self.max_age:
+                self.stale += 1
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = self.process(data, dict(self.options))
+            except Exception as e:
+                result = {"status": False, "message": f"Error: {str(e)}", "results": []}
+            self.processed += 1
+            try:
+                self._event(
+                    "result",
+                    seq=seq,
+                    dropped=self.slot.dropped + self.stale,
+                    queue_ms=waited * 1000,
+                    process_ms=(time.perf_counter() - start) * 1000,
+                    **result
+                )
+            except Exception:
+                # Client sudah putus
+                self.slot.close()
+                break
+
+        reader.join(timeout=1.0)
+        return self.stats()
+
+    def stats(self):
+        return {
+            "received": self.slot.received,
+            "processed": self.processed,
+            "dropped": self.slot.dropped,
+            "stale": self.stale,
+        }
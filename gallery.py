@@ -0,0 +1,223 @@
+"""
+In-memory embedding gallery untuk face matching
+Semua embedding user disimpan sebagai satu matrix float32 yang sudah di-L2-normalize,
+sehingga matching semua wajah cukup satu matrix multiply + argmax.
+"""
+
+import threading
+
+import numpy as np
+
+import embedding_codec
+from face_index import ExactIndex
+
+
+def decode_embedding(blob):
+    """
+    Decode kolom users.embedding ke numpy array float32
+
+    Args:
+        blob: str/bytes dari database (format binary atau base64 pickle lama)
+
+    Returns:
+        1-D numpy array float32
+    """
+    return np.asarray(embedding_codec.decode_embedding(blob), dtype=np.float32).ravel()
+
+
+def l2_normalize(vectors):
+    """L2-normalize per baris; baris nol dibiarkan nol"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class EmbeddingGallery:
+    """
+    Process-level gallery berisi embedding semua user
+
+    Args:
+        index: Search index (lihat face_index.py), default exact scan
+        model_version: Hanya embedding dengan tag model ini yang dimuat; row
+            lama tanpa tag dianggap ber-tag LEGACY_MODEL_ID. None = semua
+
+    Attributes:
+        matrix: (N, D) float32, setiap baris sudah L2-normalized
+        ids: (N,) int64 user id
+        names: (N,) object array nama user
+    """
+
+    def __init__(self, index=None, model_version=None):
+        self._lock = threading.RLock()
+        self.index = index if index is not None else ExactIndex()
+        self.model_version = model_version
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.ids = np.zeros((0,), dtype=np.int64)
+        self.names = np.zeros((0,), dtype=object)
+        self.loaded = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def dim(self):
+        return self.matrix.shape[1] if self.matrix.size else 0
+
+    def accepts(self, model_version):
+        """
+        True jika embedding dari model_version boleh dibandingkan dengan gallery ini
+
+        Embedding tanpa tag berasal dari model saat migrasi (LEGACY_MODEL_ID) dan
+        ditolak setelah ganti model, meskipun re-embed user tersebut gagal.
+        """
+        if not self.model_version:
+            return True
+        return (model_version or embedding_codec.LEGACY_MODEL_ID) == self.model_version
+
+    def _decode_rows(self, rows, dim=None, skipped=None):
+        """
+        Decode baris users ke list (id, name, vektor float32)
+
+        Row dengan tag model berbeda dilewati; id-nya ditambahkan ke skipped
+        """
+        entries = []
+        other_version = 0
+        for row in rows:
+            try:
+                if not self.accepts(embedding_codec.embedding_model_id(row["embedding"])):
+                    other_version += 1
+                    if skipped is not None:
+                        skipped.append(row["id"])
+                    continue
+                vec = decode_embedding(row["embedding"])
+            except Exception as e:
+                print(f"[!] Gallery: embedding user {row.get('id')} tidak valid: {e}")
+                continue
+            if dim is None:
+                dim = vec.shape[0]
+            if vec.shape[0] != dim:
+                print(f"[!] Gallery: dimensi embedding user {row['id']} "
+                      f"({vec.shape[0]}) != {dim}, dilewati")
+                continue
+            entries.append((row["id"], row["name"], vec))
+        if other_version:
+            print(f"[!] Gallery: {other_version} embedding dari model selain "
+                  f"{self.model_version} dilewati (jalankan reembed.py)")
+        return entries
+
+    def load_rows(self, rows):
+        """
+        Bangun ulang gallery dari baris tabel users
+
+        Args:
+            rows: iterable of dict dengan key id, name, embedding
+        """
+        entries = self._decode_rows(rows)
+        if entries:
+            matrix = l2_normalize(np.vstack([vec for _, _, vec in entries]))
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        index = self.index.build(matrix)
+        with self._lock:
+            self.matrix = matrix
+            self.index = index
+            self.ids = np.asarray([uid for uid, _, _ in entries], dtype=np.int64)
+            self.names = np.asarray([name for _, name, _ in entries], dtype=object)
+            self.loaded = True
+        print(f"[+] Gallery loaded: {len(entries)} users")
+
+    def _apply(self, entries, deleted_ids=()):
+        """
+        Upsert/hapus user tanpa rebuild dari database
+
+        Array baru dibuat lalu di-swap (copy-on-write), sehingga match()
+        yang sedang berjalan tetap memakai snapshot lama yang konsisten.
+        """
+        with self._lock:
+            dim = self.dim or (entries[0][2].shape[0] if entries else 0)
+            if dim == 0:
+                # Gallery kosong dan tidak ada row baru: delete/skip tidak mengubah apa pun
+                return
+            entries = [e for e in entries if e[2].shape[0] == dim]
+            remove = set(int(uid) for uid in deleted_ids) | set(int(uid) for uid, _, _ in entries)
+            keep = ~np.isin(self.ids, np.fromiter(remove, dtype=np.int64, count=len(remove)))
+
+            matrix = self.matrix.reshape(-1, dim)[keep]
+            ids = self.ids[keep]
+            names = self.names[keep]
+            if entries:
+                matrix = np.vstack([matrix, l2_normalize(np.vstack([vec for _, _, vec in entries]))])
+                ids = np.concatenate([ids, np.asarray([uid for uid, _, _ in entries], dtype=np.int64)])
+                names = np.concatenate([names, np.asarray([n for _, n, _ in entries], dtype=object)])
+
+            self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+            self.index = self.index.updated(self.matrix, keep=keep, new_count=len(entries))
+            self.ids = ids
+            self.names = names
+
+    def apply_rows(self, rows, deleted_ids=()):
+        """
+        Terapkan perubahan incremental dari database
+
+        Args:
+            rows: baris users (id, name, embedding) yang baru/berubah
+            deleted_ids: user id yang sudah dihapus
+        """
+        # User yang embedding-nya kini dari model lain dikeluarkan dari gallery
+        skipped = []
+        entries = self._decode_rows(rows, self.dim or None, skipped)
+        self._apply(entries, list(deleted_ids) + skipped)
+
+    def upsert(self, user_id, name, embedding, model_version=None):
+        """Tambah/ganti satu user di gallery (dipakai setelah registrasi)"""
+        if not self.accepts(model_version):
+            return
+        vec = np.asarray(embedding, dtype=np.float32).ravel()
+        if self.dim and vec.shape[0] != self.dim:
+            print(f"[!] Gallery: dimensi embedding user {user_id} tidak cocok, dilewati")
+            return
+        self._apply([(user_id, name, vec)])
+
+    def search(self, embeddings, k=1):
+        """
+        Cari top-k user paling mirip untuk setiap embedding query
+
+        Args:
+            embeddings: (M, D) atau (D,) array embedding wajah
+            k: Jumlah kandidat per query
+
+        Returns:
+            (user_ids, names, scores) masing-masing (M, k); user id -1 dan
+            score -1 jika kandidat tidak ada (gallery kosong / dimensi beda)
+        """
+        queries = l2_normalize(np.atleast_2d(embeddings))
+        m = queries.shape[0]
+        with self._lock:
+            matrix, index, ids, names = self.matrix, self.index, self.ids, self.names
+        if len(ids) == 0 or queries.shape[1] != matrix.shape[1]:
+            return (np.full((m, k), -1, dtype=np.int64),
+                    np.full((m, k), None, dtype=object),
+                    np.full((m, k), -1.0, dtype=np.float32))
+
+        rows, scores = index.search(queries, k)
+        valid = rows >= 0
+        safe_rows = np.where(valid, rows, 0)
+        user_ids = np.where(valid, ids[safe_rows], -1)
+        user_names = np.where(valid, names[safe_rows], None)
+        return user_ids, user_names, scores
+
+    def match(self, embeddings):
+        """
+        Cari user paling mirip untuk setiap embedding query
+
+        Args:
+            embeddings: (M, D) atau (D,) array embedding wajah
+
+        Returns:
+            (user_ids, names, scores): user id (-1 jika gallery kosong), nama,
+            dan cosine similarity terbaik untuk setiap query
+        """
+        user_ids, names, scores = self.search(embeddings, k=1)
+        return user_ids[:, 0], names[:, 0], scores[:, 0]
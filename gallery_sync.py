@@ -0,0 +1,173 @@
+"""
+Sinkronisasi gallery embedding antar worker gunicorn
+
+Setiap perubahan tabel users (insert/update/delete) dicatat oleh trigger MySQL
+ke tabel gallery_changes (lihat gallery_sync.sql). Version berasal dari counter
+satu baris gallery_meta yang dinaikkan di dalam transaksi penulis, sehingga
+version ter-commit berurutan (tidak ada version kecil yang muncul belakangan).
+Setiap worker mengecek counter paling sering sekali per interval, lalu hanya
+memuat row users yang berubah sejak sync terakhir.
+"""
+
+import threading
+import time
+
+USERS_SQL = "SELECT id, name, embedding FROM users"
+USER_INSERT_SQL = "INSERT INTO users (name, photo, embedding) VALUES (%s, %s, %s)"
+# Embedding versi model aktif dari user_embeddings (lihat model_versions.sql),
+# fallback ke users.embedding jika user belum di-embed ulang; fallback dengan
+# tag model lain (atau tanpa tag, lihat LEGACY_MODEL_ID) ditolak gallery
+VERSIONED_USERS_SQL = (
+    "SELECT u.id, u.name, COALESCE(e.embedding, u.embedding) AS embedding FROM users u "
+    "LEFT JOIN user_embeddings e ON e.user_id = u.id AND e.model_version = %s"
+)
+ER_NO_SUCH_TABLE = 1146
+
+
+def _is_missing_table(error):
+    """Error karena tabel tidak ada (MySQL errno 1146 / stand-in SQLite)"""
+    if getattr(error, "errno", None) == ER_NO_SUCH_TABLE:
+        return True
+    return "no such table" in str(error)
+
+
+class GallerySynchronizer:
+    """
+    Menjaga EmbeddingGallery lokal tetap sinkron dengan tabel users
+
+    Args:
+        gallery: EmbeddingGallery yang di-cache per proses
+        interval_ms: Jarak minimum antar pengecekan version (milidetik)
+    """
+
+    def __init__(self, gallery, interval_ms=2000):
+        self.gallery = gallery
+        self.interval = interval_ms / 1000.0
+        self.version = 0
+        self.enabled = True
+        self.versioned = bool(gallery.model_version)
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def _current_version(self, cursor):
+        cursor.execute("SELECT version FROM gallery_meta WHERE id = 1")
+        row = cursor.fetchone()
+        return int(row["version"]) if row else 0
+
+    def _select_users(self, cursor, ids=None):
+        """SELECT users (semua atau hanya ids) dengan embedding versi model gallery"""
+        if self.versioned:
+            sql, params = VERSIONED_USERS_SQL, (self.gallery.model_version,)
+            if ids is not None:
+                sql += f" WHERE u.id IN ({', '.join(['%s'] * len(ids))})"
+                params += tuple(ids)
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+            except Exception as e:
+                # Error lain (koneksi putus, lock timeout) bersifat sementara:
+                # biarkan sync() mencoba lagi pada interval berikutnya
+                if not _is_missing_table(e):
+                    raise
+                print(f"[!] Tabel user_embeddings tidak tersedia, memakai users.embedding: {e}")
+                self.versioned = False
+
+        sql, params = USERS_SQL, ()
+        if ids is not None:
+            sql += f" WHERE id IN ({', '.join(['%s'] * len(ids))})"
+            params = tuple(ids)
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    def _full_load(self, db):
+        cursor = db.cursor(dictionary=True)
+        # Ambil version sebelum load: perubahan di antaranya akan di-apply ulang (idempotent)
+        if self.enabled:
+            try:
+                self.version = self._current_version(cursor)
+            except Exception as e:
+                print(f"[!] Gallery sync nonaktif (jalankan gallery_sync.sql): {e}")
+                self.enabled = False
+        self.gallery.load_rows(self._select_users(cursor))
+        cursor.close()
+
+    def _incremental(self, db):
+        cursor = db.cursor(dictionary=True)
+        latest = self._current_version(cursor)
+        if latest <= self.version:
+            cursor.close()
+            return
+
+        cursor.execute(
+            "SELECT user_id, MAX(version) AS version FROM gallery_changes "
+            "WHERE version > %s GROUP BY user_id",
+            (self.version,)
+        )
+        changed_ids = [row["user_id"] for row in cursor.fetchall()]
+
+        rows = self._select_users(cursor, changed_ids) if changed_ids else []
+        cursor.close()
+
+        # User yang berubah tapi tidak ada lagi di tabel users = terhapus
+        present = {row["id"] for row in rows}
+        deleted = [uid for uid in changed_ids if uid not in present]
+        self.gallery.apply_rows(rows, deleted_ids=deleted)
+        print(f"[+] Gallery sync v{self.version} -> v{latest}: "
+              f"{len(rows)} upsert, {len(deleted)} delete")
+        self.version = latest
+
+    def sync(self, connect, force=False):
+        """
+        Pastikan gallery ter-load dan cukup baru
+
+        Pengecekan version dilakukan paling sering sekali per interval; jika
+        thread lain sedang sync, request ini langsung memakai gallery yang ada.
+
+        Args:
+            connect: callable yang mengembalikan context manager koneksi
+                database (mis. DatabasePool.connection); hanya dipanggil jika
+                memang perlu sync
+            force: Abaikan interval
+
+        Returns:
+            EmbeddingGallery
+        """
+        if self.gallery.loaded:
+            if not self.enabled:
+                return self.gallery
+            if not force and time.monotonic() - self._last_check < self.interval:
+                return self.gallery
+            if not self._lock.acquire(blocking=False):
+                return self.gallery
+        else:
+            self._lock.acquire()
+
+        try:
+            if not self.gallery.loaded:
+                with connect() as db:
+                    self._full_load(db)
+            elif self.enabled:
+                try:
+                    with connect() as db:
+                        self._incremental(db)
+                except Exception as e:
+                    print(f"[!] Gallery sync error: {e}")
+            self._last_check = time.monotonic()
+        finally:
+            self._lock.release()
+        return self.gallery
+
+    def refresh(self, connect):
+        """
+        Muat perubahan sekarang juga (mis. setelah bulk insert)
+
+        Tanpa tabel gallery_changes, gallery di-load ulang penuh.
+        """
+        with self._lock:
+            with connect() as db:
+                if self.enabled and self.gallery.loaded:
+                    self._incremental(db)
+                else:
+                    self._full_load(db)
+            self._last_check = time.monotonic()
+        return self.gallery
@@ -0,0 +1,71 @@
+-- Change log untuk sinkronisasi gallery embedding antar worker
+-- Jalankan sekali: mysql -u root -p presensi < gallery_sync.sql
+--
+-- Version diambil dari satu baris counter di gallery_meta yang dinaikkan
+-- trigger (UPDATE ... SET version = version + 1). Row lock counter ditahan
+-- sampai commit, sehingga transaksi penulis berikutnya menunggu dan version
+-- selalu ter-commit berurutan. AUTO_INCREMENT tidak bisa dipakai: transaksi
+-- panjang (bulk insert) bisa commit version N setelah N+1 terlihat, dan
+-- worker yang sudah melewati N tidak pernah memuat perubahan itu.
+
+CREATE TABLE IF NOT EXISTS `gallery_changes` (
+  `version` bigint NOT NULL,
+  `user_id` int NOT NULL,
+  `op` enum('upsert','delete') NOT NULL,
+  `changed_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`version`),
+  KEY `idx_gallery_changes_user` (`user_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Instalasi lama: version masih AUTO_INCREMENT
+ALTER TABLE `gallery_changes` MODIFY `version` bigint NOT NULL;
+
+CREATE TABLE IF NOT EXISTS `gallery_meta` (
+  `id` tinyint NOT NULL,
+  `version` bigint NOT NULL,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+INSERT IGNORE INTO `gallery_meta` (`id`, `version`)
+SELECT 1, COALESCE(MAX(`version`), 0) FROM `gallery_changes`;
+
+DROP TRIGGER IF EXISTS `users_gallery_insert`;
+DROP TRIGGER IF EXISTS `users_gallery_update`;
+DROP TRIGGER IF EXISTS `users_gallery_delete`;
+
+DELIMITER $$
+
+DROP PROCEDURE IF EXISTS `gallery_log_change`$$
+
+-- Naikkan counter (row lock sampai commit) lalu catat perubahan dengan version itu
+CREATE PROCEDURE `gallery_log_change`(IN p_user_id int, IN p_op varchar(8))
+BEGIN
+  UPDATE `gallery_meta` SET `version` = `version` + 1 WHERE `id` = 1;
+  INSERT INTO `gallery_changes` (`version`, `user_id`, `op`)
+  SELECT `version`, p_user_id, p_op FROM `gallery_meta` WHERE `id` = 1;
+END$$
+
+CREATE TRIGGER `users_gallery_insert` AFTER INSERT ON `users`
+FOR EACH ROW
+BEGIN
+  CALL `gallery_log_change`(NEW.id, 'upsert');
+END$$
+
+CREATE TRIGGER `users_gallery_update` AFTER UPDATE ON `users`
+FOR EACH ROW
+BEGIN
+  IF NOT (OLD.embedding <=> NEW.embedding AND OLD.name <=> NEW.name AND OLD.id <=> NEW.id) THEN
+    IF OLD.id <> NEW.id THEN
+      CALL `gallery_log_change`(OLD.id, 'delete');
+    END IF;
+    CALL `gallery_log_change`(NEW.id, 'upsert');
+  END IF;
+END$$
+
+CREATE TRIGGER `users_gallery_delete` AFTER DELETE ON `users`
+FOR EACH ROW
+BEGIN
+  CALL `gallery_log_change`(OLD.id, 'delete');
+END$$
+
+DELIMITER ;
@@ -0,0 +1,252 @@
+"""
+Generate INT8 quantized models from Keras H5
+H5 -> TFLite INT8 dynamic-range + TFLite INT8 full-integer
+
+- Dynamic-range: weights int8, activations float (no calibration needed)
+- Full-integer: weights and activations int8 (int8 input/output), calibrated
+  with a representative dataset of face crops from static/uploads
+
+Both models are verified against the float32 model on held-out face crops
+(cosine agreement + latency per image) using the same ArcFaceTFLite path as
+app.py, so the report reflects what the app will see.
+
+Usage: python generate_int8_model.py --h5_path <path_to_h5> [--output_dir models]
+       [--upload_dir static/uploads] [--num_calibration 200] [--min_cosine 0.98]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import tensorflow as tf
+
+from arcface_engine import ArcFaceTFLite, preprocess_faces, INPUT_SIZE
+
+IO_TYPES = {"int8": tf.int8, "uint8": tf.uint8, "float32": tf.float32}
+
+
+def collect_face_crops(upload_dir, limit=1000):
+    """
+    Face crops (largest face per photo) from registration photos
+
+    Photos where no face is detected are used whole: registration photos are
+    already face-centred.
+    """
+    from face_detector import FaceDetectorEngine
+    detector = FaceDetectorEngine(backend="haar", fallback=None)
+
+    crops = []
+    for filename in sorted(os.listdir(upload_dir))[:limit]:
+        img = cv2.imread(os.path.join(upload_dir, filename))
+        if img is None:
+            continue
+        faces = detector.detect(img)
+        if faces:
+            x, y, w, h, _ = max(faces, key=lambda f: f[2] * f[3])
+            img = img[max(y, 0):y + h, max(x, 0):x + w]
+        crops.append(img)
+    return crops
+
+
+def representative_dataset(crops, num_samples):
+    """
+    Calibration generator: same preprocessing as the app (resize, RGB, /255)
+
+    Small upload folders are extended with horizontally flipped crops.
+    """
+    samples = list(crops) + [cv2.flip(crop, 1) for crop in crops]
+
+    def generator():
+        batch = np.empty((1,) + INPUT_SIZE[::-1] + (3,), dtype=np.float32)
+        for i in range(min(num_samples, len(samples))):
+            preprocess_faces([samples[i]], batch)
+            yield [batch]
+    return generator
+
+
+def convert(model, mode, rep_data=None, io_type="int8"):
+    """
+    Args:
+        mode: "float32", "dynamic" or "full"
+
+    Returns:
+        TFLite flatbuffer bytes
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if mode == "float32":
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+        return converter.convert()
+
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == "dynamic":
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+        return converter.convert()
+
+    converter.representative_dataset = rep_data
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = IO_TYPES[io_type]
+    converter.inference_output_type = IO_TYPES[io_type]
+    try:
+        return converter.convert()
+    except Exception as e:
+        # Some ops have no int8 kernel: keep them in float
+        print(f"[!] Pure int8 conversion failed ({e}), allowing float fallback ops")
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8,
+                                               tf.lite.OpsSet.TFLITE_BUILTINS]
+        return converter.convert()
+
+
+def load_engine(content):
+    """ArcFaceTFLite over an in-memory flatbuffer"""
+    factory = lambda model_path, **kwargs: tf.lite.Interpreter(model_content=content, **kwargs)
+    engine = ArcFaceTFLite("<memory>", factory)
+    engine.warmup()
+    return engine
+
+
+def embed_timed(engine, crops):
+    """Embeddings (N, D) and mean latency per image (batch 1) in ms"""
+    embeddings = []
+    start = time.perf_counter()
+    for crop in crops:
+        embeddings.append(engine.embed(crop))
+    elapsed = time.perf_counter() - start
+    return np.vstack(embeddings), elapsed * 1000 / len(crops)
+
+
+def agreement(reference, candidate):
+    """Cosine similarity per crop between float32 and quantized embeddings"""
+    ref = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    cand = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosine = np.einsum("ij,ij->i", ref, cand)
+    # Identity agreement: nearest neighbour among the other crops is unchanged
+    same_nn = None
+    if len(ref) > 2:
+        ref_sim, cand_sim = ref @ ref.T, cand @ cand.T
+        np.fill_diagonal(ref_sim, -np.inf)
+        np.fill_diagonal(cand_sim, -np.inf)
+        same_nn = float(np.mean(ref_sim.argmax(axis=1) == cand_sim.argmax(axis=1)))
+    return {
+        "mean": float(cosine.mean()),
+        "min": float(cosine.min()),
+        "p5": float(np.percentile(cosine, 5)),
+        "same_nn": same_nn,
+    }
+
+
+def generate_int8_models(h5_path, output_dir="models", upload_dir="static/uploads", num_calibration=200,
+                         eval_fraction=0.2, io_type="int8", min_cosine=0.98):
+    """
+    Returns:
+        bool: True if every model passes the cosine agreement check
+    """
+    try:
+        print(f"[*] Collecting face crops from {upload_dir}...")
+        crops = collect_face_crops(upload_dir) if os.path.isdir(upload_dir) else []
+        if not crops:
+            print(f"[!] No images in {upload_dir}: full-integer calibration needs registration photos")
+            return False
+
+        # Held-out crops for verification (calibration data would flatter the report)
+        rng = np.random.default_rng(0)
+        order = rng.permutation(len(crops))
+        n_eval = max(1, int(len(crops) * eval_fraction)) if len(crops) > 1 else 1
+        eval_crops = [crops[i] for i in order[:n_eval]]
+        calib_crops = [crops[i] for i in order[n_eval:]] or eval_crops
+        print(f"[+] {len(calib_crops)} calibration crops, {len(eval_crops)} held-out crops")
+
+        print(f"\n[*] Loading Keras model from {h5_path}...")
+        model = tf.keras.models.load_model(h5_path, compile=False)
+        os.makedirs(output_dir, exist_ok=True)
+
+        print("\n[Step 1/3] Converting float32 reference...")
+        float_content = convert(model, "float32")
+
+        print("\n[Step 2/3] Converting INT8 dynamic-range...")
+        dynamic_content = convert(model, "dynamic")
+        dynamic_path = os.path.join(output_dir, "arcface_int8_dynamic.tflite")
+        with open(dynamic_path, "wb") as f:
+            f.write(dynamic_content)
+        print(f"[+] Dynamic-range model saved: {dynamic_path}")
+
+        print(f"\n[Step 3/3] Converting INT8 full-integer ({io_type} input/output)...")
+        full_content = convert(model, "full", representative_dataset(calib_crops, num_calibration), io_type)
+        full_path = os.path.join(output_dir, "arcface_int8.tflite")
+        with open(full_path, "wb") as f:
+            f.write(full_content)
+        print(f"[+] Full-integer model saved: {full_path}")
+
+        print("\n[*] Verifying against float32 on held-out crops...")
+        reference, float_ms = embed_timed(load_engine(float_content), eval_crops)
+        rows = [("float32", len(float_content), float_ms, None)]
+        for name, content in (("int8_dynamic", dynamic_content), ("int8_full", full_content)):
+            embeddings, ms = embed_timed(load_engine(content), eval_crops)
+            rows.append((name, len(content), ms, agreement(reference, embeddings)))
+
+        print("\n" + "=" * 78)
+        print("INT8 QUANTIZATION SUMMARY")
+        print("=" * 78)
+        print(f"{'model':<14} {'size MB':>8} {'ms/img':>8} {'speedup':>8} {'cos mean':>9} "
+              f"{'cos min':>8} {'cos p5':>8} {'same NN':>8}")
+        print("-" * 78)
+        passed = True
+        for name, size, ms, agree in rows:
+            line = f"{name:<14} {size / 2**20:>8.2f} {ms:>8.2f} {float_ms / ms:>7.2f}x"
+            if agree is not None:
+                same_nn = "-" if agree["same_nn"] is None else f"{agree['same_nn']:.3f}"
+                line += f" {agree['mean']:>9.4f} {agree['min']:>8.4f} {agree['p5']:>8.4f} {same_nn:>8}"
+                if agree["mean"] < min_cosine:
+                    passed = False
+                    line += "  FAIL"
+            print(line)
+        print("=" * 78)
+        if not passed:
+            print(f"[!] Mean cosine agreement below {min_cosine}: check the calibration photos")
+        return passed
+
+    except Exception as e:
+        print(f"\n[!] Error during INT8 conversion: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate INT8 quantized models from Keras H5")
+    parser.add_argument("--h5_path", type=str, required=True,
+                        help="Path to Keras H5 model file")
+    parser.add_argument("--output_dir", type=str, default="models",
+                        help="Output directory for TFLite models (default: models/)")
+    parser.add_argument("--upload_dir", type=str, default="static/uploads",
+                        help="Registration photos for calibration (default: static/uploads)")
+    parser.add_argument("--num_calibration", type=int, default=200,
+                        help="Representative samples for full-integer calibration (default: 200)")
+    parser.add_argument("--eval_fraction", type=float, default=0.2,
+                        help="Fraction of crops held out for verification (default: 0.2)")
+    parser.add_argument("--io_type", choices=sorted(IO_TYPES), default="int8",
+                        help="Input/output type of the full-integer model (default: int8)")
+    parser.add_argument("--min_cosine", type=float, default=0.98,
+                        help="Minimum mean cosine agreement with float32 (default: 0.98)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.h5_path):
+        print(f"[!] H5 file not found: {args.h5_path}")
+        sys.exit(1)
+
+    success = generate_int8_models(args.h5_path, args.output_dir, args.upload_dir, args.num_calibration,
+                                   args.eval_fraction, args.io_type, args.min_cosine)
+    if success:
+        print("\n[✓] INT8 models generated and verified!")
+        print("[*] Use in app.py: ARCFACE_MODEL_PATH=models/arcface_int8.tflite "
+              "EMBEDDING_MODEL_VERSION=tflite_int8 (run reembed.py first)")
+        sys.exit(0)
+    else:
+        print("\n[✗] INT8 model generation failed!")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
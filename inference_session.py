@@ -0,0 +1,60 @@
+"""
+InferenceSession: wrapper zero-copy di atas satu TFLite interpreter
+
+Metadata tensor (index, shape, dtype, quantization) dibaca sekali saat session
+dibuat. Input diisi langsung ke buffer interpreter lewat interpreter.tensor()
+dan output dikembalikan sebagai view, tanpa set_tensor/get_tensor copy.
+
+Catatan: TFLite menolak invoke() selama masih ada numpy view ke buffer
+internal, jadi view dari input_view()/run() harus dilepas (del) sebelum
+invoke berikutnya.
+"""
+
+import numpy as np
+
+
+class InferenceSession:
+    """
+    Args:
+        interpreter: tf.lite.Interpreter yang belum/sudah di-allocate
+        input_shape: Shape input yang diinginkan (None = shape bawaan model)
+    """
+
+    def __init__(self, interpreter, input_shape=None):
+        self.interpreter = interpreter
+        input_details = interpreter.get_input_details()[0]
+        self.input_index = input_details["index"]
+        if input_shape is not None and list(input_shape) != list(input_details["shape"]):
+            interpreter.resize_tensor_input(self.input_index, list(input_shape))
+        interpreter.allocate_tensors()
+
+        # Metadata di-cache sekali, tidak dibaca ulang per request
+        input_details = interpreter.get_input_details()[0]
+        output_details = interpreter.get_output_details()[0]
+        self.input_shape = tuple(input_details["shape"])
+        self.input_dtype = np.dtype(input_details["dtype"])
+        self.input_quantization = input_details.get("quantization", (0.0, 0))
+        self.output_index = output_details["index"]
+        self.output_shape = tuple(output_details["shape"])
+        self.output_dtype = np.dtype(output_details["dtype"])
+        self.output_quantization = output_details.get("quantization", (0.0, 0))
+
+        self._input = interpreter.tensor(self.input_index)
+        self._output = interpreter.tensor(self.output_index)
+
+    @property
+    def batch_size(self):
+        return self.input_shape[0]
+
+    def input_view(self):
+        """View numpy ke buffer input interpreter (tulis langsung ke sini)"""
+        return self._input()
+
+    def run(self):
+        """
+        Invoke interpreter dan return view ke buffer output
+
+        View valid sampai invoke berikutnya; copy jika perlu disimpan.
+        """
+        self.interpreter.invoke()
+        return self._output()
@@ -0,0 +1,92 @@
+"""
+Bounded pool untuk resource yang tidak thread-safe (TFLite interpreter)
+Setiap inference yang sedang berjalan meminjam satu item dari pool; jika
+semua item sedang dipakai, thread menunggu dan waktu tunggunya dicatat.
+"""
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class InterpreterPool:
+    """
+    Args:
+        factory: callable() -> item baru (dipanggil `size` kali saat init)
+        size: Jumlah item dalam pool
+        name: Nama pool untuk log
+        warn_wait_ms: Log peringatan jika waktu tunggu melebihi nilai ini
+    """
+
+    def __init__(self, factory, size=1, name="tflite", warn_wait_ms=100):
+        if size < 1:
+            raise ValueError("Pool size minimal 1")
+        self.name = name
+        self.size = size
+        self.warn_wait_ms = warn_wait_ms
+        self.items = [factory() for _ in range(size)]
+        self._queue = queue.LifoQueue()
+        for item in self.items:
+            self._queue.put(item)
+
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _record(self, waited):
+        with self._stats_lock:
+            self.checkouts += 1
+            if waited > 0:
+                self.waits += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """
+        Pinjam satu item dari pool
+
+        Args:
+            timeout: Detik maksimum menunggu (None = tunggu terus)
+
+        Raises:
+            PoolTimeout: jika tidak ada item yang bebas dalam timeout
+        """
+        try:
+            item = self._queue.get_nowait()
+            waited = 0.0
+        except queue.Empty:
+            start = time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                raise PoolTimeout(f"Pool {self.name}: semua {self.size} interpreter sibuk")
+            waited = time.perf_counter() - start
+            if waited * 1000 >= self.warn_wait_ms:
+                print(f"[!] Pool {self.name}: semua {self.size} interpreter sibuk, "
+                      f"menunggu {waited * 1000:.1f} ms")
+        self._record(waited)
+        try:
+            yield item
+        finally:
+            self._queue.put(item)
+
+    def stats(self):
+        """Statistik pemakaian pool"""
+        with self._stats_lock:
+            return {
+                "size": self.size,
+                "available": self._queue.qsize(),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "total_wait_ms": self.total_wait * 1000,
+                "avg_wait_ms": (self.total_wait / self.waits * 1000) if self.waits else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+            }
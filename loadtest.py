@@ -0,0 +1,358 @@
+"""
+Load test HTTP untuk sizing worker/thread gunicorn sebelum site baru go-live
+
+Mengirim traffic campuran ke /presensi-kamera (form base64 data URL),
+/presensi-kamera/frame (JPEG binary) dan /admin/register (multipart) dengan
+laju tetap (open loop: request dijadwalkan setiap 1/RPS detik, tidak menunggu
+response sebelumnya) lalu melaporkan latency p50/p95/p99, error rate dan
+throughput tercapai per langkah RPS.
+
+Dengan --sweep, gunicorn dijalankan sendiri untuk setiap kombinasi
+worker x thread dengan DB_BACKEND=sqlite (stand-in users/absensi, lihat
+sqlite_db.py) sehingga tidak menyentuh MySQL produksi. Langkah RPS dinaikkan
+sampai jenuh: throughput < 90% target, error rate > --max_error_rate atau
+p95 > --slo_ms.
+
+Usage: python loadtest.py --sweep 1x4 2x4 4x2 [--rps 2 5 10 20 40] [--duration 20]
+       [--seed_users 1000] [--mix frame_b64=0.45,frame_binary=0.45,register=0.1]
+       python loadtest.py --url http://127.0.0.1:8000 --rps 5 10   # server sudah jalan
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import cv2
+import numpy as np
+import requests
+
+from benchmark_utils import git_commit, load_face_sources, make_frame, summarize, synthetic_face
+
+REQUEST_KINDS = ("frame_b64", "frame_binary", "register")
+
+
+# ========================
+#  PAYLOAD
+# ========================
+def build_payloads(images_dir, upload_dir, resolution, faces, count=16, seed=0):
+    """
+    Returns:
+        dict dengan list "frames" (JPEG frame kamera) dan "photos" (JPEG foto registrasi)
+    """
+    rng = np.random.default_rng(seed)
+    sources = load_face_sources(images_dir or upload_dir) or [synthetic_face(256, rng) for _ in range(count)]
+    width, height = (int(v) for v in resolution.lower().split("x"))
+    frames = [make_frame(width, height, faces, sources, rng)[0] for _ in range(count)]
+    photos = [cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes() for img in sources]
+    return {"frames": frames, "photos": photos}
+
+
+def parse_mix(text):
+    """'frame_b64=0.45,frame_binary=0.45,register=0.1' -> (kinds, weights)"""
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise SystemExit(f"[!] Jenis request tidak dikenal: {kind} (pilihan: {', '.join(REQUEST_KINDS)})")
+        mix[kind] = float(weight or 1)
+    return list(mix), list(mix.values())
+
+
+class LoadClient:
+    """Satu requests.Session per thread; setiap jenis request membangun payload realistis"""
+
+    def __init__(self, base_url, payloads, model_type, response_mode, cameras, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.payloads = payloads
+        self.model_type = model_type
+        self.response_mode = response_mode
+        self.sessions = [str(uuid.uuid4()) for _ in range(max(1, cameras))]
+        self.timeout = timeout
+        self._local = threading.local()
+        self._b64 = [f"data:image/jpeg;base64,{base64.b64encode(f).decode('ascii')}"
+                     for f in payloads["frames"]]
+
+    def _http(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def send(self, kind, i):
+        """
+        Returns:
+            (outcome, status code): outcome "ok", "app_error" (response error dari
+            aplikasi), "http_error", "timeout" atau "exception"
+        """
+        http = self._http()
+        headers = {"X-Session-Id": self.sessions[i % len(self.sessions)]}
+        try:
+            if kind == "frame_b64":
+                resp = http.post(f"{self.base_url}/presensi-kamera", headers=headers, timeout=self.timeout,
+                                 data={"image_data": self._b64[i % len(self._b64)],
+                                       "model_type": self.model_type, "response_mode": self.response_mode})
+            elif kind == "frame_binary":
+                headers["Content-Type"] = "application/octet-stream"
+                resp = http.post(f"{self.base_url}/presensi-kamera/frame", headers=headers,
+                                 timeout=self.timeout, data=self.payloads["frames"][i % len(self.payloads["frames"])],
+                                 params={"model_type": self.model_type, "response_mode": self.response_mode})
+            else:
+                photo = self.payloads["photos"][i % len(self.payloads["photos"])]
+                resp = http.post(f"{self.base_url}/admin/register", timeout=self.timeout,
+                                 data={"name": f"loadtest {uuid.uuid4().hex[:12]}", "model_type": self.model_type},
+                                 files={"photo": ("photo.jpg", photo, "image/jpeg")})
+        except requests.Timeout:
+            return "timeout", None
+        except requests.RequestException:
+            return "exception", None
+
+        if resp.status_code >= 400:
+            return "http_error", resp.status_code
+        if kind == "register":
+            return ("app_error" if resp.text.lstrip().startswith("Error") else "ok"), resp.status_code
+        try:
+            message = resp.json().get("message") or ""
+        except ValueError:
+            return "http_error", resp.status_code
+        return ("app_error" if message.startswith("Error") else "ok"), resp.status_code
+
+
+# ========================
+#  OPEN-LOOP LOAD
+# ========================
+def run_step(client, rps, duration, kinds, weights, concurrency, seed=0):
+    """
+    Kirim request dengan laju `rps` selama `duration` detik
+
+    Request dijadwalkan pada t0 + i/rps tanpa menunggu response sebelumnya;
+    jika semua slot client sibuk, request tetap diantre dan keterlambatan
+    mulai kirim dicatat sebagai schedule_lag (tanda server tidak mengimbangi).
+    """
+    rnd = random.Random(seed)
+    total = max(1, int(rps * duration))
+    plan = [rnd.choices(kinds, weights)[0] for _ in range(total)]
+    records = []
+    lock = threading.Lock()
+
+    def fire(i, kind, scheduled):
+        started = time.perf_counter()
+        outcome, status = client.send(kind, i)
+        finished = time.perf_counter()
+        with lock:
+            records.append((kind, outcome, status, started - scheduled, finished - started, finished))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i, kind in enumerate(plan):
+            scheduled = t0 + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, i, kind, scheduled)
+    elapsed = max(r[5] for r in records) - t0
+
+    def report(subset):
+        latencies = [r[4] for r in subset]
+        errors = {}
+        for r in subset:
+            if r[1] != "ok":
+                errors[r[1]] = errors.get(r[1], 0) + 1
+        app_errors = errors.get("app_error", 0)
+        return {
+            "requests": len(subset),
+            # Error transport/HTTP (kapasitas); app_error mis. wajah tidak terdeteksi dihitung terpisah
+            "error_rate": (sum(errors.values()) - app_errors) / len(subset),
+            "app_error_rate": app_errors / len(subset),
+            "errors": errors,
+            "latency": summarize(latencies),
+            "schedule_lag": summarize([r[3] for r in subset]),
+        }
+
+    result = {"target_rps": rps, "achieved_rps": len(records) / elapsed, "elapsed_s": elapsed}
+    result.update(report(records))
+    result["by_kind"] = {kind: report([r for r in records if r[0] == kind])
+                         for kind in kinds if any(r[0] == kind for r in records)}
+    return result
+
+
+def is_saturated(step, max_error_rate, slo_ms):
+    return (step["achieved_rps"] < 0.9 * step["target_rps"]
+            or step["error_rate"] > max_error_rate
+            or step["latency"]["p95_ms"] > slo_ms)
+
+
+def run_ladder(client, args, kinds, weights, label):
+    """Naikkan RPS sampai jenuh; return (list hasil langkah, RPS tertinggi yang masih sehat)"""
+    steps = []
+    sustained = None
+    for rps in args.rps:
+        step = run_step(client, rps, args.duration, kinds, weights, args.concurrency, seed=args.seed)
+        step["saturated"] = is_saturated(step, args.max_error_rate, args.slo_ms)
+        steps.append(step)
+        lat = step["latency"]
+        print(f"{label:>8} {rps:>7.1f} {step['achieved_rps']:>9.1f} {lat['p50_ms']:>9.1f} "
+              f"{lat['p95_ms']:>9.1f} {lat['p99_ms']:>9.1f} {step['error_rate'] * 100:>7.2f}% "
+              f"{step['schedule_lag']['p95_ms']:>9.1f}  {'JENUH' if step['saturated'] else ''}")
+        if step["saturated"]:
+            break
+        sustained = rps
+    return steps, sustained
+
+
+# ========================
+#  GUNICORN + SQLITE
+# ========================
+def start_server(workers, threads, port, env, ready_timeout):
+    cmd = [sys.executable, "-m", "gunicorn", "-w", str(workers), "-k", "gthread", "--threads", str(threads),
+           "-b", f"127.0.0.1:{port}", "--timeout", "120", "app:app"]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn berhenti saat startup (exit {proc.returncode})")
+        try:
+            if requests.get(f"{url}/metrics", timeout=2).status_code == 200:
+                return proc, url
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    stop_server(proc)
+    raise RuntimeError(f"gunicorn tidak siap dalam {ready_timeout} detik")
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+def warmup(client, kinds, count=4):
+    """Beberapa request agar gallery ter-load dan model hangat di setiap worker"""
+    for i in range(count):
+        client.send("frame_binary" if "frame_binary" in kinds else kinds[0], i)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test HTTP presensi dengan SQLite stand-in")
+    parser.add_argument("--url", type=str, default=None,
+                        help="Server yang sudah jalan (tanpa --sweep)")
+    parser.add_argument("--sweep", nargs="+", default=None,
+                        help="Kombinasi WORKERxTHREADS gunicorn yang dijalankan sendiri, mis. 1x4 2x4")
+    parser.add_argument("--rps", type=float, nargs="+", default=[2, 5, 10, 20, 40],
+                        help="Langkah target request/detik (default: 2 5 10 20 40)")
+    parser.add_argument("--duration", type=float, default=20,
+                        help="Detik per langkah RPS (default: 20)")
+    parser.add_argument("--mix", type=str, default="frame_b64=0.45,frame_binary=0.45,register=0.1",
+                        help="Proporsi jenis request (default: frame_b64=0.45,frame_binary=0.45,register=0.1)")
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="Request in-flight maksimum di sisi client (default: 64)")
+    parser.add_argument("--cameras", type=int, default=4,
+                        help="Jumlah sesi kamera (X-Session-Id) yang disimulasikan (default: 4)")
+    parser.add_argument("--resolution", type=str, default="640x480",
+                        help="Resolusi frame WxH (default: 640x480)")
+    parser.add_argument("--faces", type=int, default=1,
+                        help="Wajah per frame (default: 1)")
+    parser.add_argument("--images", type=str, default=None,
+                        help="Folder foto wajah untuk payload (default: static/uploads, lalu sintetis)")
+    parser.add_argument("--model_type", choices=["tflite_fp16"], default="tflite_fp16",
+                        help="Model yang diminta (default: tflite_fp16)")
+    parser.add_argument("--response_mode", choices=["coords", "preview", "image"], default="coords",
+                        help="Mode response frame (default: coords)")
+    parser.add_argument("--timeout", type=float, default=30,
+                        help="Timeout per request dalam detik (default: 30)")
+    parser.add_argument("--slo_ms", type=float, default=1000,
+                        help="Batas p95 latency sebelum dianggap jenuh (default: 1000)")
+    parser.add_argument("--max_error_rate", type=float, default=0.01,
+                        help="Batas error rate sebelum dianggap jenuh (default: 0.01)")
+    parser.add_argument("--seed_users", type=int, default=1000,
+                        help="User acak di database SQLite untuk --sweep (default: 1000)")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="Port gunicorn untuk --sweep (default: 8765)")
+    parser.add_argument("--ready_timeout", type=float, default=180,
+                        help="Detik menunggu gunicorn siap (default: 180)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default="loadtest.json",
+                        help="File hasil JSON (default: loadtest.json)")
+    args = parser.parse_args()
+
+    if not args.url and not args.sweep:
+        parser.error("pilih --url atau --sweep")
+    kinds, weights = parse_mix(args.mix)
+    payloads = build_payloads(args.images, "static/uploads", args.resolution, args.faces, seed=args.seed)
+
+    print(f"{'config':>8} {'target':>7} {'achieved':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'errors':>8} {'lag p95':>9}")
+    print("-" * 80)
+
+    runs = []
+    if args.url:
+        client = LoadClient(args.url, payloads, args.model_type, args.response_mode, args.cameras, args.timeout)
+        warmup(client, kinds)
+        steps, sustained = run_ladder(client, args, kinds, weights, "remote")
+        runs.append({"url": args.url, "steps": steps, "max_sustained_rps": sustained})
+    else:
+        from sqlite_db import seed_users
+
+        workdir = tempfile.mkdtemp(prefix="presensi_loadtest_")
+        db_path = os.path.join(workdir, "presensi.db")
+        if args.seed_users:
+            seed_users(db_path, args.seed_users)
+        env = dict(os.environ, DB_BACKEND="sqlite", SQLITE_PATH=db_path,
+                   UPLOAD_FOLDER=os.path.join(workdir, "uploads"))
+        try:
+            for combo in args.sweep:
+                workers, threads = (int(v) for v in combo.lower().split("x"))
+                proc, url = start_server(workers, threads, args.port, env, args.ready_timeout)
+                try:
+                    client = LoadClient(url, payloads, args.model_type, args.response_mode,
+                                        args.cameras, args.timeout)
+                    warmup(client, kinds, count=2 * workers)
+                    steps, sustained = run_ladder(client, args, kinds, weights, combo)
+                finally:
+                    stop_server(proc)
+                runs.append({"workers": workers, "threads": threads, "steps": steps,
+                             "max_sustained_rps": sustained})
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n" + "=" * 60)
+    print("SATURATION SUMMARY")
+    print("=" * 60)
+    for run in runs:
+        label = run.get("url") or f"{run['workers']} worker x {run['threads']} thread"
+        sustained = run["max_sustained_rps"]
+        print(f"{label:<30} {'-' if sustained is None else f'{sustained:g}'} RPS sebelum jenuh")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {"mix": dict(zip(kinds, weights)), "duration_s": args.duration,
+                   "resolution": args.resolution, "faces": args.faces, "model_type": args.model_type,
+                   "response_mode": args.response_mode, "cameras": args.cameras,
+                   "seed_users": args.seed_users if args.sweep else None,
+                   "slo_ms": args.slo_ms, "max_error_rate": args.max_error_rate},
+        "runs": runs,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n[+] Hasil ditulis ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Metrics ringan untuk pipeline presensi (format teks Prometheus)
+
+- Histogram/Counter dengan label, thread-safe, tanpa dependency tambahan
+- span(stage): context manager yang mencatat durasi ke histogram
+  presensi_stage_seconds dan ke daftar timing request berjalan (contextvar),
+  dipakai untuk header Server-Timing
+- Collector: callable yang mengembalikan sampel gauge/counter saat /metrics
+  di-scrape (mis. stats() dari pool dan writer)
+
+Metrics disimpan per proses; dengan beberapa worker gunicorn setiap scrape
+hanya melihat worker yang melayani request /metrics.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(k, "")) for k in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(c), s, n)) for key, (c, s, n) in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect):
+        """
+        Args:
+            collect: callable() -> iterable (name, type, help, [(labels dict, value)])
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                families = list(collect())
+            except Exception as e:
+                lines.append(f"# collector error: {e}")
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    labelnames = tuple(labels)
+                    lines.append(f"{name}{_format_labels(labelnames, [labels[k] for k in labelnames])} "
+                                 f"{_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram(
+    "presensi_stage_seconds", "Durasi per tahap pipeline presensi", ("stage",))
+request_seconds = registry.histogram(
+    "presensi_request_seconds", "Durasi total request presensi", ("endpoint",))
+faces_per_request = registry.histogram(
+    "presensi_faces_per_request", "Jumlah wajah terdeteksi per frame",
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16))
+recognitions = registry.counter(
+    "presensi_recognitions_total", "Hasil pengenalan per wajah", ("outcome", "source"))
+errors = registry.counter(
+    "presensi_errors_total", "Request yang gagal dengan exception", ("endpoint",))
+
+
+# ========================
+#  TIMING SPAN
+# ========================
+def start_request():
+    """Mulai daftar timing untuk request ini (untuk Server-Timing)"""
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+
+def request_timings():
+    return _request_timings.get() or []
+
+
+@contextmanager
+def span(stage):
+    """Catat durasi blok ke histogram stage dan ke timing request berjalan"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def server_timing_header(timings):
+    """Format list (stage, detik) sebagai header Server-Timing"""
+    merged = {}
+    for stage, elapsed in timings:
+        merged[stage] = merged.get(stage, 0.0) + elapsed
+    return ", ".join(f"{stage};dur={elapsed * 1000:.2f}" for stage, elapsed in merged.items())
+
+
+def stats_collector(prefix, get_stats, labels=None, counters=()):
+    """
+    Collector dari dict stats() (mis. DatabasePool.stats): setiap nilai
+    numerik menjadi gauge <prefix>_<key>, kecuali key di counters (total yang
+    hanya naik) yang menjadi counter <prefix>_<key>_total
+    """
+    labels = labels or {}
+    counters = frozenset(counters)
+
+    def collect():
+        for key, value in get_stats().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in counters:
+                yield f"{prefix}_{key}_total", "counter", f"{prefix} {key}", [(labels, value)]
+            else:
+                yield f"{prefix}_{key}", "gauge", f"{prefix} {key}", [(labels, value)]
+    return collect
@@ -0,0 +1,113 @@
+"""
+Migrasi kolom users.embedding dari base64 pickle ke format binary (embedding_codec)
+Row diproses per batch berdasarkan id, row yang sudah binary dilewati,
+sehingga script aman dijalankan ulang.
+
+Usage: python migrate_embeddings.py [--batch_size 500] [--dtype float32] [--model_id tflite_fp16] [--dry_run]
+"""
+
+import argparse
+import sys
+
+import mysql.connector
+
+from config import DB_CONFIG
+from embedding_codec import decode_legacy, encode_embedding, is_binary, DTYPE_CODES, LEGACY_MODEL_ID
+
+
+def migrate_embeddings(batch_size=500, dtype="float32", model_id=LEGACY_MODEL_ID, dry_run=False):
+    """
+    Rewrite semua row lama ke format binary
+
+    Args:
+        batch_size: Jumlah row per SELECT/UPDATE batch
+        dtype: Tipe data penyimpanan ("float32" atau "float16")
+        model_id: Tag model untuk row lama (format lama tidak menyimpan info model)
+        dry_run: Hanya hitung, tanpa UPDATE
+
+    Returns:
+        dict statistik migrasi
+    """
+    db = mysql.connector.connect(**DB_CONFIG)
+    stats = {"scanned": 0, "migrated": 0, "skipped": 0, "failed": 0,
+             "bytes_before": 0, "bytes_after": 0}
+    last_id = 0
+
+    try:
+        while True:
+            cursor = db.cursor()
+            cursor.execute(
+                "SELECT id, embedding FROM users WHERE id > %s ORDER BY id LIMIT %s",
+                (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+            if not rows:
+                break
+
+            updates = []
+            for user_id, blob in rows:
+                stats["scanned"] += 1
+                last_id = user_id
+                if blob is None or is_binary(blob):
+                    stats["skipped"] += 1
+                    continue
+                try:
+                    new_blob = encode_embedding(decode_legacy(blob), model_id=model_id, dtype=dtype)
+                except Exception as e:
+                    print(f"[!] User {user_id}: gagal decode embedding lama: {e}")
+                    stats["failed"] += 1
+                    continue
+                stats["bytes_before"] += len(blob)
+                stats["bytes_after"] += len(new_blob)
+                updates.append((new_blob, user_id))
+
+            if updates and not dry_run:
+                cursor = db.cursor()
+                cursor.executemany("UPDATE users SET embedding = %s WHERE id = %s", updates)
+                db.commit()
+                cursor.close()
+            stats["migrated"] += len(updates)
+            print(f"[*] Batch sampai id {last_id}: {len(updates)} row dimigrasi")
+    finally:
+        db.close()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migrasi users.embedding ke format binary"
+    )
+    parser.add_argument("--batch_size", type=int, default=500,
+                        help="Jumlah row per batch (default: 500)")
+    parser.add_argument("--dtype", choices=sorted(DTYPE_CODES), default="float32",
+                        help="Tipe data penyimpanan (default: float32)")
+    parser.add_argument("--model_id", type=str, default=LEGACY_MODEL_ID,
+                        help="Tag model untuk row lama (default: tflite_fp16)")
+    parser.add_argument("--dry_run", action="store_true",
+                        help="Hanya tampilkan statistik, tanpa UPDATE")
+    args = parser.parse_args()
+
+    try:
+        stats = migrate_embeddings(args.batch_size, args.dtype, args.model_id, args.dry_run)
+    except mysql.connector.Error as e:
+        print(f"[!] Database error: {e}")
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print("MIGRATION SUMMARY" + (" (DRY RUN)" if args.dry_run else ""))
+    print("=" * 60)
+    print(f"Scanned:  {stats['scanned']}")
+    print(f"Migrated: {stats['migrated']}")
+    print(f"Skipped:  {stats['skipped']} (sudah binary / kosong)")
+    print(f"Failed:   {stats['failed']}")
+    if stats["bytes_before"]:
+        print(f"Size:     {stats['bytes_before']} -> {stats['bytes_after']} bytes "
+              f"({stats['bytes_after'] / stats['bytes_before'] * 100:.1f}%)")
+    print("=" * 60)
+    sys.exit(1 if stats["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
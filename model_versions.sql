@@ -0,0 +1,46 @@
+-- Embedding per versi model untuk re-embedding saat ganti model ArcFace
+-- Jalankan sekali (setelah gallery_sync.sql): mysql -u root -p presensi < model_versions.sql
+-- Trigger memakai prosedur gallery_log_change dari gallery_sync.sql
+--
+-- users.embedding tetap berisi embedding saat registrasi (tag model ada di
+-- header FEMB). reembed.py menulis embedding versi baru ke user_embeddings;
+-- worker memakai baris dengan model_version = EMBEDDING_MODEL_VERSION.
+
+CREATE TABLE IF NOT EXISTS `user_embeddings` (
+  `user_id` int NOT NULL,
+  `model_version` varchar(64) NOT NULL,
+  `embedding` longblob NOT NULL,
+  `created_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`user_id`, `model_version`),
+  KEY `idx_user_embeddings_version` (`model_version`),
+  CONSTRAINT `fk_user_embeddings_user` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+DROP TRIGGER IF EXISTS `user_embeddings_gallery_insert`;
+DROP TRIGGER IF EXISTS `user_embeddings_gallery_update`;
+DROP TRIGGER IF EXISTS `user_embeddings_gallery_delete`;
+
+DELIMITER $$
+
+CREATE TRIGGER `user_embeddings_gallery_insert` AFTER INSERT ON `user_embeddings`
+FOR EACH ROW
+BEGIN
+  CALL `gallery_log_change`(NEW.user_id, 'upsert');
+END$$
+
+CREATE TRIGGER `user_embeddings_gallery_update` AFTER UPDATE ON `user_embeddings`
+FOR EACH ROW
+BEGIN
+  IF NOT (OLD.embedding <=> NEW.embedding) THEN
+    CALL `gallery_log_change`(NEW.user_id, 'upsert');
+  END IF;
+END$$
+
+-- ON DELETE CASCADE tidak menjalankan trigger; delete user sudah dicatat trigger users
+CREATE TRIGGER `user_embeddings_gallery_delete` AFTER DELETE ON `user_embeddings`
+FOR EACH ROW
+BEGIN
+  CALL `gallery_log_change`(OLD.user_id, 'upsert');
+END$$
+
+DELIMITER ;
@@ -0,0 +1,323 @@
+"""
+Pipeline pengenalan wajah per frame (dipakai recognize_frame di app.py)
+
+    decode -> detect -> (track) -> crop_decode -> embed -> match -> attendance -> encode
+
+Semua dependency (detector, fungsi embedding, gallery, cooldown, writer,
+tracker) diberikan lewat constructor, sehingga pipeline yang sama bisa
+dijalankan tanpa TensorFlow/MySQL (lihat benchmark_pipeline.py). Durasi setiap
+tahap dicatat lewat metrics.span.
+"""
+
+import base64
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+import metrics
+from frame_pipeline import decode_for_detection
+
+RECOGNITION_THRESHOLD = 0.40
+
+
+def draw_bounding_boxes(img, face_coords, face_info=None, color=(0, 255, 0), thickness=2):
+    """
+    Draw bounding boxes pada gambar dengan label berdasarkan face_info
+
+    Args:
+        img: OpenCV image
+        face_coords: List of (x, y, w, h) tuples
+        face_info: List of dicts dengan info masing-masing face (opsional)
+        color: RGB color tuple
+        thickness: Line thickness
+
+    Returns:
+        Image dengan bounding boxes
+    """
+    img_copy = img.copy()
+
+    for idx, (x, y, w, h) in enumerate(face_coords):
+        # Draw rectangle
+        cv2.rectangle(img_copy, (x, y), (x + w, y + h), color, thickness)
+
+        # Draw filled rectangle untuk background text
+        label_height = 25
+        cv2.rectangle(img_copy, (x, y - label_height), (x + 150, y), color, -1)
+
+        # Buat label berdasarkan face_info atau hanya nomor urut
+        if face_info and idx < len(face_info):
+            label = f"Face {idx + 1}: {face_info[idx].get('name', '?')}"
+        else:
+            label = f"Face {idx + 1}"
+
+        # Put text
+        cv2.putText(img_copy, label, (x + 5, y - 8),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    return img_copy
+
+
+def render_annotated_image(img, face_coords, face_info, response_mode="image",
+                           preview_max_side=320, preview_quality=60):
+    """
+    Render gambar beranotasi sebagai data URL JPEG sesuai response_mode
+
+    Returns:
+        data URL string, atau None untuk mode "coords"
+    """
+    if response_mode == "coords":
+        return None
+
+    quality = 95
+    if response_mode == "preview":
+        # Perkecil sebelum anotasi agar resize dan encode lebih murah
+        scale = min(1.0, preview_max_side / max(img.shape[:2]))
+        if scale < 1.0:
+            img = cv2.resize(img, (int(img.shape[1] * scale), int(img.shape[0] * scale)),
+                             interpolation=cv2.INTER_AREA)
+            face_coords = [(int(x * scale), int(y * scale), int(w * scale), int(h * scale))
+                           for (x, y, w, h) in face_coords]
+        quality = preview_quality
+
+    # Draw bounding boxes dengan info dari hasil recognition
+    img_with_bbox = draw_bounding_boxes(img, face_coords, face_info=face_info, color=(0, 255, 0), thickness=3)
+
+    # Convert back to base64
+    _, buffer = cv2.imencode('.jpg', img_with_bbox, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return f"data:image/jpeg;base64,{base64.b64encode(buffer).decode('utf-8')}"
+
+
+class RecognitionPipeline:
+    """
+    Args:
+        detector: Objek dengan detect(img) -> list (x, y, w, h, score)
+            (mis. FaceDetectorEngine)
+        extract_embeddings: callable(img, face_coords, model_type) -> list
+            embedding (None untuk wajah yang gagal)
+        gallery: EmbeddingGallery (dipakai untuk cek versi model)
+        cooldown: AttendanceCooldown
+        writer: AttendanceWriter
+        sync_gallery: callable() -> EmbeddingGallery yang sudah tersinkron;
+            default mengembalikan gallery apa adanya
+        model_version: callable(model_type) -> tag versi embedding query;
+            default model_type itu sendiri
+        tracker: FaceTracker (opsional)
+        detect_max_side: Sisi terpanjang gambar deteksi
+        preview_max_side, preview_quality: Ukuran dan kualitas JPEG mode "preview"
+    """
+
+    def __init__(self, detector, extract_embeddings, gallery, cooldown, writer, sync_gallery=None,
+                 model_version=None, tracker=None, detect_max_side=640, preview_max_side=320,
+                 preview_quality=60):
+        self.detector = detector
+        self.extract_embeddings = extract_embeddings
+        self.gallery = gallery
+        self.cooldown = cooldown
+        self.writer = writer
+        self.sync_gallery = sync_gallery or (lambda: gallery)
+        self.model_version = model_version or (lambda model_type: model_type)
+        self.tracker = tracker
+        self.detect_max_side = detect_max_side
+        self.preview_max_side = preview_max_side
+        self.preview_quality = preview_quality
+
+    def detect(self, img):
+        """
+        Detect face dan return koordinat bounding box
+
+        Returns:
+            List of (x, y, w, h) tuples
+        """
+        try:
+            return [(x, y, w, h) for (x, y, w, h, _) in self.detector.detect(img)]
+        except Exception as e:
+            print(f"[!] Face detection error: {e}")
+            return []
+
+    def recognize(self, img_bytes, model_type="tflite_fp16", response_mode="image", session_id=None):
+        """
+        Decode -> detect -> embed -> match -> catat absensi untuk satu frame
+
+        Args:
+            img_bytes: bytes / buffer uint8 berisi file JPEG/PNG
+            model_type: tflite_fp16 (model lain tidak punya embedding)
+            response_mode: "image" (gambar beranotasi penuh), "preview" (gambar
+                beranotasi diperkecil, kualitas JPEG lebih rendah) atau "coords"
+                (hanya koordinat box, anotasi digambar di client)
+            session_id: ID sesi kamera client; jika ada, wajah yang sudah dikenali
+                pada track yang stabil tidak di-embed ulang setiap frame
+
+        Returns:
+            dict response JSON
+        """
+        # Decode pada resolusi tereduksi dan deteksi di gambar kecil
+        with metrics.span("decode"):
+            frame = decode_for_detection(img_bytes, self.detect_max_side)
+        if frame is None:
+            return {"status": False, "message": "Gambar tidak valid!", "results": []}
+
+        with metrics.span("detect"):
+            detect_coords = self.detect(frame.detect_img)
+        metrics.faces_per_request.observe(len(detect_coords))
+
+        if not detect_coords:
+            return {
+                "status": False,
+                "message": "Wajah tidak terdeteksi!",
+                "image_with_bbox": None,
+                "results": []
+            }
+
+        # Tracking per sesi: hanya wajah baru / yang perlu diverifikasi ulang di-embed
+        tracks = None
+        if session_id and self.tracker is not None:
+            with metrics.span("track"):
+                tracks = self.tracker.update(session_id, frame.to_original(detect_coords, source="detect"),
+                                             model_type)
+        verify_idx = [i for i in range(len(detect_coords)) if tracks is None or tracks[i].needs_verify]
+
+        # Box dipetakan ke gambar dengan resolusi cukup untuk input 112x112
+        with metrics.span("crop_decode"):
+            frame.prepare_crops([detect_coords[i] for i in verify_idx])
+            face_coords = frame.to_crop(detect_coords)
+        img = frame.crop_img
+
+        # Identitas dari track yang stabil dipakai ulang tanpa embedding
+        matches = {}
+        if tracks is not None:
+            for i, track in enumerate(tracks):
+                if not track.needs_verify:
+                    matches[i] = (track.user_id, track.name, track.score)
+
+        # Embedding query hanya dibandingkan dengan gallery dari versi model yang sama
+        query_version = self.model_version(model_type)
+        version_mismatch = not self.gallery.accepts(query_version)
+        if version_mismatch:
+            verify_idx = []
+
+        if verify_idx:
+            # Gallery embedding users di-cache di memory, sync incremental antar worker
+            with metrics.span("gallery"):
+                gallery = self.sync_gallery()
+
+            # Extract embedding untuk setiap wajah yang perlu diverifikasi
+            with metrics.span("embed"):
+                embeddings = self.extract_embeddings(img, [face_coords[i] for i in verify_idx], model_type)
+            valid_idx = [i for i, e in zip(verify_idx, embeddings) if e is not None and len(e) > 0]
+            valid_embeddings = [e for e in embeddings if e is not None and len(e) > 0]
+
+            # Matching semua wajah sekaligus: satu matrix multiply + argmax
+            if valid_idx:
+                with metrics.span("match"):
+                    user_ids, user_names, scores = gallery.match(
+                        np.vstack([np.asarray(e, dtype=np.float32).ravel() for e in valid_embeddings])
+                    )
+                for i, uid, uname, score in zip(valid_idx, user_ids, user_names, scores):
+                    matches[i] = (int(uid), uname, float(score))
+
+            if tracks is not None:
+                for i in verify_idx:
+                    uid, uname, score = matches.get(i, (-1, None, 0.0))
+                    self.tracker.verified(tracks[i], uid, uname, score, model_type,
+                                          recognized=uid >= 0 and score >= RECOGNITION_THRESHOLD)
+
+        # Process setiap wajah yang terdeteksi
+        face_results = []
+        attendance_ids = []
+        checked_in = []
+        recognized_at = datetime.now()
+
+        for idx in range(len(face_coords)):
+            source = "tracked" if tracks is not None and not tracks[idx].needs_verify else "embedded"
+            if idx not in matches:
+                metrics.recognitions.inc(outcome="model_mismatch" if version_mismatch else "no_embedding",
+                                         source=source)
+                face_results.append({
+                    "face_num": idx + 1,
+                    "status": False,
+                    "message": (f"Model {query_version} tidak sesuai gallery ({self.gallery.model_version})"
+                                if version_mismatch else "Wajah tidak terdeteksi!"),
+                    "name": "Unknown",
+                    "score": 0.0
+                })
+                continue
+
+            best_user_id, best_name, best_score = matches[idx]
+
+            # Cek threshold recognition
+            if best_user_id < 0 or best_score < RECOGNITION_THRESHOLD:
+                metrics.recognitions.inc(outcome="unknown", source=source)
+                face_results.append({
+                    "face_num": idx + 1,
+                    "status": False,
+                    "message": "Wajah tidak dikenali!",
+                    "name": "Unknown",
+                    "score": float(best_score)
+                })
+            else:
+                # Catat absensi jika score bagus dan user tidak dalam cooldown
+                allowed, last_checkin = self.cooldown.check_in(int(best_user_id), recognized_at)
+                metrics.recognitions.inc(outcome="recognized" if allowed else "already_checked_in",
+                                         source=source)
+                if allowed:
+                    attendance_ids.append(best_user_id)
+                    checked_in.append((int(best_user_id), last_checkin))
+                    face_results.append({
+                        "face_num": idx + 1,
+                        "status": True,
+                        "message": f"Presensi Berhasil",
+                        "name": best_name,
+                        "score": float(best_score)
+                    })
+                else:
+                    face_results.append({
+                        "face_num": idx + 1,
+                        "status": True,
+                        "message": f"Sudah presensi pukul {last_checkin.strftime('%H:%M:%S')}",
+                        "name": best_name,
+                        "score": float(best_score),
+                        "already_checked_in": True,
+                        "last_checkin": last_checkin.isoformat()
+                    })
+
+        if tracks is not None:
+            for result, track in zip(face_results, tracks):
+                result["track_id"] = track.track_id
+                result["tracked"] = not track.needs_verify
+
+        # Write-behind: timestamp diambil saat pengenalan, INSERT di-batch di background
+        with metrics.span("attendance"):
+            try:
+                self.writer.record_many(attendance_ids, recognized_at)
+            except Exception:
+                # Absensi tidak tersimpan: jangan tahan user di cooldown
+                for user_id, previous in checked_in:
+                    self.cooldown.rollback(user_id, recognized_at, previous)
+                raise
+
+        # Koordinat box dalam resolusi gambar yang dikirim client
+        for result, (x, y, w, h) in zip(face_results, frame.to_original(face_coords)):
+            result["box"] = {"x": x, "y": y, "w": w, "h": h}
+
+        with metrics.span("encode"):
+            image_with_bbox = render_annotated_image(img, face_coords, face_results, response_mode,
+                                                     self.preview_max_side, self.preview_quality)
+
+        # Cek apakah ada yang berhasil presensi
+        success_count = sum(1 for r in face_results if r["status"])
+
+        if success_count > 0:
+            message = f"Presensi Berhasil: {success_count} dari {len(face_results)} wajah"
+        else:
+            message = f"Tidak ada wajah yang dikenali ({len(face_results)} wajah terdeteksi)"
+
+        return {
+            "status": success_count > 0,
+            "message": message,
+            "image_with_bbox": image_with_bbox,
+            "image_size": {"w": frame.original_size[0], "h": frame.original_size[1]},
+            "model": model_type,
+            "results": face_results,
+            "total_faces": len(face_results)
+        }
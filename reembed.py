@@ -0,0 +1,161 @@
+"""
+Re-embedding semua user untuk versi model baru
+
+Foto registrasi di static/uploads di-embed ulang dengan model baru secara
+paralel (process pool, batched inference) dan ditulis ke tabel
+user_embeddings (lihat model_versions.sql) di samping embedding lama.
+Worker tetap memakai versi lama sampai EMBEDDING_MODEL_VERSION dan
+ARCFACE_MODEL_PATH diganti, sehingga perpindahan model atomic.
+
+Job bisa dijalankan ulang: user yang sudah punya embedding versi target
+dilewati, dan setiap batch di-commit sendiri.
+
+Usage: python reembed.py --model_path models/arcface_fp32.tflite --model_version tflite_fp32
+       [--batch_size 256] [--workers 2] [--chunk_size 16] [--dtype float32] [--dry_run]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+
+import mysql.connector
+
+from bulk_enroll import embed_chunk, init_embed_worker
+from config import DB_CONFIG
+from embedding_codec import encode_embedding, embedding_model_id, DTYPE_CODES
+
+PENDING_SQL = (
+    "SELECT u.id, u.name, u.photo, u.embedding FROM users u "
+    "WHERE u.id > %s AND NOT EXISTS ("
+    "  SELECT 1 FROM user_embeddings e WHERE e.user_id = u.id AND e.model_version = %s"
+    ") ORDER BY u.id LIMIT %s"
+)
+UPSERT_SQL = (
+    "INSERT INTO user_embeddings (user_id, model_version, embedding) VALUES (%s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE embedding = VALUES(embedding)"
+)
+
+
+def _read_photo(upload_dir, photo):
+    path = os.path.join(upload_dir, photo or "")
+    if not photo or not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def reembed(model_path, model_version, upload_dir="static/uploads", batch_size=256,
+            workers=2, chunk_size=16, dtype="float32", dry_run=False):
+    """
+    Tulis embedding versi model_version untuk semua user yang belum punya
+
+    Returns:
+        dict statistik
+    """
+    db = mysql.connector.connect(**DB_CONFIG)
+    stats = {"scanned": 0, "embedded": 0, "skipped": 0, "failed": 0, "failures": []}
+    last_id = 0
+
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with ctx.Pool(processes=max(1, workers), initializer=init_embed_worker,
+                      initargs=(model_path, 1)) as pool:
+            while True:
+                cursor = db.cursor()
+                cursor.execute(PENDING_SQL, (last_id, model_version, batch_size))
+                rows = cursor.fetchall()
+                cursor.close()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                stats["scanned"] += len(rows)
+
+                values = []
+                items = []
+                for user_id, name, photo, blob in rows:
+                    if blob is not None and embedding_model_id(blob) == model_version:
+                        # users.embedding sudah versi target (registrasi setelah ganti model)
+                        values.append((user_id, model_version, blob))
+                        stats["skipped"] += 1
+                        continue
+                    data = _read_photo(upload_dir, photo)
+                    if data is None:
+                        stats["failed"] += 1
+                        stats["failures"].append({"id": user_id, "name": name, "error": "Foto tidak ditemukan"})
+                        continue
+                    items.append((user_id, name, data))
+
+                names = {user_id: name for user_id, name, _ in items}
+                chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+                for results in pool.imap_unordered(embed_chunk, chunks):
+                    for user_id, emb, error in results:
+                        if emb is None:
+                            stats["failed"] += 1
+                            stats["failures"].append({"id": user_id, "name": names[user_id], "error": error})
+                            continue
+                        values.append((user_id, model_version,
+                                       encode_embedding(emb, model_id=model_version, dtype=dtype)))
+                        stats["embedded"] += 1
+
+                if values and not dry_run:
+                    cursor = db.cursor()
+                    cursor.executemany(UPSERT_SQL, values)
+                    db.commit()
+                    cursor.close()
+                print(f"[*] Batch sampai id {last_id}: {len(values)} embedding ditulis, "
+                      f"{stats['failed']} gagal total")
+    finally:
+        db.close()
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-embed foto users ke versi model baru (tabel user_embeddings)"
+    )
+    parser.add_argument("--model_path", type=str, required=True,
+                        help="Model ArcFace TFLite baru")
+    parser.add_argument("--model_version", type=str, required=True,
+                        help="Tag versi model baru (nilai EMBEDDING_MODEL_VERSION nanti)")
+    parser.add_argument("--upload_dir", type=str, default="static/uploads",
+                        help="Folder foto registrasi (default: static/uploads)")
+    parser.add_argument("--batch_size", type=int, default=256,
+                        help="User per SELECT/commit (default: 256)")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="Jumlah process (default: 2)")
+    parser.add_argument("--chunk_size", type=int, default=16,
+                        help="Foto per batched inference (default: 16)")
+    parser.add_argument("--dtype", choices=sorted(DTYPE_CODES), default="float32",
+                        help="Tipe data penyimpanan (default: float32)")
+    parser.add_argument("--dry_run", action="store_true",
+                        help="Embed tanpa menulis ke database")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model_path):
+        print(f"[!] Model tidak ditemukan: {args.model_path}")
+        sys.exit(1)
+
+    try:
+        stats = reembed(args.model_path, args.model_version, args.upload_dir, args.batch_size,
+                        args.workers, args.chunk_size, args.dtype, args.dry_run)
+    except mysql.connector.Error as e:
+        print(f"[!] Database error: {e}")
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print(f"RE-EMBED SUMMARY -> {args.model_version}" + (" (DRY RUN)" if args.dry_run else ""))
+    print("=" * 60)
+    print(f"Scanned:  {stats['scanned']}")
+    print(f"Embedded: {stats['embedded']}")
+    print(f"Skipped:  {stats['skipped']} (users.embedding sudah versi target)")
+    print(f"Failed:   {stats['failed']}")
+    for failure in stats["failures"]:
+        print(f"  - #{failure['id']} {failure['name']}: {failure['error']}")
+    print("=" * 60)
+    sys.exit(1 if stats["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Stand-in SQLite untuk tabel users/absensi (load test dan development lokal)
+
+connect(**config) meniru subset mysql.connector yang dipakai aplikasi:
+placeholder %s, cursor(dictionary=True), lastrowid, ping/commit/rollback,
+dan kolom DATETIME dikembalikan sebagai datetime. Skema dibuat otomatis
+termasuk gallery_changes/gallery_meta + trigger, sehingga sinkronisasi
+gallery antar worker gunicorn tetap jalan. Dipakai lewat DatabasePool(connect=...) saat
+DB_BACKEND=sqlite.
+
+Usage: python sqlite_db.py presensi_loadtest.db [--seed_users 1000]
+"""
+
+import argparse
+import re
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name VARCHAR(100),
+  photo VARCHAR(255),
+  embedding BLOB
+);
+CREATE TABLE IF NOT EXISTS absensi (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  user_id INTEGER,
+  waktu DATETIME
+);
+CREATE INDEX IF NOT EXISTS idx_absensi_waktu ON absensi (waktu);
+CREATE TABLE IF NOT EXISTS gallery_changes (
+  version INTEGER PRIMARY KEY,
+  user_id INTEGER NOT NULL,
+  op VARCHAR(8) NOT NULL,
+  changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS gallery_meta (
+  id INTEGER PRIMARY KEY,
+  version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO gallery_meta (id, version) VALUES (1, 0);
+CREATE TABLE IF NOT EXISTS user_embeddings (
+  user_id INTEGER NOT NULL,
+  model_version VARCHAR(64) NOT NULL,
+  embedding BLOB NOT NULL,
+  PRIMARY KEY (user_id, model_version)
+);
+CREATE TRIGGER IF NOT EXISTS users_gallery_insert AFTER INSERT ON users
+BEGIN
+  UPDATE gallery_meta SET version = version + 1 WHERE id = 1;
+  INSERT INTO gallery_changes (version, user_id, op) SELECT version, NEW.id, 'upsert' FROM gallery_meta WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS users_gallery_update AFTER UPDATE ON users
+BEGIN
+  UPDATE gallery_meta SET version = version + 1 WHERE id = 1;
+  INSERT INTO gallery_changes (version, user_id, op) SELECT version, NEW.id, 'upsert' FROM gallery_meta WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS users_gallery_delete AFTER DELETE ON users
+BEGIN
+  UPDATE gallery_meta SET version = version + 1 WHERE id = 1;
+  INSERT INTO gallery_changes (version, user_id, op) SELECT version, OLD.id, 'delete' FROM gallery_meta WHERE id = 1;
+END;
+"""
+
+_DATETIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d+)?$")
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+
+
+def _convert(value):
+    # MAX(waktu) kehilangan tipe kolom di SQLite; MySQL mengembalikan datetime
+    if isinstance(value, str) and _DATETIME_RE.match(value):
+        return datetime.fromisoformat(value)
+    return value
+
+
+class SQLiteCursor:
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace("%s", "?"), tuple(params or ()))
+
+    def executemany(self, sql, seq):
+        self._cursor.executemany(sql.replace("%s", "?"), [tuple(p) for p in seq])
+
+    def _row(self, row):
+        values = [_convert(v) for v in row]
+        if self._dictionary:
+            return {d[0]: v for d, v in zip(self._cursor.description, values)}
+        return tuple(values)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return None if row is None else self._row(row)
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, path, timeout=10.0):
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def cursor(self, dictionary=False):
+        return SQLiteCursor(self._conn.cursor(), dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=True, attempts=1, delay=0):
+        self._conn.execute("SELECT 1")
+
+    def close(self):
+        self._conn.close()
+
+
+def init_schema(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.commit()
+    conn.close()
+
+
+def connect(database="presensi_loadtest.db", timeout=10.0, **_ignored):
+    """Pengganti mysql.connector.connect; argumen MySQL lain (host, user, ...) diabaikan"""
+    init_schema(database)
+    return SQLiteConnection(database, timeout)
+
+
+def seed_users(path, count, model_version="tflite_fp16", dim=512, seed=0):
+    """Isi users dengan embedding acak ter-normalisasi (gallery seukuran produksi)"""
+    from embedding_codec import encode_embedding
+
+    init_schema(path)
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO users (name, photo, embedding) VALUES (?, ?, ?)",
+        [(f"user-{i}", None, encode_embedding(vec, model_id=model_version)) for i, vec in enumerate(vectors)]
+    )
+    conn.commit()
+    conn.close()
+    print(f"[+] {count} user acak ditambahkan ke {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buat database SQLite stand-in")
+    parser.add_argument("path", help="File database SQLite")
+    parser.add_argument("--seed_users", type=int, default=0,
+                        help="Jumlah user dengan embedding acak (default: 0)")
+    parser.add_argument("--model_version", type=str, default="tflite_fp16",
+                        help="Tag model embedding acak (default: tflite_fp16)")
+    args = parser.parse_args()
+
+    init_schema(args.path)
+    if args.seed_users:
+        seed_users(args.path, args.seed_users, args.model_version)
+
+
+if __name__ == "__main__":
+    main()
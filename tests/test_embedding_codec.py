@@ -0,0 +1,61 @@
+import base64
+import os
+import pickle
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from embedding_codec import (EmbeddingFormatError, decode_embedding, embedding_model_id,
+                             encode_embedding, read_header)
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_round_trip(dtype):
+    vec = np.random.default_rng(0).standard_normal(512).astype(np.float32)
+    blob = encode_embedding(vec, model_id="arcface-fp16", dtype=dtype)
+
+    decoded = decode_embedding(blob)
+    assert decoded.dtype == np.dtype(dtype)
+    assert decoded.shape == (512,)
+    np.testing.assert_allclose(decoded, vec, rtol=1e-3 if dtype == "float16" else 0)
+    assert embedding_model_id(blob) == "arcface-fp16"
+
+
+def test_model_id_padding_keeps_data_aligned():
+    for model_id in ("", "a", "abc", "abcd", "abcde"):
+        blob = encode_embedding(np.arange(4, dtype=np.float32), model_id=model_id)
+        assert read_header(blob)["offset"] % 4 == 0
+        np.testing.assert_array_equal(decode_embedding(blob), np.arange(4, dtype=np.float32))
+
+
+def test_truncated_blob_rejected():
+    blob = encode_embedding(np.ones(8, dtype=np.float32))
+    with pytest.raises(EmbeddingFormatError):
+        decode_embedding(blob[:-4])
+
+
+def test_legacy_pickle_still_decodes():
+    vec = np.linspace(-1, 1, 16)
+    blob = base64.b64encode(pickle.dumps(vec)).decode("utf-8")
+    np.testing.assert_array_equal(decode_embedding(blob), vec)
+    assert embedding_model_id(blob) is None
+
+
+class _Payload:
+    def __reduce__(self):
+        return (os.system, ("echo pwned",))
+
+
+@pytest.mark.parametrize("obj", [_Payload(), OrderedDict(a=1)])
+def test_legacy_pickle_with_foreign_class_refused(obj):
+    blob = base64.b64encode(pickle.dumps(obj))
+    with pytest.raises(pickle.UnpicklingError):
+        decode_embedding(blob)
+
+
+@pytest.mark.parametrize("obj", [[1.0, 2.0], {"embedding": [1.0, 2.0]}, "text"])
+def test_legacy_pickle_without_array_refused(obj):
+    blob = base64.b64encode(pickle.dumps(obj))
+    with pytest.raises(EmbeddingFormatError):
+        decode_embedding(blob)
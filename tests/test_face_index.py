@@ -0,0 +1,66 @@
+import numpy as np
+
+from face_index import ExactIndex, IVFIndex, make_index
+from gallery import l2_normalize
+
+
+def _clustered(n, dim=64, clusters=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = l2_normalize(rng.standard_normal((clusters, dim)))
+    labels = rng.integers(0, clusters, n)
+    return l2_normalize(centers[labels] + 0.35 * rng.standard_normal((n, dim)) / np.sqrt(dim) * 4)
+
+
+def test_ivf_recall_against_exact():
+    matrix = _clustered(4000)
+    rng = np.random.default_rng(1)
+    queries = l2_normalize(matrix[rng.choice(len(matrix), 200, replace=False)]
+                           + 0.05 * rng.standard_normal((200, matrix.shape[1])))
+
+    exact_idx, _ = ExactIndex(matrix).search(queries, k=1)
+    ivf = IVFIndex(nprobe=16, min_size=1000).build(matrix)
+    assert ivf.trained
+    ivf_idx, ivf_scores = ivf.search(queries, k=1)
+
+    recall = float(np.mean(exact_idx[:, 0] == ivf_idx[:, 0]))
+    assert recall >= 0.95
+    # Score IVF adalah cosine yang sebenarnya untuk kandidat yang dikembalikan
+    np.testing.assert_allclose(ivf_scores[:, 0],
+                               np.sum(matrix[ivf_idx[:, 0]] * queries, axis=1), atol=1e-5)
+
+
+def test_ivf_full_probe_equals_exact():
+    matrix = _clustered(1500, seed=2)
+    queries = matrix[:50]
+    ivf = IVFIndex(nprobe=10_000, min_size=1000).build(matrix)
+    exact_idx, _ = ExactIndex(matrix).search(queries, k=5)
+    ivf_idx, _ = ivf.search(queries, k=5)
+    np.testing.assert_array_equal(exact_idx, ivf_idx)
+
+
+def test_ivf_below_min_size_is_exact():
+    matrix = _clustered(100, seed=3)
+    ivf = IVFIndex(min_size=1000).build(matrix)
+    assert not ivf.trained
+    np.testing.assert_array_equal(ivf.search(matrix[:10], k=3)[0],
+                                  ExactIndex(matrix).search(matrix[:10], k=3)[0])
+
+
+def test_ivf_updated_keeps_recall():
+    matrix = _clustered(3000, seed=4)
+    ivf = IVFIndex(nprobe=16, min_size=1000).build(matrix)
+
+    keep = np.ones(len(matrix), dtype=bool)
+    keep[::10] = False
+    added = _clustered(100, seed=5)
+    new_matrix = np.vstack([matrix[keep], added])
+    updated = ivf.updated(new_matrix, keep=keep, new_count=len(added))
+
+    assert updated.centroids is ivf.centroids
+    idx, _ = updated.search(added, k=1)
+    assert float(np.mean(idx[:, 0] == np.arange(len(added)) + keep.sum())) >= 0.95
+
+
+def test_make_index():
+    assert isinstance(make_index("exact"), ExactIndex)
+    assert isinstance(make_index("ivf"), IVFIndex)
@@ -0,0 +1,129 @@
+import pytest
+
+import face_tracker
+from face_tracker import FaceTracker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(face_tracker.time, "monotonic", clock)
+    return clock
+
+
+def _identify(tracker, tracks, user_id=7, model_type="tflite_fp16"):
+    for track in tracks:
+        tracker.verified(track, user_id, f"user{user_id}", 0.8, model_type, recognized=True)
+
+
+def test_new_face_needs_verify_then_reused(clock):
+    tracker = FaceTracker(reverify_frames=10)
+    (track,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    assert track.needs_verify
+    _identify(tracker, [track])
+
+    clock.now += 0.1
+    (same,) = tracker.update("s1", [(104, 102, 80, 80)], "tflite_fp16")
+    assert same is track
+    assert not same.needs_verify
+    assert same.user_id == 7
+    assert tracker.stats()["reused"] == 1
+
+
+def test_association_keeps_identities_apart(clock):
+    tracker = FaceTracker()
+    left, right = tracker.update("s1", [(0, 0, 50, 50), (300, 0, 50, 50)], "tflite_fp16")
+    tracker.verified(left, 1, "a", 0.9, "tflite_fp16", recognized=True)
+    tracker.verified(right, 2, "b", 0.9, "tflite_fp16", recognized=True)
+
+    clock.now += 0.1
+    # Urutan box dari detector berubah
+    tracks = tracker.update("s1", [(302, 2, 50, 50), (2, 1, 50, 50)], "tflite_fp16")
+    assert [t.user_id for t in tracks] == [2, 1]
+
+
+def test_sessions_are_isolated(clock):
+    tracker = FaceTracker()
+    (track,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    _identify(tracker, [track])
+    (other,) = tracker.update("s2", [(100, 100, 80, 80)], "tflite_fp16")
+    assert other.needs_verify and other.user_id is None
+
+
+def test_reverify_every_k_frames(clock):
+    tracker = FaceTracker(reverify_frames=3)
+    (track,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    _identify(tracker, [track])
+
+    flags = []
+    for _ in range(3):
+        clock.now += 0.05
+        (track,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+        flags.append(track.needs_verify)
+    assert flags == [False, False, True]
+
+
+def test_reverify_on_box_change_and_model_change(clock):
+    tracker = FaceTracker(reverify_iou=0.5)
+    (track,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    _identify(tracker, [track])
+
+    clock.now += 0.05
+    (track,) = tracker.update("s1", [(100, 100, 80, 80)], "other_model")
+    assert track.needs_verify
+
+    _identify(tracker, [track], model_type="other_model")
+    clock.now += 0.05
+    # Bergeser cukup jauh: masih track yang sama (centroid), tapi IoU ke box verifikasi rendah
+    (moved,) = tracker.update("s1", [(130, 100, 80, 80)], "other_model")
+    assert moved is track
+    assert moved.needs_verify
+
+
+def test_unrecognized_face_stays_unverified(clock):
+    tracker = FaceTracker()
+    (track,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    tracker.verified(track, -1, None, 0.1, "tflite_fp16", recognized=False)
+    clock.now += 0.05
+    (track,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    assert track.needs_verify and track.user_id is None
+
+
+def test_gap_between_frames_drops_tracks(clock):
+    tracker = FaceTracker(max_gap_ms=1000)
+    (track,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    _identify(tracker, [track])
+
+    clock.now += 5.0
+    (fresh,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    assert fresh is not track
+    assert fresh.needs_verify and fresh.user_id is None
+
+
+def test_missed_frames_drop_track(clock):
+    tracker = FaceTracker(max_missed=1)
+    (track,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    _identify(tracker, [track])
+    for _ in range(2):
+        clock.now += 0.05
+        tracker.update("s1", [], "tflite_fp16")
+    clock.now += 0.05
+    (fresh,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    assert fresh is not track and fresh.needs_verify
+
+
+def test_idle_session_restarts(clock):
+    tracker = FaceTracker(session_ttl=30.0, max_gap_ms=60_000)
+    (track,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    _identify(tracker, [track])
+    clock.now += 31.0
+    (fresh,) = tracker.update("s1", [(100, 100, 80, 80)], "tflite_fp16")
+    assert fresh.track_id == 1 and fresh is not track
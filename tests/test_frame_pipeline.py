@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+import pytest
+
+from frame_pipeline import decode_for_detection, jpeg_size
+
+
+def _jpeg(width, height):
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 255, (height // 40, width // 40, 3), dtype=np.uint8)
+    img = cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    assert ok
+    return buf.tobytes()
+
+
+@pytest.fixture(scope="module")
+def large_jpeg():
+    return _jpeg(2560, 1920)
+
+
+def test_jpeg_size_from_header(large_jpeg):
+    assert jpeg_size(np.frombuffer(large_jpeg, np.uint8)) == (2560, 1920)
+    assert jpeg_size(np.frombuffer(b"not a jpeg", np.uint8)) is None
+
+
+def test_reduced_decode_for_detection(large_jpeg):
+    frame = decode_for_detection(large_jpeg, detect_max_side=640)
+    assert frame.original_size == (2560, 1920)
+    assert frame.detect_img.shape[:2] == (480, 640)
+    # Decode dengan DCT scaling 1/4, bukan resolusi penuh
+    assert frame.crop_img.shape[:2] == (480, 640)
+
+
+def test_detect_box_maps_to_original(large_jpeg):
+    frame = decode_for_detection(large_jpeg, detect_max_side=640)
+    assert frame.to_original([(100, 50, 40, 30)], source="detect") == [(400, 200, 160, 120)]
+
+
+def test_small_face_decodes_higher_resolution_crop(large_jpeg):
+    frame = decode_for_detection(large_jpeg, detect_max_side=640)
+    detect_box = (100, 50, 40, 40)  # 160 px di gambar asli
+
+    crop_box = frame.prepare_crops([detect_box])
+    # 160 / 2 < 112: crop harus dari resolusi penuh
+    assert frame.crop_img.shape[:2] == (1920, 2560)
+    assert crop_box == [(400, 200, 160, 160)]
+    assert frame.to_crop([detect_box]) == crop_box
+    assert frame.to_original(crop_box) == [(400, 200, 160, 160)]
+
+
+def test_large_face_reuses_reduced_decode(large_jpeg):
+    frame = decode_for_detection(large_jpeg, detect_max_side=640)
+    reduced = frame.crop_img
+    detect_box = (100, 50, 200, 200)  # 800 px di gambar asli, 800 / 4 >= 112
+
+    crop_box = frame.prepare_crops([detect_box])
+    assert frame.crop_img is reduced
+    assert crop_box == [detect_box]
+    assert frame.to_original(crop_box) == [(400, 200, 800, 800)]
+
+
+def test_small_image_not_reduced():
+    frame = decode_for_detection(_jpeg(640, 480), detect_max_side=640)
+    assert frame.original_size == (640, 480)
+    assert frame.to_original([(10, 20, 30, 40)], source="detect") == [(10, 20, 30, 40)]
+
+
+def test_invalid_bytes():
+    assert decode_for_detection(b"\x00\x01garbage") is None
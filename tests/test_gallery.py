@@ -0,0 +1,97 @@
+import numpy as np
+
+from embedding_codec import LEGACY_MODEL_ID, encode_embedding
+from gallery import EmbeddingGallery
+
+
+def _row(user_id, vec, model_id=LEGACY_MODEL_ID, name=None):
+    return {"id": user_id, "name": name or f"user{user_id}",
+            "embedding": encode_embedding(vec, model_id=model_id)}
+
+
+def _unit(i, dim=8):
+    vec = np.zeros(dim, dtype=np.float32)
+    vec[i] = 1.0
+    return vec
+
+
+def test_load_and_match():
+    gallery = EmbeddingGallery()
+    gallery.load_rows([_row(1, _unit(0)), _row(2, _unit(1))])
+
+    ids, names, scores = gallery.match(np.vstack([_unit(1), _unit(0) * 3]))
+    assert ids.tolist() == [2, 1]
+    assert names.tolist() == ["user2", "user1"]
+    np.testing.assert_allclose(scores, [1.0, 1.0], atol=1e-6)
+
+
+def test_apply_upsert_replaces_and_appends():
+    gallery = EmbeddingGallery()
+    gallery.load_rows([_row(1, _unit(0)), _row(2, _unit(1))])
+
+    gallery.apply_rows([_row(1, _unit(2), name="renamed"), _row(3, _unit(3))])
+
+    assert sorted(gallery.ids.tolist()) == [1, 2, 3]
+    ids, names, _ = gallery.match(np.vstack([_unit(2), _unit(0), _unit(3)]))
+    assert ids[0] == 1 and names[0] == "renamed"
+    # Vektor lama user 1 sudah tidak ada di gallery
+    assert ids[1] != 1
+    assert ids[2] == 3
+
+
+def test_apply_delete():
+    gallery = EmbeddingGallery()
+    gallery.load_rows([_row(1, _unit(0)), _row(2, _unit(1))])
+
+    gallery.apply_rows([], deleted_ids=[2])
+
+    assert gallery.ids.tolist() == [1]
+    assert gallery.match(_unit(1))[0][0] == 1
+
+
+def test_apply_on_empty_gallery():
+    gallery = EmbeddingGallery()
+    gallery.load_rows([])
+    gallery.apply_rows([], deleted_ids=[5])
+    assert len(gallery) == 0
+
+    gallery.apply_rows([_row(7, _unit(4))])
+    assert gallery.match(_unit(4))[0][0] == 7
+
+
+def test_dimension_mismatch_skipped():
+    gallery = EmbeddingGallery()
+    gallery.load_rows([_row(1, _unit(0))])
+    gallery.apply_rows([_row(2, np.ones(16, dtype=np.float32))])
+    assert gallery.ids.tolist() == [1]
+
+
+def test_model_version_filter_on_load():
+    gallery = EmbeddingGallery(model_version="arcface-v2")
+    gallery.load_rows([
+        _row(1, _unit(0), model_id="arcface-v2"),
+        _row(2, _unit(1), model_id=LEGACY_MODEL_ID),
+        _row(3, _unit(2), model_id="arcface-v1"),
+    ])
+    assert gallery.ids.tolist() == [1]
+
+
+def test_model_version_change_evicts_user():
+    gallery = EmbeddingGallery(model_version="arcface-v2")
+    gallery.load_rows([_row(1, _unit(0), model_id="arcface-v2"),
+                       _row(2, _unit(1), model_id="arcface-v2")])
+
+    # Embedding user 2 kini dari model lain: keluar dari gallery
+    gallery.apply_rows([_row(2, _unit(1), model_id="arcface-v1")])
+    assert gallery.ids.tolist() == [1]
+
+
+def test_accepts():
+    assert EmbeddingGallery().accepts("anything")
+    gallery = EmbeddingGallery(model_version=LEGACY_MODEL_ID)
+    assert gallery.accepts(None)
+    assert gallery.accepts(LEGACY_MODEL_ID)
+    assert not gallery.accepts("arcface-v2")
+
+    gallery.upsert(9, "other", _unit(0), model_version="arcface-v2")
+    assert len(gallery) == 0